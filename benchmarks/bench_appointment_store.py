@@ -0,0 +1,114 @@
+"""Appointment store insert and query latency with a large number of bookings.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_appointment_store --count 1000000
+
+Fills a fresh store with ``--count`` appointments (five departments, every
+slot of the opening hours, day after day) in transactions of ``--chunk``, then
+times ``--ops`` single calls each of:
+
+- ``add``: a booking on a random day, free or already taken (a conflict);
+- ``availability`` (cold): a day whose bookings are not indexed yet;
+- ``availability`` (warm): the same day again, served from the index.
+
+The SQLite store is written to ``--path`` (default: a temporary directory).
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from src.core.config import settings
+from src.services.appointment_store import AppointmentConflict, MemoryAppointmentStore, SQLiteAppointmentStore
+
+DEPARTMENTS = ("Dentistry", "Cardiology", "Dermatology", "Orthopedics", "Neurology")
+
+
+def _day(n):
+    return time.strftime("%Y-%m-%d", time.gmtime(n * 86400))
+
+
+def _slots(slot_minutes):
+    opens = int(settings.APPOINTMENT_DAY_START[:2]) * 60
+    closes = int(settings.APPOINTMENT_DAY_END[:2]) * 60
+    return [f"{m // 60:02d}:{m % 60:02d}" for m in range(opens, closes, slot_minutes)]
+
+
+def fill(store, count, chunk):
+    slots = _slots(store.slot_minutes)
+    per_day = len(slots) * len(DEPARTMENTS)
+
+    def appointments(start, stop):
+        for n in range(start, stop):
+            day, rest = divmod(n, per_day)
+            department, slot = divmod(rest, len(slots))
+            yield {"department": DEPARTMENTS[department], "date": _day(day), "time": slots[slot], "tz": "Asia/Kolkata"}
+
+    t0 = time.perf_counter()
+    for start in range(0, count, chunk):
+        store.add_many(appointments(start, min(start + chunk, count)))
+    elapsed = time.perf_counter() - t0
+    print(f"filled {count} in {elapsed:.1f} s ({count / elapsed:,.0f}/s), {count // per_day + 1} days")
+    if isinstance(store, SQLiteAppointmentStore):
+        # Drop what filling indexed so queries start cold (the memory store's index is its data)
+        store.index = type(store.index)(max_keys=store.index.max_keys)
+    return count // per_day + 1
+
+
+def _report(name, times):
+    times = sorted(times)
+    p99 = times[max(0, round(len(times) * 0.99) - 1)]
+    print(f"{name:<22} p50 {statistics.median(times) * 1e6:>8.1f} us   p99 {p99 * 1e6:>8.1f} us")
+
+
+def bench(store, days, ops, seed=1):
+    rng = random.Random(seed)
+    slots = _slots(store.slot_minutes)
+    add_times, conflicts = [], 0
+    for _ in range(ops):
+        # Half the time a day that is full already, half a day past the filled range
+        day = rng.randrange(days) if rng.random() < 0.5 else days + rng.randrange(days)
+        appointment = {"department": rng.choice(DEPARTMENTS), "date": _day(day), "time": rng.choice(slots)}
+        t0 = time.perf_counter()
+        try:
+            store.add(appointment)
+        except AppointmentConflict:
+            conflicts += 1
+        add_times.append(time.perf_counter() - t0)
+    _report(f"add ({conflicts} conflicts)", add_times)
+
+    cold, warm = [], []
+    for _ in range(ops):
+        department, day = rng.choice(DEPARTMENTS), _day(rng.randrange(days))
+        for times in (cold, warm):
+            t0 = time.perf_counter()
+            store.availability(department, day)
+            times.append(time.perf_counter() - t0)
+    _report("availability (cold)", cold)
+    _report("availability (warm)", warm)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--chunk", type=int, default=20_000)
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--store", choices=("sqlite", "memory"), default="sqlite")
+    parser.add_argument("--path", default="")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.store == "memory":
+            store = MemoryAppointmentStore()
+        else:
+            store = SQLiteAppointmentStore(path=args.path or os.path.join(tmp, "appointments.sqlite3"))
+        days = fill(store, args.count, args.chunk)
+        bench(store, days, args.ops)
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
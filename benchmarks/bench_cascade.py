@@ -0,0 +1,96 @@
+"""Adaptive OCR cascade against always running the full-quality pass.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_cascade --backend tesseract
+
+Cards come from ``benchmarks.corpus.photo_cards`` (phone-style photos, JPEG).
+Each configuration runs ``OCRService.extract_text_from_bytes`` on every card
+and reports the mean and p95 time per card, ``fields`` (the share of cards
+whose department, date and time phrases come out the same as from the card's
+own text) and how often each tier answered.
+
+Without a working backend only the preprocessing cost of the ``fast`` and
+``full`` tiers is printed.
+"""
+import argparse
+import statistics
+import time
+from collections import Counter
+
+from PIL import Image
+
+from benchmarks.bench_preprocess import score_ocr
+from benchmarks.corpus import photo_cards
+from src.services.ocr_backends import get_backend
+from src.services.ocr_service import OCRService
+
+CONFIGS = {
+    "full only": ("full",),
+    "cascade": ("fast", "full", "sparse", "crop"),
+    "fast,full": ("fast", "full"),
+}
+
+
+def _p95(values):
+    return sorted(values)[max(0, round(len(values) * 0.95) - 1)]
+
+
+def bench_config(name, tiers, cards, backend):
+    service = OCRService(backend=backend, cascade=tiers)
+    times, fields, answered = [], [], Counter()
+    for lines, _, data in cards:
+        t0 = time.perf_counter()
+        result = service.extract_text_from_bytes(data)
+        times.append((time.perf_counter() - t0) * 1000)
+        _, fields_ok = score_ocr(lines, result["raw_text"])
+        fields.append(fields_ok)
+        answered[result["tier"]] += 1
+    return {
+        "config": name,
+        "mean_ms": statistics.mean(times),
+        "p95_ms": _p95(times),
+        "fields": sum(fields) / len(fields),
+        "tiers": ", ".join(f"{tier} {count}" for tier, count in answered.most_common()),
+    }
+
+
+def bench_preprocessing(cards):
+    service = OCRService(backend=object())
+    for tier, preprocessor in (("fast", service.fast_preprocessor), ("full", service.preprocessor)):
+        times, pixels = [], []
+        for _, _, data in cards:
+            image = service.preprocessor.decode(data)
+            t0 = time.perf_counter()
+            image = preprocessor.process(image)
+            times.append((time.perf_counter() - t0) * 1000)
+            pixels.append(image.width * image.height / 1e6)
+        print(f"{tier:<6} prep {statistics.mean(times):>7.1f} ms {statistics.mean(pixels):>6.2f} MPix")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="tesseract")
+    parser.add_argument("--cards", type=int, default=12)
+    parser.add_argument("--width", type=int, default=4000)
+    args = parser.parse_args()
+
+    cards = photo_cards(args.cards, width=args.width)
+    print(f"{len(cards)} cards, {args.width} px wide")
+    backend = get_backend(args.backend)
+    try:
+        backend.warm_up()
+        backend.recognize(Image.new("L", (32, 32), 255))
+    except Exception as e:  # backend not installed, tesseract binary missing, ...
+        print(f"{args.backend}: skipped OCR ({type(e).__name__}: {e})")
+        bench_preprocessing(cards)
+        return
+
+    print(f"{'config':<10} {'mean ms':>8} {'p95 ms':>8} {'fields':>6}  answered by")
+    for name, tiers in CONFIGS.items():
+        r = bench_config(name, tiers, cards, backend)
+        print(f"{r['config']:<10} {r['mean_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['fields']:>6.0%}  {r['tiers']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Department matching as the synonym table grows: exact words, OCR misreads, no department.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_departments
+    python -m benchmarks.bench_departments --sizes 11 1000 10000 --seconds 2
+
+For each size the built-in table is padded with made-up synonyms (random
+lower-case words of 6 to 14 letters) and a ``TextScanner`` is built from it;
+the build time is printed with the throughput of its department lookup
+(``departments.find``) and of the whole ``extract`` on three message mixes,
+ASCII and not. ``legacy`` is the old regex-per-synonym
+department loop on the same table, which has no fuzzy matching.
+"""
+import argparse
+import random
+import re
+import string
+import time
+
+from src.services.nlp_service import DEPARTMENT_SYNONYMS, TextScanner
+
+MIXES = {
+    "exact": ["Book cardiology on March 10 at 3 PM", "see derm tomorrow at 9 am", "dentist next friday at 3pm"],
+    "misread": ["Book cardiolgy on March 10 at 3 PM", "dermatol0gy tomorrow at 9 am", "neurolgoy next friday at 3pm"],
+    "none": ["Book a visit on March 10 at 3 PM", "see you tomorrow at 9 am", "call me next friday at 3pm"],
+}
+
+
+def synonym_table(size: int, seed: int = 7):
+    rng = random.Random(seed)
+    table = dict(DEPARTMENT_SYNONYMS)
+    while len(table) < size:
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(6, 14)))
+        table.setdefault(word, word.title())
+    return table
+
+
+def legacy_department(table):
+    patterns = [(token.lower(), re.compile(rf"\b{re.escape(token.lower())}\b"), canonical) for token, canonical in table.items()]
+
+    def find(text):
+        low = text.lower()
+        for token_low, pattern, canonical in patterns:
+            if token_low in low and pattern.search(low):
+                return canonical
+        return None
+    return find
+
+
+def throughput(fn, texts, seconds: float) -> float:
+    calls = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for text in texts:
+            fn(text)
+        calls += len(texts)
+    return calls / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[11, 1000, 5000])
+    parser.add_argument("--seconds", type=float, default=1.0, help="time spent on each mix")
+    args = parser.parse_args()
+    for size in args.sizes:
+        table = synonym_table(size)
+        t0 = time.perf_counter()
+        scanner = TextScanner(table)
+        print(f"{len(table):>6} synonyms: scanner built in {(time.perf_counter() - t0) * 1000:,.0f} ms")
+        legacy = legacy_department(table)
+        for name, texts in MIXES.items():
+            find = throughput(lambda text: scanner.departments.find(text.lower()), texts, args.seconds)
+            old = throughput(legacy, texts, args.seconds)
+            extract = throughput(scanner.extract, texts, args.seconds)
+            events = throughput(scanner.extract, [f"café {text}" for text in texts], args.seconds)
+            print(f"  {name:<8} find {find:>9,.0f}/s  (legacy loop {old:>9,.0f}/s)   extract {extract:>8,.0f}/s   non-ASCII {events:>8,.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Peak memory of image intake: the old read-everything path against chunked, capped intake.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_ingest_memory
+
+Peaks are measured with tracemalloc around each path. It sees Python objects
+(request bodies, base64 strings, decoded bytes) but not Pillow's pixel buffers,
+which are allocated in C; the old ``convert("RGB")`` copy (4 bytes per pixel)
+that the worker no longer makes is therefore not in these numbers.
+
+- ``base64 JSON (old)``: parse the JSON body, ``b64decode``, then
+  ``Image.open().convert("RGB")`` and ``convert("L")`` as the worker did.
+- ``base64 JSON (new)``: same body through ``decode_base64_capped``, a header
+  check, and a direct grayscale conversion.
+- ``raw body (new)``: the bytes ``POST /appointments/image`` receives, read in
+  chunks with ``read_capped``.
+- ``oversize upload``: a file several times ``IMAGE_MAX_BYTES`` read fully
+  (old) versus rejected by ``read_upload`` at the limit (new).
+- ``HTTP``: whole requests through the ASGI app with OCR stubbed out.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import tempfile
+import tracemalloc
+from io import BytesIO
+
+os.environ.setdefault("OCR_EXECUTOR", "thread")
+os.environ.setdefault("OCR_CACHE_PATH", "")
+
+from PIL import Image  # noqa: E402
+from starlette.datastructures import UploadFile  # noqa: E402
+
+from src.core.config import settings  # noqa: E402
+from src.services.image_ingest import (  # noqa: E402
+    ImageRejected,
+    decode_base64_capped,
+    inspect_image,
+    read_capped,
+    read_upload,
+)
+
+
+def noisy_png(width: int, height: int) -> bytes:
+    # Random pixels do not compress, so the PNG is close to width * height * 3 bytes
+    image = Image.frombytes("RGB", (width, height), os.urandom(width * height * 3))
+    buf = BytesIO()
+    image.save(buf, format="PNG", compress_level=1)
+    return buf.getvalue()
+
+
+def run(coro):
+    # asyncio.run() keeps extra references that inflate tracemalloc peaks
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def peak(fn) -> float:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        fn()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak_bytes / (1024 * 1024)
+
+
+def old_base64(body: bytes):
+    data = base64.b64decode(json.loads(body)["image_base64"])
+    Image.open(BytesIO(data)).convert("RGB").convert("L")
+
+
+def new_base64(body: bytes):
+    data = decode_base64_capped(json.loads(body)["image_base64"])
+    inspect_image(data)
+    image = Image.open(BytesIO(data))
+    image.load()
+    image.convert("L")
+
+
+def new_raw(raw: bytes):
+    async def chunks():
+        for i in range(0, len(raw), settings.IMAGE_READ_CHUNK):
+            yield raw[i:i + settings.IMAGE_READ_CHUNK]
+
+    data = run(read_capped(chunks()))
+    inspect_image(data)
+    image = Image.open(BytesIO(data))
+    image.load()
+    image.convert("L")
+
+
+def _upload(path: str) -> UploadFile:
+    return UploadFile(open(path, "rb"), size=None)
+
+
+def old_oversize(path: str):
+    async def read():
+        upload = _upload(path)
+        try:
+            data = await upload.read()
+            return len(data) > settings.IMAGE_MAX_BYTES
+        finally:
+            await upload.close()
+
+    run(read())
+
+
+def new_oversize(path: str):
+    async def read():
+        upload = _upload(path)
+        try:
+            await read_upload(upload)
+        except ImageRejected:
+            return True
+        finally:
+            await upload.close()
+
+    run(read())
+
+
+def http_peaks(png: bytes):
+    from fastapi.testclient import TestClient
+    from src.main import app
+    from src.services.ocr_cache import ocr_cache
+    from src.services.ocr_service import OCRService
+
+    # Keep the real decode but skip the OCR engine itself
+    OCRService.extract_text_with_confidence = lambda self, image: {"raw_text": "dentist tomorrow at 3pm", "confidence": 0.9}
+    client = TestClient(app)
+    payload = json.dumps({"image_base64": base64.b64encode(png).decode("ascii")})
+    headers = {"Cache-Control": "no-store"}
+
+    def via_json():
+        ocr_cache.clear()
+        assert client.post("/appointments", content=payload, headers={**headers, "Content-Type": "application/json"}).status_code == 200
+
+    def via_raw():
+        ocr_cache.clear()
+        assert client.post("/appointments/image", content=png, headers={**headers, "Content-Type": "image/png"}).status_code == 200
+
+    via_json(), via_raw()  # warm up imports and the OCR pool
+    return peak(via_json), peak(via_raw)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=1100)
+    parser.add_argument("--height", type=int, default=1000)
+    parser.add_argument("--oversize-factor", type=int, default=8)
+    args = parser.parse_args()
+
+    png = noisy_png(args.width, args.height)
+    body = json.dumps({"image_base64": base64.b64encode(png).decode("ascii")}).encode()
+    print(f"image: {args.width}x{args.height} PNG, {len(png) / 2**20:.2f} MiB ({len(body) / 2**20:.2f} MiB as base64 JSON)")
+
+    print(f"  base64 JSON (old)   peak {peak(lambda: old_base64(body)):8.2f} MiB")
+    print(f"  base64 JSON (new)   peak {peak(lambda: new_base64(body)):8.2f} MiB")
+    print(f"  raw body (new)      peak {peak(lambda: new_raw(png)):8.2f} MiB")
+
+    with tempfile.NamedTemporaryFile(suffix=".bin", delete=False) as f:
+        f.write(os.urandom(settings.IMAGE_MAX_BYTES * args.oversize_factor))
+        path = f.name
+    try:
+        size_mib = os.path.getsize(path) / 2**20
+        print(f"oversize upload: {size_mib:.0f} MiB")
+        print(f"  full read (old)     peak {peak(lambda: old_oversize(path)):8.2f} MiB")
+        print(f"  capped read (new)   peak {peak(lambda: new_oversize(path)):8.2f} MiB")
+    finally:
+        os.remove(path)
+
+    json_peak, raw_peak = http_peaks(png)
+    print("HTTP request (OCR stubbed):")
+    print(f"  POST /appointments (image_base64)  peak {json_peak:8.2f} MiB")
+    print(f"  POST /appointments/image           peak {raw_peak:8.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
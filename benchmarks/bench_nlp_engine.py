@@ -0,0 +1,68 @@
+"""Per-call latency of the compiled NLP scanner against the old regex-per-field code.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_nlp_engine
+
+Inputs are a short typed message and a multi-KB OCR dump (a card's text buried
+in unrelated lines, as tesseract returns for a full page).
+"""
+import argparse
+import random
+import timeit
+
+import tests.legacy_nlp as legacy
+from src.services import nlp_service
+
+SHORT = "Book dentist next Friday at 3pm"
+
+_FILLER = [
+    "Patient copy - retain for your records",
+    "Ward 4B, Block C, 2nd floor",
+    "Bring previous prescriptions and reports",
+    "Helpline 1800 200 300 | www.cityhospital.example",
+    "Fees once paid are non refundable",
+    "Lab samples collected between 7 and 11",
+]
+
+
+def long_dump(size: int = 4096, seed: int = 3) -> str:
+    rng = random.Random(seed)
+    lines = []
+    while sum(len(l) + 1 for l in lines) < size:
+        lines.append(rng.choice(_FILLER))
+    lines.insert(len(lines) * 2 // 3, "Follow-up: Cardiology with Dr. Mehta on March 10th @ l0:30 am")
+    return "\n".join(lines)
+
+
+def _full(module, text):
+    cleaned = module.normalize_ocr_noise(text)
+    entities = module.extract_entities(cleaned)
+    return module.score_entities(entities, 0.9)
+
+
+def bench(label: str, text: str, number: int) -> None:
+    cases = [
+        ("normalize_ocr_noise", lambda m: m.normalize_ocr_noise(text)),
+        ("extract_entities", lambda m: m.extract_entities(text)),
+        ("clean+extract+score", lambda m: _full(m, text)),
+    ]
+    print(f"{label} input ({len(text)} chars), {number} calls")
+    for name, fn in cases:
+        assert fn(legacy) == fn(nlp_service), name
+        old = min(timeit.repeat(lambda: fn(legacy), number=number, repeat=3)) / number * 1e6
+        new = min(timeit.repeat(lambda: fn(nlp_service), number=number, repeat=3)) / number * 1e6
+        print(f"  {name:<22} legacy {old:>9.2f} us   engine {new:>9.2f} us   x{old / new:5.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--long-size", type=int, default=4096)
+    args = parser.parse_args()
+    bench("short", SHORT, args.number)
+    bench("long", long_dump(args.long_size), max(1, args.number // 10))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Throughput of the table-driven date/time normalizer against the strptime-based one.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_normalizer
+
+Each mix is a list of entity dicts as ``extract_entities`` returns them; the
+reference date is left unset, as in the API, so the today-lookup is included.
+"""
+import argparse
+import time
+
+import tests.legacy_nlp as legacy
+from src.services import nlp_service
+
+MIXES = {
+    "relative": [
+        {"date_phrase": p, "time_phrase": t}
+        for p in ("today", "tomorrow", "next friday", "this monday", "next sunday")
+        for t in ("3pm", "10:30 AM", "at 9")
+    ],
+    "month/day": [
+        {"date_phrase": p, "time_phrase": t}
+        for p in ("March 10th", "June 5, 2026", "december 31st", "January 2nd, 2027")
+        for t in ("3 PM", "15:45", "11am")
+    ],
+}
+
+
+def throughput(module, entities, seconds: float) -> float:
+    normalize = module.normalize_entities
+    calls = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for e in entities:
+            normalize(e)
+        calls += len(entities)
+    return calls / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=1.0, help="time spent on each mix per implementation")
+    args = parser.parse_args()
+    for name, entities in MIXES.items():
+        old = throughput(legacy, entities, args.seconds)
+        new = throughput(nlp_service, entities, args.seconds)
+        print(f"{name:<10} legacy {old:>10,.0f} calls/s   tables {new:>10,.0f} calls/s   x{new / old:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Compare OCR backends on synthetic appointment cards.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_ocr_backends --backends tesseract easyocr --repeat 5
+
+For each backend this reports the one-off load time (EasyOCR model load) and
+per-image latency. For tesseract it also times a bare ``tesseract --version``
+run, which approximates the process start-up cost paid on every image.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import time
+from io import BytesIO
+
+from PIL import Image
+
+from benchmarks.corpus import card_images
+from src.services.ocr_backends import get_backend
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))]
+
+
+def tesseract_startup_ms(repeat: int) -> float:
+    import pytesseract
+
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([pytesseract.pytesseract.tesseract_cmd, "--version"], capture_output=True, check=True)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def bench_backend(name: str, images, repeat: int) -> dict:
+    backend = get_backend(name)
+    t0 = time.perf_counter()
+    backend.warm_up()
+    load_ms = (time.perf_counter() - t0) * 1000
+
+    decoded = [Image.open(BytesIO(b)).convert("L") for b in images]
+    samples = []
+    for _ in range(repeat):
+        for image in decoded:
+            t0 = time.perf_counter()
+            backend.recognize(image)
+            samples.append((time.perf_counter() - t0) * 1000)
+    result = {
+        "backend": name,
+        "load_ms": round(load_ms, 1),
+        "images": len(samples),
+        "mean_ms": round(statistics.mean(samples), 1),
+        "p50_ms": round(_percentile(samples, 50), 1),
+        "p95_ms": round(_percentile(samples, 95), 1),
+    }
+    if name == "tesseract":
+        result["process_startup_ms"] = round(tesseract_startup_ms(repeat), 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["tesseract", "easyocr"])
+    parser.add_argument("--images", type=int, default=5)
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    images = card_images(args.images, width=args.width)
+    results = []
+    for name in args.backends:
+        try:
+            results.append(bench_backend(name, images, args.repeat))
+        except Exception as e:  # backend not installed, tesseract binary missing, ...
+            results.append({"backend": name, "error": f"{type(e).__name__}: {e}"})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        if "error" in r:
+            print(f"{r['backend']:<10} skipped: {r['error']}")
+            continue
+        line = f"{r['backend']:<10} load {r['load_ms']:>8.1f} ms  mean {r['mean_ms']:>7.1f} ms  p50 {r['p50_ms']:>7.1f} ms  p95 {r['p95_ms']:>7.1f} ms"
+        if "process_startup_ms" in r:
+            line += f"  (process start-up ~{r['process_startup_ms']:.1f} ms/image)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""OCR preprocessing chains on synthetic phone-photo appointment cards.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_preprocess --backend tesseract
+
+Cards come from ``benchmarks.corpus.photo_cards``: ~4000 px wide, tilted by up
+to 6 degrees, grey-on-grey and noisy, saved as JPEG. Each chain is timed from
+the JPEG bytes to the image handed to the OCR backend (decode included), and
+the output is measured for size, leftover skew and text line height.
+
+When the backend runs here, the same images are also recognized and scored:
+``words`` is the share of the card's words found in the OCR text, ``fields``
+the share of cards whose department, date and time phrases come out the same
+as from the card's own text. Without a backend only the preprocessing columns
+are printed.
+"""
+import argparse
+import re
+import statistics
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from benchmarks.corpus import photo_cards
+from src.services.nlp_service import analyze_text
+from src.services.ocr_backends import get_backend
+from src.services.preprocess import ImagePreprocessor, analyze_layout
+
+CHAINS = {
+    "legacy": None,  # full-size decode, convert("RGB") then convert("L")
+    "grayscale": (),
+    "default": ("draft", "downscale", "deskew", "contrast"),
+    "default+binarize": ("draft", "downscale", "deskew", "contrast", "binarize"),
+}
+
+_FIELDS = ("department", "date_phrase", "time_phrase")
+
+
+def legacy_chain(data: bytes) -> Image.Image:
+    return Image.open(BytesIO(data)).convert("RGB").convert("L")
+
+
+def prepare(chain, data: bytes) -> Image.Image:
+    if chain is None:
+        return legacy_chain(data)
+    preprocessor = ImagePreprocessor(steps=chain)
+    return preprocessor.process(preprocessor.decode(data))
+
+
+def _words(text: str):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def score_ocr(lines, text: str):
+    expected = _words(" ".join(lines))
+    found = set(_words(text))
+    word_share = sum(w in found for w in expected) / len(expected)
+    want = analyze_text("\n".join(lines))["entities"]
+    got = analyze_text(text)["entities"]
+    fields_ok = all((want.get(f) or "").lower() == (got.get(f) or "").lower() for f in _FIELDS)
+    return word_share, fields_ok
+
+
+def bench_chain(name, chain, cards, backend):
+    prep_ms, pixels, skew, line_heights, ocr_ms, words, fields = [], [], [], [], [], [], []
+    for lines, _, data in cards:
+        t0 = time.perf_counter()
+        image = prepare(chain, data)
+        prep_ms.append((time.perf_counter() - t0) * 1000)
+        pixels.append(image.width * image.height / 1e6)
+        angle, line_height = analyze_layout(np.asarray(image))
+        skew.append(abs(angle))
+        if line_height:
+            line_heights.append(line_height)
+        if backend is not None:
+            t0 = time.perf_counter()
+            text = backend.recognize(image)["raw_text"]
+            ocr_ms.append((time.perf_counter() - t0) * 1000)
+            word_share, fields_ok = score_ocr(lines, text)
+            words.append(word_share)
+            fields.append(fields_ok)
+    row = {
+        "chain": name,
+        "prep_ms": statistics.mean(prep_ms),
+        "mpix": statistics.mean(pixels),
+        "skew": statistics.mean(skew),
+        "line_px": statistics.median(line_heights) if line_heights else float("nan"),
+    }
+    if backend is not None:
+        row.update(ocr_ms=statistics.mean(ocr_ms), words=statistics.mean(words), fields=sum(fields) / len(fields))
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="tesseract")
+    parser.add_argument("--cards", type=int, default=8)
+    parser.add_argument("--width", type=int, default=4000)
+    args = parser.parse_args()
+
+    cards = photo_cards(args.cards, width=args.width)
+    backend = get_backend(args.backend)
+    try:
+        backend.warm_up()
+        backend.recognize(Image.new("L", (32, 32), 255))
+    except Exception as e:  # backend not installed, tesseract binary missing, ...
+        print(f"{args.backend}: skipped OCR ({type(e).__name__}: {e})")
+        backend = None
+
+    mean_kib = statistics.mean(len(data) for _, _, data in cards) / 1024
+    print(f"{len(cards)} cards, {args.width} px wide, {mean_kib:.0f} KiB JPEG on average")
+    header = f"{'chain':<18} {'prep ms':>8} {'MPix':>6} {'skew deg':>8} {'line px':>8}"
+    if backend is not None:
+        header += f" {'ocr ms':>8} {'words':>6} {'fields':>6}"
+    print(header)
+    for name, chain in CHAINS.items():
+        r = bench_chain(name, chain, cards, backend)
+        line = f"{r['chain']:<18} {r['prep_ms']:>8.1f} {r['mpix']:>6.2f} {r['skew']:>8.2f} {r['line_px']:>8.1f}"
+        if backend is not None:
+            line += f" {r['ocr_ms']:>8.1f} {r['words']:>6.0%} {r['fields']:>6.0%}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Response size and serialization time: full vs lean shape, stdlib json vs orjson.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_responses
+
+The response is what ``POST /appointments`` returns for a long OCR dump
+(``benchmarks.bench_nlp_engine.long_dump``, ``--size`` characters) with a
+single appointment in it. Each encoder renders the full and the lean body
+``--number`` times; bytes and microseconds per render are printed. orjson is
+skipped when it is not installed.
+"""
+import argparse
+import timeit
+
+from benchmarks.bench_nlp_engine import long_dump
+from src.pipelines.responses import build_response
+from src.api.responses import get_dumps, lean
+from src.pipelines.engine import PipelineContext
+from src.pipelines.stages import appointment_engine
+
+
+def response_body(size):
+    ctx = appointment_engine.run(PipelineContext(text=long_dump(size)))
+    status_code, content = build_response(ctx, text_input=False)
+    assert status_code == 200, content
+    content["appointment_id"] = "0f8e4c52-61a4-4a37-9d64-6b1d5a0c2f11"
+    return content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=4096)
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    full = response_body(args.size)
+    shapes = {"full": full, "lean": lean(full)}
+    print(f"{'encoder':<8} {'shape':<5} {'bytes':>7} {'us/render':>10}")
+    for name in ("json", "orjson"):
+        try:
+            dumps = get_dumps(name)
+        except ImportError:
+            print(f"{name:<8} skipped (not installed)")
+            continue
+        for shape, content in shapes.items():
+            seconds = timeit.timeit(lambda: dumps(content), number=args.number)
+            print(f"{name:<8} {shape:<5} {len(dumps(content)):>7} {seconds / args.number * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
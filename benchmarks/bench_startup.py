@@ -0,0 +1,112 @@
+"""Worker startup: import time, time to first successful request, time to ready.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_startup
+
+``import src.main`` is timed ``--runs`` times, each in a fresh interpreter,
+and the heavy modules it loaded are listed. Then uvicorn is started on a free
+port ``--runs`` times and, from the moment the process is launched, the script
+measures:
+
+- ``healthz``: first 200 from ``GET /healthz`` (the server accepts requests);
+- ``first text``: first 200 from ``POST /appointments`` with a text body;
+- ``readyz``: first 200 from ``GET /readyz`` (OCR workers warmed up).
+
+``readyz`` is reported as "not ready" when warm-up does not finish within
+``--timeout`` seconds (e.g. when the tesseract binary is missing). Bookings go
+to an in-memory store so runs do not conflict with each other.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+HEAVY_MODULES = ("numpy", "PIL", "pytesseract", "easyocr", "torch", "orjson")
+
+_IMPORT_PROBE = """
+import sys, time
+t0 = time.perf_counter()
+import src.main
+elapsed = time.perf_counter() - t0
+print(elapsed, ",".join(m for m in {modules!r} if m in sys.modules))
+"""
+
+
+def time_import():
+    out = subprocess.run(
+        [sys.executable, "-c", _IMPORT_PROBE.format(modules=HEAVY_MODULES)],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return float(out[0]), out[1] if len(out) > 1 else ""
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _ok(url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=2) as response:
+            return response.status == 200
+    except (urllib.error.URLError, ConnectionError, OSError):
+        return False
+
+
+def time_server(timeout, env):
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    t0 = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    marks = {}
+    checks = {
+        "healthz": lambda: _ok(f"{base}/healthz"),
+        "first text": lambda: _ok(f"{base}/appointments", {"text": "Book dentist on March 10th at 3 PM"}),
+        "readyz": lambda: _ok(f"{base}/readyz"),
+    }
+    try:
+        while len(marks) < len(checks) and time.perf_counter() - t0 < timeout:
+            for name, check in checks.items():
+                if name not in marks and check():
+                    marks[name] = time.perf_counter() - t0
+            time.sleep(0.005)
+    finally:
+        server.terminate()
+        server.wait()
+    return marks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    imports = [time_import() for _ in range(args.runs)]
+    print(f"import src.main        median {statistics.median(t for t, _ in imports) * 1000:>7.0f} ms   loaded: {imports[-1][1] or '-'}")
+
+    env = {**os.environ, "APPOINTMENT_STORE": "memory"}
+    runs = [time_server(args.timeout, env) for _ in range(args.runs)]
+    for name in ("healthz", "first text", "readyz"):
+        times = [marks[name] for marks in runs if name in marks]
+        if not times:
+            print(f"{name:<22} not ready within {args.timeout:.0f} s")
+            continue
+        print(f"{name:<22} median {statistics.median(times) * 1000:>7.0f} ms   ({len(times)}/{len(runs)} runs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Tiled OCR of large scans against one whole-page pass.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_tiles --backend tesseract --workers 4
+
+Pages come from ``benchmarks.corpus.a4_letter`` (two-column referral letters
+scanned at 300 dpi, appointment at the foot). Each configuration runs
+``OCRService.extract_text_from_bytes`` on every page with the full tier only
+and reports the mean wall-clock time per page, ``fields`` (the share of pages
+whose appointment department, date and time come out right) and the number
+of tiles.
+
+Without a working backend only the block finder is timed.
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+from PIL import Image
+
+from benchmarks.bench_preprocess import score_ocr
+from benchmarks.corpus import a4_letter
+from src.services.ocr_backends import get_backend
+from src.services.ocr_service import OCRService
+from src.services.preprocess import find_text_blocks
+
+APPOINTMENTS = [
+    ["Cardiology - Dr. Iyer", "Monday 14 July at 10:30 AM"],
+    ["Dentistry - Dr. Rao", "Friday 3 October at 3 PM"],
+    ["Dermatology clinic", "Tuesday 9 September at 9:15 AM"],
+]
+
+
+def bench_config(name, workers, pages, backend):
+    service = OCRService(backend=backend, cascade=["full"], tile_workers=workers)
+    times, fields, tiles = [], [], []
+    for lines, data in pages:
+        t0 = time.perf_counter()
+        result = service.extract_text_from_bytes(data)
+        times.append((time.perf_counter() - t0) * 1000)
+        fields.append(score_ocr(lines, result["raw_text"])[1])
+        tiles.append(result.get("tiles", 1))
+    return {"config": name, "mean_ms": statistics.mean(times), "fields": sum(fields) / len(fields), "tiles": statistics.mean(tiles)}
+
+
+def bench_layout(pages, workers):
+    service = OCRService(backend=object(), cascade=["full"])
+    for lines, data in pages:
+        image = service.preprocessor.process(service.preprocessor.decode(data))
+        t0 = time.perf_counter()
+        blocks = find_text_blocks(np.asarray(image), max_blocks=workers * 2)
+        elapsed = (time.perf_counter() - t0) * 1000
+        print(f"{image.width}x{image.height}: {len(blocks)} blocks in {elapsed:.1f} ms ({lines[0]})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="tesseract")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--dpi", type=int, default=300)
+    args = parser.parse_args()
+
+    pages = [(lines, a4_letter(lines, dpi=args.dpi, seed=i)) for i, lines in enumerate(APPOINTMENTS)]
+    print(f"{len(pages)} pages at {args.dpi} dpi")
+    backend = get_backend(args.backend)
+    try:
+        backend.warm_up()
+        backend.recognize(Image.new("L", (32, 32), 255))
+    except Exception as e:  # backend not installed, tesseract binary missing, ...
+        print(f"{args.backend}: skipped OCR ({type(e).__name__}: {e})")
+        bench_layout(pages, args.workers)
+        return
+
+    print(f"{'config':<10} {'mean ms':>8} {'fields':>6} {'tiles':>5}")
+    for name, workers in (("whole", 1), (f"tiled x{args.workers}", args.workers)):
+        r = bench_config(name, workers, pages, backend)
+        print(f"{r['config']:<10} {r['mean_ms']:>8.1f} {r['fields']:>6.0%} {r['tiles']:>5.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Synthetic appointment cards for benchmarks.
+
+Everything is generated from a seed so two runs see the same inputs.
+"""
+import random
+from io import BytesIO
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+CARD_LINES = [
+    ["City Hospital", "Dentistry - Dr. Rao", "Next Friday at 3 PM"],
+    ["Cardiology follow-up", "March 10th at 10:30 am", "Room 204"],
+    ["Dermatology clinic", "Tomorrow at 4pm", "Please arrive early"],
+    ["Orthopedics", "This Monday at 9 AM", "Bring X-ray reports"],
+    ["Neurology OPD", "August 5th at 11 am", "Token 17"],
+]
+
+
+def render_card(lines: List[str], width: int = 800, font_size: int = 32, fmt: str = "PNG") -> bytes:
+    """Render black text lines on a white card and return encoded image bytes."""
+    height = int(width * 0.6)
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=font_size)
+    y = font_size
+    for line in lines:
+        draw.text((font_size, y), line, fill="black", font=font)
+        y += int(font_size * 1.6)
+    out = BytesIO()
+    image.save(out, format=fmt)
+    return out.getvalue()
+
+
+# Building blocks of typed requests; a few combinations are incomplete on purpose
+MESSAGE_TEMPLATES = [
+    "Book {department} {date} at {time}",
+    "{department} appointment on {date}, {time}",
+    "Can I see the {department} {date} around {time}?",
+    "need {department} {date} {time} pls",
+    "Hi, I would like to book a {department} consultation {date} at {time}. Thanks, {name}",
+    "{name} - {department} - {date} - {time}",
+    "Please schedule my {department} follow-up for {date} {time}",
+    "{department} {date}",
+]
+MESSAGE_DEPARTMENTS = ["dentist", "dental", "cardiology", "cardio", "derm", "dermatology", "ortho", "orthopedics", "neuro", "neurology"]
+MESSAGE_DATES = ["tomorrow", "today", "next Friday", "this Monday", "next tuesday", "March 10th", "Aug 5", "on 21st June", "day after"]
+MESSAGE_TIMES = ["3pm", "10:30 am", "9 AM", "4 PM", "11am", "5:45 pm", "noon", "15:00", "evening"]
+MESSAGE_NAMES = ["Asha", "Ravi Kumar", "Meera", "John"]
+
+
+def text_messages(count: int = 200, seed: int = 7) -> List[str]:
+    """``count`` typed appointment requests in many phrasings."""
+    rng = random.Random(seed)
+    return [
+        rng.choice(MESSAGE_TEMPLATES).format(
+            department=rng.choice(MESSAGE_DEPARTMENTS),
+            date=rng.choice(MESSAGE_DATES),
+            time=rng.choice(MESSAGE_TIMES),
+            name=rng.choice(MESSAGE_NAMES),
+        )
+        for _ in range(count)
+    ]
+
+
+def card_images(count: int = 5, width: int = 800, seed: int = 7) -> List[bytes]:
+    rng = random.Random(seed)
+    return [render_card(rng.choice(CARD_LINES), width=width, font_size=max(12, width // 25)) for _ in range(count)]
+
+
+
+def photo_card(lines: List[str], width: int = 4000, angle: float = 0.0, noise: float = 12.0, seed: int = 7) -> bytes:
+    """Render a card the way a phone camera delivers it: large, tilted, low contrast, noisy JPEG."""
+    card = Image.open(BytesIO(render_card(lines, width=width, font_size=width // 25))).convert("L")
+    # Dark grey ink on grey paper
+    card = card.point(lambda v: 70 + v * 110 // 255)
+    card = card.rotate(angle, resample=Image.Resampling.BILINEAR, expand=True, fillcolor=180)
+    if noise:
+        # Gaussian sensor noise, seeded (Image.effect_noise is not) so the bytes are the same every run
+        grain = np.random.default_rng(seed).normal(0.0, noise, (card.height, card.width))
+        card = Image.fromarray(np.clip(np.asarray(card, dtype=np.float32) + grain, 0, 255).astype(np.uint8))
+    out = BytesIO()
+    card.convert("RGB").save(out, format="JPEG", quality=88)
+    return out.getvalue()
+
+
+def card_variants(
+    widths: Sequence[int] = (800, 1600, 3200),
+    noises: Sequence[float] = (0.0, 12.0, 24.0),
+    angles: Sequence[float] = (0.0, 3.0),
+    seed: int = 7,
+) -> List[Dict[str, object]]:
+    """One phone-style card per combination of width, noise level and rotation.
+
+    Each item is ``{"width", "noise", "angle", "lines", "image"}`` (JPEG bytes).
+    """
+    rng = random.Random(seed)
+    variants = []
+    for width in widths:
+        for noise in noises:
+            for angle in angles:
+                lines = rng.choice(CARD_LINES)
+                image = photo_card(lines, width=width, angle=angle, noise=noise, seed=rng.randrange(2**32))
+                variants.append({"width": width, "noise": noise, "angle": angle, "lines": lines, "image": image})
+    return variants
+
+
+def photo_cards(count: int = 5, width: int = 4000, max_angle: float = 6.0, seed: int = 7) -> List[Tuple[List[str], float, bytes]]:
+    """``(lines, angle, jpeg_bytes)`` for ``count`` seeded phone-style card photos."""
+    rng = random.Random(seed)
+    cards = []
+    for _ in range(count):
+        lines = rng.choice(CARD_LINES)
+        angle = round(rng.uniform(-max_angle, max_angle), 1)
+        cards.append((lines, angle, photo_card(lines, width=width, angle=angle, seed=rng.randrange(2**32))))
+    return cards
+
+
+LETTER_FILLER = (
+    "The patient was seen in the outpatient clinic and examined. History, medication and allergies "
+    "were reviewed with the family. Blood pressure and pulse were within normal limits. Please share "
+    "any earlier reports, imaging and discharge summaries with the consulting doctor before the visit."
+)
+
+
+def a4_letter(appointment: List[str], dpi: int = 300, columns: int = 2, paragraphs: int = 4, seed: int = 7) -> bytes:
+    """A referral letter scanned as an A4 page at ``dpi``: letterhead, body in ``columns`` columns, appointment at the foot.
+
+    Returned as PNG bytes (lossless, like a fax or flatbed scan).
+    """
+    rng = random.Random(seed)
+    width, height = round(8.27 * dpi), round(11.69 * dpi)
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    size = max(10, dpi // 8)
+    font = ImageFont.load_default(size=size)
+    margin = dpi // 2
+    draw.text((margin, margin), "City Hospital - Referral Letter", fill=0, font=ImageFont.load_default(size=size * 2))
+
+    words = LETTER_FILLER.split()
+    gutter = dpi // 3
+    col_width = (width - 2 * margin - (columns - 1) * gutter) // columns
+    chars_per_line = max(10, int(col_width / (size * 0.55)))
+    top = margin + size * 5
+    for column in range(columns):
+        x, y = margin + column * (col_width + gutter), top
+        for _ in range(paragraphs):
+            text = " ".join(rng.choice(words) for _ in range(rng.randint(40, 80)))
+            line = ""
+            for word in text.split():
+                if len(line) + len(word) + 1 > chars_per_line:
+                    draw.text((x, y), line, fill=0, font=font)
+                    y += int(size * 1.5)
+                    line = ""
+                line = f"{line} {word}".strip()
+            draw.text((x, y), line, fill=0, font=font)
+            y += int(size * 3.5)
+
+    y = height - margin - len(appointment) * int(size * 1.5)
+    for line in appointment:
+        draw.text((margin, y), line, fill=0, font=font)
+        y += int(size * 1.5)
+    out = BytesIO()
+    image.save(out, format="PNG")
+    return out.getvalue()
@@ -0,0 +1,343 @@
+"""Load generator for ``POST /appointments``: throughput, latency and event-loop lag under a request mix.
+
+Run from the repository root::
+
+    python -m benchmarks.loadtest --concurrency 1 8 32 --image-share 0 0.1 0.3
+    python -m benchmarks.loadtest --mode open --rate 200 --duration 20
+    python -m benchmarks.loadtest --uvicorn                     # a local server on a free port
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000   # a server you started
+
+By default ``src.main:app`` is driven in this process through httpx's ASGI
+transport, so the app shares the event loop with the generator and the lag
+measured is the app's own. Against a server (``--url`` / ``--uvicorn``) the
+lag is the generator's and says little about the server.
+
+Requests are drawn from a seeded sequence: a share ``--image-share`` are card
+images, sent as multipart ``image`` or, for ``--base64-share`` of them, as
+``image_base64``; the rest are typed messages. Every image request carries
+distinct bytes (a JPEG comment with a counter) so the OCR cache never answers;
+``--repeat-images`` sends the same few cards again instead.
+
+Modes:
+
+- ``closed``: ``--concurrency`` clients, each sending its next request as soon
+  as the previous one is answered;
+- ``open``: requests start at a fixed ``--rate`` per second whatever the
+  server does, at most ``--concurrency`` in flight (arrivals beyond that are
+  counted as ``dropped``). Latency is measured from the scheduled start, so
+  queueing in the generator counts against the server.
+
+Each run reports throughput, p50/p95/p99 latency per input kind, the share of
+``needs_clarification``, ``conflict``, ``rejected`` (429/503) and ``error``
+answers, and per ``--window`` seconds: completions, text p50/p95 and the
+largest event-loop lag. With several ``--concurrency`` / ``--image-share``
+values every combination is run and text latency is tabulated against them.
+``--output`` saves everything as JSON.
+"""
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+# In-process runs keep bookings in memory and leave no cache file behind
+os.environ.setdefault("APPOINTMENT_STORE", "memory")
+os.environ.setdefault("OCR_CACHE_PATH", "")
+
+import httpx
+
+from benchmarks.corpus import card_variants, text_messages
+from benchmarks.stats import percentile
+
+KINDS = ("text", "image", "image_base64")
+LAG_INTERVAL = 0.01
+
+
+def label(status_code: Optional[int], body: Optional[Dict[str, Any]]) -> str:
+    """Outcome of one request, in the server's own terms (see ``appointments._status_label``)."""
+    if status_code is None:
+        return "failed"
+    if status_code == 200:
+        return "ok"
+    if status_code in (429, 503):
+        return "rejected"
+    if isinstance(body, dict) and body.get("status") in ("needs_clarification", "conflict"):
+        return body["status"]
+    return "error"
+
+
+def _unique_jpeg(data: bytes, n: int) -> bytes:
+    """``data`` with a JPEG comment segment holding ``n``: the same picture, different bytes."""
+    comment = f"loadtest {n}".encode()
+    return data[:2] + b"\xff\xfe" + (len(comment) + 2).to_bytes(2, "big") + comment + data[2:]
+
+
+class Workload:
+    """Seeded sequence of ``(kind, httpx request kwargs)``."""
+
+    def __init__(self, image_share: float, base64_share: float, repeat_images: bool, seed: int = 7):
+        self.rng = random.Random(seed)
+        self.image_share = image_share
+        self.base64_share = base64_share
+        self.repeat_images = repeat_images
+        self.messages = text_messages(500, seed=seed)
+        self.cards = [v["image"] for v in card_variants(widths=(1200,), noises=(12.0,), angles=(0.0, 3.0), seed=seed)] if image_share else []
+        self._counter = itertools.count()
+
+    def next(self) -> Tuple[str, Dict[str, Any]]:
+        if not self.cards or self.rng.random() >= self.image_share:
+            return "text", {"json": {"text": self.rng.choice(self.messages)}}
+        data = self.rng.choice(self.cards)
+        if not self.repeat_images:
+            data = _unique_jpeg(data, next(self._counter))
+        if self.rng.random() < self.base64_share:
+            return "image_base64", {"json": {"image_base64": base64.b64encode(data).decode()}}
+        return "image", {"files": {"image": ("card.jpg", data, "image/jpeg")}}
+
+
+class Recorder:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        # (finished at, kind, latency seconds, outcome)
+        self.samples: List[Tuple[float, str, float, str]] = []
+        # (measured at, lag seconds)
+        self.lags: List[Tuple[float, float]] = []
+        self.dropped = 0
+
+    def now(self) -> float:
+        return time.perf_counter() - self.t0
+
+    async def send(self, client: httpx.AsyncClient, kind: str, kwargs: Dict[str, Any], started: float) -> None:
+        status_code, body = None, None
+        try:
+            response = await client.post("/appointments", **kwargs)
+            status_code = response.status_code
+            if response.headers.get("content-type", "").startswith("application/json"):
+                body = response.json()
+        except httpx.HTTPError:
+            pass
+        finished = self.now()
+        self.samples.append((finished, kind, finished - started, label(status_code, body)))
+
+    async def watch_loop(self, stop: asyncio.Event) -> None:
+        """Sample event-loop lag: how late a ``LAG_INTERVAL`` sleep wakes up."""
+        while not stop.is_set():
+            before = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lags.append((self.now(), max(0.0, time.perf_counter() - before - LAG_INTERVAL)))
+
+
+async def closed_loop(client, workload: Workload, recorder: Recorder, concurrency: int, duration: float) -> None:
+    async def user():
+        while recorder.now() < duration:
+            kind, kwargs = workload.next()
+            await recorder.send(client, kind, kwargs, recorder.now())
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+
+
+async def open_loop(client, workload: Workload, recorder: Recorder, rate: float, max_in_flight: int, duration: float) -> None:
+    in_flight = set()
+    for n in itertools.count():
+        due = n / rate
+        if due >= duration:
+            break
+        delay = due - recorder.now()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        kind, kwargs = workload.next()
+        if len(in_flight) >= max_in_flight:
+            recorder.dropped += 1
+            continue
+        task = asyncio.ensure_future(recorder.send(client, kind, kwargs, due))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    if in_flight:
+        await asyncio.wait(in_flight)
+
+
+def _latency(latencies: List[float]) -> Dict[str, Optional[float]]:
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    ordered = sorted(latencies)
+    return {f"p{q}_ms": round(percentile(ordered, q / 100) * 1000, 2) for q in (50, 95, 99)}
+
+
+def report(recorder: Recorder, elapsed: float, window: float) -> Dict[str, Any]:
+    samples = recorder.samples
+    outcomes = Counter(outcome for _, _, _, outcome in samples)
+    by_kind = {}
+    for kind in KINDS:
+        mine = [s for s in samples if s[1] == kind]
+        if mine:
+            by_kind[kind] = {"count": len(mine), **_latency([s[2] for s in mine]), "outcomes": dict(Counter(s[3] for s in mine))}
+
+    buckets = defaultdict(list)
+    for sample in samples:
+        buckets[int(sample[0] // window)].append(sample)
+    lag_buckets = defaultdict(list)
+    for at, lag in recorder.lags:
+        lag_buckets[int(at // window)].append(lag)
+    timeline = []
+    for i in range(max(list(buckets) + list(lag_buckets), default=-1) + 1):
+        text = _latency([s[2] for s in buckets[i] if s[1] == "text"])
+        lags = lag_buckets[i]
+        timeline.append({
+            "t": round(i * window, 3),
+            "completed_per_s": round(len(buckets[i]) / window, 1),
+            "text_p50_ms": text["p50_ms"],
+            "text_p95_ms": text["p95_ms"],
+            "loop_lag_max_ms": round(max(lags) * 1000, 2) if lags else None,
+        })
+
+    total = len(samples) or 1
+    all_lags = sorted(lag for _, lag in recorder.lags)
+    return {
+        "requests": len(samples),
+        "throughput_per_s": round(len(samples) / elapsed, 1),
+        **_latency([s[2] for s in samples]),
+        "rates": {name: round(outcomes[name] / total, 4) for name in ("ok", "needs_clarification", "conflict", "rejected", "error", "failed")},
+        "dropped": recorder.dropped,
+        "loop_lag_p99_ms": round(percentile(all_lags, 0.99) * 1000, 2) if all_lags else None,
+        "loop_lag_max_ms": round(all_lags[-1] * 1000, 2) if all_lags else None,
+        "by_kind": by_kind,
+        "timeline": timeline,
+    }
+
+
+async def run_once(args, base_url: Optional[str], concurrency: int, image_share: float) -> Dict[str, Any]:
+    workload = Workload(image_share, args.base64_share, args.repeat_images, seed=args.seed)
+    if base_url is None:
+        from src.main import app
+        from src.services.appointment_store import get_appointment_store
+        from src.services.ocr_executor import ocr_executor
+
+        # Runs start from an empty calendar and, when images are sent, warm OCR workers
+        get_appointment_store().clear()
+        if image_share and ocr_executor.warm_state != "ready" and not await ocr_executor.warm_up():
+            print(f"OCR warm-up failed, image requests will fail: {ocr_executor.warm_up_error}")
+        # An exception in the app becomes a 500, as a server would answer
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        client = httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout)
+    else:
+        client = httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=httpx.Limits(max_connections=concurrency))
+
+    recorder = Recorder()
+    stop = asyncio.Event()
+    watcher = asyncio.ensure_future(recorder.watch_loop(stop))
+    async with client:
+        if args.mode == "closed":
+            await closed_loop(client, workload, recorder, concurrency, args.duration)
+        else:
+            await open_loop(client, workload, recorder, args.rate, concurrency, args.duration)
+    elapsed = recorder.now()
+    stop.set()
+    await watcher
+    result = report(recorder, elapsed, args.window)
+    result.update({"mode": args.mode, "concurrency": concurrency, "image_share": image_share, "rate": args.rate if args.mode == "open" else None})
+    return result
+
+
+def _print_run(result: Dict[str, Any], timeline: bool) -> None:
+    print(f"\n== {result['mode']} concurrency {result['concurrency']} image share {result['image_share']:g}"
+          + (f" rate {result['rate']:g}/s" if result["rate"] else ""))
+    rates = ", ".join(f"{k} {v:.1%}" for k, v in result["rates"].items() if v)
+    print(f"{result['requests']} requests, {result['throughput_per_s']:,.1f}/s, dropped {result['dropped']}; {rates}")
+    print(f"loop lag p99 {result['loop_lag_p99_ms']} ms, max {result['loop_lag_max_ms']} ms")
+    for kind, stats in result["by_kind"].items():
+        print(f"  {kind:<13} n {stats['count']:>6}  p50 {stats['p50_ms']:>9} ms  p95 {stats['p95_ms']:>9} ms  p99 {stats['p99_ms']:>9} ms")
+    if timeline:
+        print(f"  {'t':>6} {'done/s':>8} {'text p50':>9} {'text p95':>9} {'lag max':>8}")
+        for row in result["timeline"]:
+            print(f"  {row['t']:>6} {row['completed_per_s']:>8} {row['text_p50_ms']!s:>9} {row['text_p95_ms']!s:>9} {row['loop_lag_max_ms']!s:>8}")
+
+
+def _print_matrix(results: List[Dict[str, Any]], concurrencies: List[int], shares: List[float]) -> None:
+    print("\ntext p95 ms (p50) by concurrency (rows) and image share (columns)")
+    print(f"{'':>6}" + "".join(f"{s:>18g}" for s in shares))
+    for c in concurrencies:
+        cells = []
+        for s in shares:
+            text = next(r for r in results if r["concurrency"] == c and r["image_share"] == s)["by_kind"].get("text", {})
+            cells.append(f"{text.get('p95_ms')!s} ({text.get('p50_ms')!s})")
+        print(f"{c:>6}" + "".join(f"{cell:>18}" for cell in cells))
+
+
+def _start_uvicorn() -> Tuple[subprocess.Popen, str]:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/healthz").status_code == 200:
+                return server, base_url
+        except httpx.HTTPError:
+            time.sleep(0.05)
+    server.terminate()
+    raise RuntimeError("uvicorn did not start within 30 s")
+
+
+async def main_async(args) -> List[Dict[str, Any]]:
+    server, base_url = (None, args.url or None)
+    if args.uvicorn:
+        server, base_url = _start_uvicorn()
+    results = []
+    try:
+        for concurrency, share in itertools.product(args.concurrency, args.image_share):
+            result = await run_once(args, base_url, concurrency, share)
+            _print_run(result, args.timeline)
+            results.append(result)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        elif base_url is None:
+            from src.services.ocr_executor import ocr_executor
+
+            ocr_executor.shutdown(wait=False)
+    if len(results) > 1:
+        _print_matrix(results, args.concurrency, args.image_share)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8], help="clients (closed) or in-flight cap (open)")
+    parser.add_argument("--rate", type=float, default=100.0, help="requests per second in open mode")
+    parser.add_argument("--image-share", type=float, nargs="+", default=[0.0])
+    parser.add_argument("--base64-share", type=float, default=0.5, help="share of image requests sent as image_base64")
+    parser.add_argument("--repeat-images", action="store_true")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--window", type=float, default=1.0)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--url", default="", help="drive a running server instead of the app in-process")
+    parser.add_argument("--uvicorn", action="store_true", help="start a local uvicorn server and drive it")
+    parser.add_argument("--timeline", action="store_true", help="print the per-window timeline")
+    parser.add_argument("--output", default="")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "runs": results}, f, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
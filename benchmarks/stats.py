@@ -0,0 +1,8 @@
+"""Small statistics helpers shared by the benchmark scripts."""
+import math
+from typing import Sequence
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile (``q`` in 0..1) of already sorted values."""
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
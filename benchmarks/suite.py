@@ -0,0 +1,244 @@
+"""Latency suite over a synthetic corpus, saved as JSON and compared with a baseline.
+
+Run from the repository root::
+
+    python -m benchmarks.suite                       # writes benchmarks/results/latest.json
+    python -m benchmarks.suite --save-baseline       # ... and keeps it as the baseline
+    python -m benchmarks.suite --baseline benchmarks/results/baseline.json
+
+The corpus comes from ``benchmarks.corpus`` and is the same on every run:
+typed messages in many phrasings, long OCR dumps, and phone-style card images
+for every combination of ``--widths``, ``--noises`` and ``--angles``. Cases,
+each timed per call and reported as p50/p95/p99 latency and ops/s:
+
+- ``normalize_ocr_noise``, ``extract_entities``, ``normalize_entities`` and
+  ``score_entities`` on typed messages and on OCR dumps;
+- ``OCRService.extract_text_from_bytes`` per card variant (width, noise, angle);
+- ``POST /appointments`` in-process (FastAPI test client) per input kind:
+  ``text``, ``image`` (multipart) and ``image_base64``. The OCR cache and the
+  appointment store are emptied before every call, outside the timed part, so
+  each call does the full work.
+
+Cases that need OCR are skipped, and listed as skipped in the JSON, when the
+OCR backend cannot start (e.g. no tesseract binary). With ``--baseline``, a
+case whose p50 or p95 is more than ``--tolerance`` slower than in the baseline
+is reported as a regression and the exit status is 1. Compare results from the
+same machine only.
+"""
+import argparse
+import base64
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# In-process, nothing left on disk: set before the app reads its settings
+os.environ.setdefault("OCR_EXECUTOR", "thread")
+os.environ.setdefault("OCR_CACHE_PATH", "")
+os.environ.setdefault("APPOINTMENT_STORE", "memory")
+os.environ.setdefault("OCR_WARM_UP", "false")
+
+from benchmarks.bench_nlp_engine import long_dump
+from benchmarks.corpus import card_variants, text_messages
+from benchmarks.stats import percentile
+from src.services import nlp_service
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+REGRESSION_METRICS = ("p50_ms", "p95_ms")
+
+
+def summarize(seconds: Sequence[float]) -> Dict[str, float]:
+    times = sorted(seconds)
+    return {
+        "n": len(times),
+        "p50_ms": round(percentile(times, 0.50) * 1000, 4),
+        "p95_ms": round(percentile(times, 0.95) * 1000, 4),
+        "p99_ms": round(percentile(times, 0.99) * 1000, 4),
+        "ops_per_s": round(len(times) / sum(times), 1) if sum(times) else None,
+    }
+
+
+def measure(fn: Callable[[Any], Any], inputs: Sequence[Any], number: int, setup: Optional[Callable[[], None]] = None, warmup: int = 3) -> List[float]:
+    """Call ``fn`` ``number`` times, cycling through ``inputs``; returns seconds per call.
+
+    ``setup`` runs before every call and is not timed. The first ``warmup``
+    calls are not recorded.
+    """
+    times = []
+    for i, item in enumerate(itertools.islice(itertools.cycle(inputs), number + warmup)):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        fn(item)
+        elapsed = time.perf_counter() - t0
+        if i >= warmup:
+            times.append(elapsed)
+    return times
+
+
+def _ocr_available() -> Optional[str]:
+    """None when the configured OCR backend starts, else why it does not."""
+    from src.services.ocr_backends import get_backend
+
+    try:
+        get_backend().warm_up()
+    except Exception as e:
+        return f"OCR backend unavailable: {type(e).__name__}: {e}"
+    return None
+
+
+def nlp_cases(messages: List[str], dumps: List[str], number: int):
+    for kind, texts in (("typed", messages), ("ocr", dumps)):
+        per_call = number if kind == "typed" else max(1, number // 10)
+        cleaned = [nlp_service.normalize_ocr_noise(t) for t in texts]
+        entities = [nlp_service.extract_entities(t) for t in cleaned]
+        yield f"normalize_ocr_noise/{kind}", lambda: measure(nlp_service.normalize_ocr_noise, texts, per_call)
+        yield f"extract_entities/{kind}", lambda: measure(nlp_service.extract_entities, cleaned, per_call)
+        yield f"normalize_entities/{kind}", lambda: measure(nlp_service.normalize_entities, entities, per_call)
+        yield f"score_entities/{kind}", lambda: measure(lambda e: nlp_service.score_entities(e, 0.9), entities, per_call)
+
+
+def ocr_cases(cards: List[Dict[str, Any]], number: int):
+    from src.services.ocr_service import OCRService
+
+    service = OCRService()
+    for card in cards:
+        name = f"ocr_extract/{card['width']}px-noise{card['noise']:g}-rot{card['angle']:g}"
+        yield name, lambda: measure(service.extract_text_from_bytes, [card["image"]], number, warmup=1)
+
+
+def route_cases(messages: List[str], cards: List[Dict[str, Any]], number: int, ocr_number: int, statuses: Dict[str, Dict[str, int]]):
+    """Route cases; response status codes are counted into ``statuses`` by input kind. Images only when ``cards``."""
+    from fastapi.testclient import TestClient
+
+    from src.main import app
+    from src.services.appointment_store import get_appointment_store
+    from src.services.ocr_cache import ocr_cache
+
+    client = TestClient(app)
+
+    def reset():
+        get_appointment_store().clear()
+        ocr_cache.clear()
+
+    def post(kind, request_kwargs):
+        def call(item):
+            status = str(client.post("/appointments", **request_kwargs(item)).status_code)
+            statuses.setdefault(kind, {}).setdefault(status, 0)
+            statuses[kind][status] += 1
+        return call
+
+    cases = [("text", messages, number, lambda text: {"json": {"text": text}})]
+    if cards:
+        images = [card["image"] for card in cards]
+        cases.append(("image", images, ocr_number, lambda data: {"files": {"image": ("card.jpg", data, "image/jpeg")}}))
+        cases.append(("image_base64", images, ocr_number, lambda data: {"json": {"image_base64": base64.b64encode(data).decode()}}))
+    for kind, inputs, count, request_kwargs in cases:
+        yield f"route/{kind}", lambda: measure(post(kind, request_kwargs), inputs, count, setup=reset, warmup=1)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """Cases present in both runs whose p50 or p95 grew by more than ``tolerance`` (0.25 = 25%)."""
+    regressions = []
+    for name, now in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            continue
+        for metric in REGRESSION_METRICS:
+            if before[metric] and now[metric] > before[metric] * (1 + tolerance):
+                regressions.append({"case": name, "metric": metric, "baseline": before[metric], "current": now[metric], "ratio": round(now[metric] / before[metric], 2)})
+    return regressions
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> Dict[str, Any]:
+    messages = text_messages(args.messages, seed=args.seed)
+    dumps = [long_dump(args.dump_size, seed=args.seed + i) for i in range(20)]
+    ocr_missing = _ocr_available()
+    cards = card_variants(args.widths, args.noises, args.angles, seed=args.seed) if ocr_missing is None else []
+
+    results: Dict[str, Dict[str, float]] = {}
+    skipped: Dict[str, str] = {}
+    statuses: Dict[str, Dict[str, int]] = {}
+    cases = [nlp_cases(messages, dumps, args.number)]
+    if ocr_missing is None:
+        cases.append(ocr_cases(cards, args.ocr_number))
+    else:
+        skipped["ocr_extract/*"] = ocr_missing
+        skipped["route/image"] = skipped["route/image_base64"] = ocr_missing
+    cases.append(route_cases(messages, cards, max(1, args.number // 10), args.ocr_number, statuses))
+    # Cases are (name, thunk) pairs, generated lazily; a case runs when its thunk is called
+    for name, timed in itertools.chain.from_iterable(cases):
+        if args.only and args.only not in name:
+            continue
+        results[name] = summarize(timed())
+        print(f"{name:<40} p50 {results[name]['p50_ms']:>9.3f} ms  p95 {results[name]['p95_ms']:>9.3f} ms  "
+              f"p99 {results[name]['p99_ms']:>9.3f} ms  {results[name]['ops_per_s']:>10,.1f} ops/s")
+    for name, reason in skipped.items():
+        print(f"{name:<40} skipped: {reason}")
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seed": args.seed,
+            "ocr_backend": os.environ.get("OCR_BACKEND", "tesseract"),
+        },
+        "results": results,
+        "route_statuses": statuses,
+        "skipped": skipped,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2000, help="calls per NLP case (OCR dumps and routes use a tenth)")
+    parser.add_argument("--ocr-number", type=int, default=5, help="calls per OCR case and per image route")
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--dump-size", type=int, default=2048)
+    parser.add_argument("--widths", type=int, nargs="+", default=[800, 1600, 3200])
+    parser.add_argument("--noises", type=float, nargs="+", default=[0.0, 12.0, 24.0])
+    parser.add_argument("--angles", type=float, nargs="+", default=[0.0, 3.0])
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--only", default="", help="run only cases whose name contains this")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "latest.json"))
+    parser.add_argument("--baseline", default="", help="results JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help=f"also write the results to {RESULTS_DIR}/baseline.json")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    report = run(args)
+    outputs = [args.output] + ([os.path.join(RESULTS_DIR, "baseline.json")] if args.save_baseline else [])
+    for path in outputs:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['case']} {r['metric']}: {r['baseline']} -> {r['current']} ms (x{r['ratio']})")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,24 @@
-from fastapi import APIRouter, HTTPException, File, UploadFile, Request
-from typing import Optional, Dict, Any
-from uuid import uuid4
-from datetime import datetime
-from zoneinfo import ZoneInfo
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, File, UploadFile, Request
+from typing import Optional, Dict, Any, List, Set, Tuple
+from fastapi.responses import StreamingResponse
+from src.api.responses import PREFER_MINIMAL, FastJSONResponse, dumps, lean, wants_lean
+from src.core.config import settings
 from src.pipelines.appointment_pipeline import AppointmentPipeline
-from src.services.nlp_service import (
-    extract_entities,
-    handle_ambiguity,
-    normalize_entities,
-    normalize_ocr_noise,
-)
-from src.services.ocr_service import OCRService
-import base64
+from src.pipelines.engine import PipelineContext
+from src.pipelines.responses import build_multiple_response, build_response, invalid_image, parse_json_item
+from src.pipelines.stages import appointment_engine, multiple_appointments_engine
+from src.services.admission import IMAGE, IMAGE_BASE64, TEXT, AdmissionRejected, Slot, admission
+from src.services.appointment_store import AppointmentConflict, get_appointment_store
+from src.services.clarification import UNRESOLVED, clarification_sessions
+from src.services.image_ingest import ImageRejected, decode_base64_capped, read_capped, read_upload
+from src.services.job_store import JobStoreFull, get_job_store
+from src.services.metrics import metrics
+from src.services.nlp_service import canonical_department, reference_date
+from src.services.ocr_executor import ocr_executor
+import asyncio
+import datetime
+import time
+from uuid import uuid4
 
 router = APIRouter()
 
@@ -33,38 +39,214 @@ except Exception:
     pass
 
 
-@router.post("", status_code=200)
-async def create_appointment(request: Request, image: Optional[UploadFile] = File(None)):
-    """Accept exactly one of: text (JSON), image (multipart), image_base64 (JSON).
+def _json_response(
+    result: Tuple[int, Dict[str, Any]], retry_after: Optional[int] = None, request: Optional[Request] = None
+) -> FastJSONResponse:
+    """Render ``(status_code, content)``, in the lean shape when ``request`` asks for it."""
+    status_code, content = result
+    if retry_after is None and status_code == 503:
+        retry_after = 1
+    headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+    if wants_lean(request):
+        content = lean(content)
+        if PREFER_MINIMAL in request.headers.get("prefer", "").lower():
+            headers["Preference-Applied"] = PREFER_MINIMAL
+    return FastJSONResponse(status_code=status_code, content=content, headers=headers or None)
 
-    Behavior compatibility notes:
-    - When a JSON `text` is provided we return the simple response expected by tests: {appointment_id, appointment}
-    - For image or base64 inputs the endpoint returns the full `pipeline` object + `appointment` per the assignment.
+
+def _admission_lane(request: Request, image: Optional[UploadFile]) -> str:
+    """Pick the admission lane for a `POST /appointments` before its body is parsed.
+
+    FastAPI has already read multipart forms by now, so those go by whether an
+    image was uploaded. JSON bodies go by `Content-Length`: small ones are
+    almost always typed text, anything larger (or unsized) is a base64 image.
+    """
+    if "multipart/form-data" in request.headers.get("content-type", ""):
+        return IMAGE if image is not None else TEXT
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) <= settings.ADMISSION_TEXT_MAX_BYTES:
+        return TEXT
+    return IMAGE_BASE64
+
+
+def _rejected(route: str, input_kind: str, e: AdmissionRejected) -> FastJSONResponse:
+    result = (e.status_code, {"status": "error", "message": e.message})
+    _record(route, input_kind, result, {})
+    return _json_response(result, e.retry_after)
+
+
+def _reference_date():
+    """Today's date in Asia/Kolkata, the reference for relative phrases like "tomorrow"."""
+    return reference_date()
+
+
+def _book_each(result: Tuple[int, Dict[str, Any]], idempotency_key: Optional[str]) -> Tuple[int, Dict[str, Any]]:
+    """Book every "ok" item of a multi-appointment result, as ``_book`` does for one.
+
+    Item ``i`` is booked under ``idempotency_key:i``, so a retry with the same
+    key gets the same `appointment_id`s back. An overlap turns just that item
+    into a "conflict".
+    """
+    status_code, content = result
+    if status_code != 200:
+        return result
+    store = get_appointment_store()
+    for i, item in enumerate(content["appointments"]):
+        if item["status"] != "ok":
+            continue
+        try:
+            stored = store.add({**item["appointment"], "name": item["entities"].get("name")}, _item_key(idempotency_key, i))
+        except AppointmentConflict as e:
+            item.update(status="conflict", message=str(e), conflicts=e.conflicts)
+            continue
+        item["appointment_id"] = stored.id
+    return result
+
+
+def _item_key(idempotency_key: Optional[str], index: int) -> Optional[str]:
+    """The key one item of a batch or multi-appointment result is booked under."""
+    return None if idempotency_key is None else f"{idempotency_key}:{index}"
+
+
+def _open_session(
+    result: Tuple[int, Dict[str, Any]], ctx: PipelineContext, book: bool = False, idempotency_key: Optional[str] = None
+) -> Tuple[int, Dict[str, Any]]:
+    """Keep a run that needs clarification server-side and add its `session_id`.
+
+    Only runs that got as far as extracting entities have anything to correct.
+    The session books the corrected appointment only when ``book`` is set.
+    """
+    status_code, content = result
+    if status_code != 400 or ctx.entities is None:
+        return result
+    session = clarification_sessions.open(
+        ctx.ocr_info, ctx.entities, ctx.ref_date or _reference_date(), ctx.clarification or UNRESOLVED, book, idempotency_key
+    )
+    content["session_id"] = session.id
+    return result
+
+
+def _book(result: Tuple[int, Dict[str, Any]], text_input: bool, idempotency_key: Optional[str]) -> Tuple[int, Dict[str, Any]]:
+    """Store the appointment of a successful result and add its `appointment_id`.
+
+    An appointment that overlaps one already booked for its department turns the
+    result into a `409` listing the `conflicts`, unless it is a retry under the
+    same ``idempotency_key`` (the client's `Idempotency-Key` header), which gets
+    the earlier `appointment_id` back. Other results pass through.
+    """
+    status_code, content = result
+    if status_code != 200:
+        return result
+    appointment = content["appointment"]
+    name = content["pipeline"]["entities"]["entities"].get("name")
+    try:
+        stored = get_appointment_store().add({**appointment, "name": name}, idempotency_key)
+    except AppointmentConflict as e:
+        conflict = {"pipeline": content["pipeline"], "appointment": appointment, "status": "conflict", "message": str(e), "conflicts": e.conflicts}
+        if text_input:
+            conflict["detail"] = str(e)
+        return 409, conflict
+    content["appointment_id"] = stored.id
+    return result
+
+
+def _unbooked(result: Tuple[int, Dict[str, Any]], text_input: bool) -> Tuple[int, Dict[str, Any]]:
+    """A successful result that was not booked; JSON `text` ones keep their legacy `appointment_id`.
+
+    That id is fresh on every call and names no stored appointment.
+    """
+    if result[0] == 200 and text_input:
+        result[1]["appointment_id"] = str(uuid4())
+    return result
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 3)
+
+
+def _wants_timings(request: Request) -> bool:
+    return request.query_params.get("timings", "").lower() in ("1", "true", "yes")
+
+
+def _wants_multiple(request: Request) -> bool:
+    return request.query_params.get("multiple", "").lower() in ("1", "true", "yes")
+
+
+def _wants_booking(request: Request) -> bool:
+    return request.query_params.get("book", "").lower() in ("1", "true", "yes")
+
+
+def _idempotency_key(request: Request) -> Optional[str]:
+    return request.headers.get("idempotency-key", "").strip() or None
+
+
+def _status_label(result: Tuple[int, Dict[str, Any]]) -> str:
+    status_code, content = result
+    if status_code == 200:
+        return "ok"
+    if content.get("status") in ("needs_clarification", "conflict"):
+        return content["status"]
+    return "error"
+
+
+def _record(route: str, input_kind: str, result: Tuple[int, Dict[str, Any]], timings: Dict[str, float]) -> None:
+    metrics.requests.inc(route, input_kind, _status_label(result))
+    metrics.observe_timings(timings)
+
+
+async def _run_pipeline(
+    request: Request,
+    ref_dt,
+    text_input: bool,
+    text: Optional[str] = None,
+    image_bytes: Optional[bytes] = None,
+    steps: Optional[Dict[str, float]] = None,
+    multiple: bool = False,
+    book: bool = False,
+    idempotency_key: Optional[str] = None,
+) -> Tuple[Tuple[int, Dict[str, Any]], PipelineContext]:
+    """Run the pipeline and build the response; with ``book``, also store what it found."""
+    ctx = PipelineContext(text=text, image_bytes=image_bytes, ref_date=ref_dt, request=request, step_timings=dict(steps or {}))
+    if multiple:
+        await multiple_appointments_engine.run_async(ctx)
+        result = build_multiple_response(ctx, text_input)
+        if book:
+            result = await asyncio.to_thread(_book_each, result, idempotency_key)
+        return result, ctx
+    await appointment_engine.run_async(ctx)
+    result = build_response(ctx, text_input)
+    if result[0] == 200 and book:
+        # The store may have to wait on SQLite
+        result = await asyncio.to_thread(_book, result, text_input, idempotency_key)
+    elif result[0] == 200:
+        result = _unbooked(result, text_input)
+    return _open_session(result, ctx, book, idempotency_key), ctx
+
+
+async def _parse_single(request: Request, image: Optional[UploadFile], steps: Dict[str, float]):
+    """Parse and validate a single `POST /appointments` request.
+
+    Returns ``(input_kind, error, inputs)``: ``error`` is a ``(status_code, content)``
+    rejection, otherwise ``inputs`` holds the keyword arguments for ``_run_pipeline``.
     """
     content_type = request.headers.get("content-type", "")
     is_json = "application/json" in content_type
+    invalid = (400, {"status": "error", "message": "Invalid input format"})
 
     # Parse inputs
     payload_text = None
     payload_base64 = None
-    ocr_info: Dict[str, Any] = {"raw_text": "", "confidence": 0.0}
-    source_text: Optional[str] = None
-
-    ocr_service = OCRService()
+    body: Dict[str, Any] = {}
 
+    started = time.perf_counter()
     if "multipart/form-data" in content_type:
         # form: text may be a form field and file in `image`
         form = await request.form()
         payload_text = form.get("text")
         if image is not None:
-            allowed = {"image/png", "image/jpeg", "image/jpg"}
+            allowed = {"image/png", "image/jpeg", "image/jpg", "image/tiff", "application/pdf"}
             if image.content_type not in allowed:
-                return JSONResponse(status_code=400, content={"status": "error", "message": "Invalid input format"})
-            content = await image.read()
-            if len(content) > 5 * 1024 * 1024:
-                return JSONResponse(status_code=400, content={"status": "error", "message": "Invalid input format"})
-            ocr_info = ocr_service.extract_text_from_bytes(content)
-            source_text = ocr_info.get("raw_text", "")
+                return "image", invalid, {}
     else:
         # assume JSON
         try:
@@ -72,126 +254,381 @@ async def create_appointment(request: Request, image: Optional[UploadFile] = Fil
         except Exception:
             body = {}
         # Distinguish presence of keys vs None/empty values to satisfy tests
-        has_text_key = "text" in body
-        has_base64_key = "image_base64" in body
-        if is_json and not has_text_key and not has_base64_key:
+        if is_json and "text" not in body and "image_base64" not in body:
             # API should return 422 Field required when JSON body has no relevant keys
-            return JSONResponse(status_code=422, content={
+            return "invalid", (422, {
                 "detail": [{"loc": ["body", "text"], "msg": "Field required.", "type": "value_error"}]
-            })
+            }), {}
         payload_text = body.get("text")
         payload_base64 = body.get("image_base64")
-        # store presence flags for later logic
-        json_has_text = has_text_key
-        json_has_base64 = has_base64_key
+    steps["body_parse"] = _elapsed_ms(started)
 
     # Exactly one input must be present
     if is_json:
         # Count keys provided in JSON (text or image_base64)
-        provided_count = sum(1 for k in ("text", "image_base64") if k in (body if 'body' in locals() else {}))
+        provided_count = sum(1 for k in ("text", "image_base64") if k in body)
     else:
         provided_count = sum(1 for v in (payload_text, payload_base64, image) if v)
 
     if provided_count != 1:
-        return JSONResponse(status_code=400, content={"status": "error", "message": "Invalid input format"})
+        return "invalid", invalid, {}
 
-    # Handle the provided input
+    # Collect the provided input; the ingest stage validates text and image size
+    if is_json and "text" in body:
+        return "text", None, {"text_input": True, "text": payload_text}
     if is_json:
-        # JSON-specific presence handling to match tests
-        if json_has_text:
-            # text key present (may be empty)
-            if not isinstance(payload_text, str) or not payload_text.strip():
-                return JSONResponse(status_code=422, content={
-                    "detail": [{"loc": ["body", "text"], "msg": "Text must not be empty.", "type": "value_error"}]
-                })
-            source_text = payload_text
-            ocr_info = {"raw_text": source_text, "confidence": 1.0}
-        elif json_has_base64:
-            # base64 path (JSON)
-            try:
-                decoded = base64.b64decode(payload_base64)
-            except Exception:
-                return JSONResponse(status_code=400, content={"status": "error", "message": "Invalid input format"})
-            if len(decoded) > 5 * 1024 * 1024:
-                return JSONResponse(status_code=400, content={"status": "error", "message": "Invalid input format"})
-            ocr_info = ocr_service.extract_text_from_bytes(decoded)
-            source_text = ocr_info.get("raw_text", "")
-        else:
-            # Shouldn't reach here due to earlier checks
-            return JSONResponse(status_code=400, content={"status": "error", "message": "Invalid input format"})
-    else:
-        # multipart/form-data path (image already handled above)
-        pass
+        started = time.perf_counter()
+        try:
+            decoded = decode_base64_capped(payload_base64)
+        except ImageRejected as e:
+            return "image_base64", invalid_image(e), {}
+        steps["base64_decode"] = _elapsed_ms(started)
+        return "image_base64", None, {"text_input": False, "image_bytes": decoded}
+    if image is not None:
+        started = time.perf_counter()
+        try:
+            image_bytes = await read_upload(image)
+        except ImageRejected as e:
+            return "image", invalid_image(e), {}
+        steps["body_parse"] += _elapsed_ms(started)
+        return "image", None, {"text_input": False, "image_bytes": image_bytes}
+    return "text", None, {"text_input": False, "text": payload_text}
+
+
+async def _dispatch(request: Request, image: Optional[UploadFile], steps: Dict[str, float], slot: Slot):
+    """Parse a single `POST /appointments` request and run it through the pipeline.
+
+    Returns ``(input_kind, (status_code, content), ctx)``; ``ctx`` is None when
+    the request was rejected before the pipeline ran.
+    """
+    input_kind, error, inputs = await _parse_single(request, image, steps)
+    if error is not None:
+        return input_kind, error, None
+    if input_kind == IMAGE_BASE64 and slot.lane == TEXT:
+        # A small base64 image came in through the text lane: it must not hold a text slot during OCR
+        await slot.switch(IMAGE_BASE64)
+    result, ctx = await _run_pipeline(
+        request, _reference_date(), steps=steps, multiple=_wants_multiple(request),
+        book=_wants_booking(request), idempotency_key=_idempotency_key(request), **inputs
+    )
+    return input_kind, result, ctx
 
-    # Normalize OCR noise
-    cleaned = normalize_ocr_noise(source_text)
 
-    # reference date for relative parsing (Asia/Kolkata)
+@router.post("", status_code=200)
+async def create_appointment(request: Request, image: Optional[UploadFile] = File(None)):
+    """Accept exactly one of: text (JSON), image (multipart), image_base64 (JSON).
+
+    Behavior compatibility notes:
+    - When a JSON `text` is provided we return the simple response expected by tests: {appointment_id, appointment}
+    - For image or base64 inputs the endpoint returns the full `pipeline` object + `appointment` per the assignment.
+    - Images may be PNG, JPEG, or multi-page TIFF/PDF documents; for documents
+      `pipeline.ocr` also lists the `pages` read with their own text and confidence.
+    - `?timings=true` adds a `timings` object with the milliseconds spent in each stage.
+    - `?view=lean` or `Prefer: return=minimal` drops `pipeline` and returns the
+      appointment, its status and a `confidence` object (ocr, entities, normalization).
+    - A `needs_clarification` (or otherwise incomplete) result carries a
+      `session_id`; send corrections for it to `/appointments/clarify`.
+    - Nothing is stored unless the request asks for it with `?book=true`. Then the
+      appointment is booked in the appointment store and gets its
+      `appointment_id`; one that overlaps a booking of the same department
+      returns `409` with `status: "conflict"` and the `conflicts`. A retry that
+      sends the same `Idempotency-Key` header gets its earlier booking back.
+    - `?multiple=true` reads every appointment in the text or document (e.g. a
+      follow-up sheet listing several visits) from one OCR run and returns them
+      as `appointments`, each with its own entities, scores, `status` and, when
+      booked, `appointment_id` (see `build_multiple_response`).
+    - Requests pass admission control first (see `src.services.admission`): `429`
+      when their lane's queue is full, `503` when the estimated OCR wait exceeds
+      the deadline (`X-Request-Deadline-Ms` header), both with `Retry-After`.
+    """
+    started = time.perf_counter()
+    steps: Dict[str, float] = {}
+    lane = _admission_lane(request, image)
+    deadline = admission.deadline(request.headers)
     try:
-        ref_dt = datetime.now(ZoneInfo("Asia/Kolkata")).date()
-    except Exception:
-        # If tz data not available, fall back to naive local date
-        ref_dt = datetime.now().date()
+        async with admission.admit(lane, deadline) as slot:
+            input_kind, result, ctx = await _dispatch(request, image, steps, slot)
+    except AdmissionRejected as e:
+        return _rejected("single", lane, e)
+    timings = ctx.timings() if ctx is not None else steps
+    timings["total"] = _elapsed_ms(started)
+    _record("single", input_kind, result, timings)
+    if _wants_timings(request):
+        result[1]["timings"] = timings
+    return _json_response(result, request=request)
 
-    # Extract entities
-    entities = extract_entities(cleaned)
-    # Compute more granular confidences using heuristics in nlp_service
+
+@router.post("/image", status_code=200)
+async def create_appointment_from_image(request: Request):
+    """Run OCR on a raw PNG/JPEG image or TIFF/PDF document request body.
+
+    Accepts `image/*`, `application/pdf` or `application/octet-stream`.
+
+    Skips multipart framing, base64 and JSON parsing. The body is read in chunks
+    and the request is rejected with 413 as soon as it passes `IMAGE_MAX_BYTES`
+    (or up front when `Content-Length` already says so). The response has the
+    same shape as an image `POST /appointments` (`?multiple=true` and
+    `?book=true` included), and admission works the same way, in the image lane.
+    """
+    started = time.perf_counter()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in ("application/octet-stream", "application/pdf") and not content_type.startswith("image/"):
+        result = (415, {"status": "error", "message": "Send the image as image/*, application/pdf or application/octet-stream"})
+        _record("image", "image_raw", result, {})
+        return _json_response(result)
+
+    limit = settings.IMAGE_MAX_BYTES
+    too_large = (413, {"status": "error", "message": f"Image exceeds {limit} bytes"})
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        _record("image", "image_raw", too_large, {})
+        return _json_response(too_large)
     try:
-        from src.services.nlp_service import score_entities, score_normalization
+        # Admit before reading the body, so shed requests do not upload it first
+        async with admission.admit(IMAGE, admission.deadline(request.headers)):
+            try:
+                image_bytes = await read_capped(request.stream(), limit)
+            except ImageRejected:
+                _record("image", "image_raw", too_large, {})
+                return _json_response(too_large)
+            steps = {"body_parse": _elapsed_ms(started)}
+            result, ctx = await _run_pipeline(
+                request, _reference_date(), False, image_bytes=image_bytes, steps=steps, multiple=_wants_multiple(request),
+                book=_wants_booking(request), idempotency_key=_idempotency_key(request),
+            )
+    except AdmissionRejected as e:
+        return _rejected("image", "image_raw", e)
+    timings = ctx.timings()
+    timings["total"] = _elapsed_ms(started)
+    _record("image", "image_raw", result, timings)
+    if _wants_timings(request):
+        result[1]["timings"] = timings
+    return _json_response(result, request=request)
 
-        entities_confidence = score_entities(entities, ocr_info.get("confidence", 1.0))
-    except Exception:
-        # fallback to previous heuristic
-        ent_conf_vals = [0.9 if entities.get(k) else 0.0 for k in ("date_phrase", "time_phrase", "department")]
-        entities_confidence = round(sum(ent_conf_vals) / max(len(ent_conf_vals), 1), 2)
 
-    # Guardrails
+@router.get("/availability", status_code=200)
+async def get_availability(department: str, date: str):
+    """List a department's bookings and free slots on a day.
+
+    `department` is a department name or synonym (`dentist`, `Cardiology`),
+    `date` is `YYYY-MM-DD`. The response holds `booked` (`appointment_id`,
+    `time`, `end_time`) and `free` stretches (`start`, `end`) within the
+    opening hours, at least one `slot_minutes` long. Unknown departments and
+    malformed dates return `400`.
+    """
+    canonical = canonical_department(department)
+    if canonical is None:
+        return FastJSONResponse(status_code=400, content={"status": "error", "message": f"Unknown department: {department}"})
     try:
-        handle_ambiguity(entities)
-    except ValueError as e:
-        # Unified response: return pipeline partial and needs_clarification for any input
-        pipeline = {"ocr": ocr_info, "entities": {"entities": entities, "entities_confidence": entities_confidence}, "normalization": {}}
-        # include legacy `detail` field for older clients/tests that expect it
-        content = {
-            "pipeline": pipeline,
-            "status": "needs_clarification",
-            "message": str(e),
-            "detail": str(e),
-        }
-        return JSONResponse(status_code=400, content=content)
-
-    # Normalization
-    normalized = normalize_entities(entities, ref_date=ref_dt)
+        day = datetime.date.fromisoformat(date).isoformat()
+    except ValueError:
+        return FastJSONResponse(status_code=400, content={"status": "error", "message": "date must be YYYY-MM-DD"})
+    return await asyncio.to_thread(get_appointment_store().availability, canonical, day)
+
+
+def _ndjson_line(index: int, item_id: Any, result: Tuple[int, Dict[str, Any]]) -> bytes:
+    status_code, content = result
+    line: Dict[str, Any] = {"index": index}
+    if item_id is not None:
+        line["id"] = item_id
+    line["status_code"] = status_code
+    line.update(content)
+    return dumps(line) + b"\n"
+
+
+async def _stream_batch(request: Request, ref_dt, invalid: List, texts: List, images: List):
+    # Keep at most one batch job per OCR worker in flight so a large batch streams
+    # through the pool instead of tripping its queue limit for everyone else.
+    semaphore = asyncio.Semaphore(ocr_executor.workers)
+    with_timings = _wants_timings(request)
+    lean_shape = wants_lean(request)
+    book = _wants_booking(request)
+    idempotency_key = _idempotency_key(request)
+
+    def finish(input_kind: str, result: Tuple[int, Dict[str, Any]], ctx: Optional[PipelineContext]):
+        timings = ctx.timings() if ctx is not None else {}
+        _record("batch", input_kind, result, timings)
+        if with_timings and ctx is not None:
+            result[1]["timings"] = timings
+        return (result[0], lean(result[1])) if lean_shape else result
+
+    async def ocr_item(index: int, item_id: Any, image_bytes: bytes):
+        try:
+            async with semaphore:
+                result, ctx = await _run_pipeline(
+                    request, ref_dt, False, image_bytes=image_bytes, book=book, idempotency_key=_item_key(idempotency_key, index)
+                )
+            return index, item_id, finish("image_base64", result, ctx)
+        except Exception:
+            return index, item_id, finish("image_base64", (500, {"status": "error", "message": "OCR failed"}), None)
+
+    # Start OCR first so the pool works while the text items are handled
+    tasks = [asyncio.ensure_future(ocr_item(*entry)) for entry in images]
+    try:
+        if invalid:
+            yield b"".join(_ndjson_line(index, item_id, finish("invalid", error, None)) for index, item_id, error in invalid)
+        if texts:
+            runs = []
+            for index, item_id, text in texts:
+                try:
+                    # Text items have no async stages, so they run inline
+                    ctx = appointment_engine.run(PipelineContext(text=text, ref_date=ref_dt))
+                    runs.append((index, item_id, ctx, build_response(ctx, text_input=True)))
+                except Exception:
+                    runs.append((index, item_id, None, (500, {"status": "error", "message": "Processing failed"})))
+
+            def book_all():
+                # The store may have to wait on SQLite: one trip off the event loop for all text items
+                booked = []
+                for index, item_id, ctx, result in runs:
+                    if ctx is not None:
+                        try:
+                            result = _book(result, True, _item_key(idempotency_key, index))
+                        except Exception:
+                            ctx, result = None, (500, {"status": "error", "message": "Processing failed"})
+                    booked.append((index, item_id, ctx, result))
+                return booked
+
+            if book:
+                runs = await asyncio.to_thread(book_all)
+            else:
+                runs = [(index, item_id, ctx, _unbooked(result, True)) for index, item_id, ctx, result in runs]
+            lines = []
+            for index, item_id, ctx, result in runs:
+                if ctx is not None:
+                    result = _open_session(result, ctx, book, _item_key(idempotency_key, index))
+                lines.append(_ndjson_line(index, item_id, finish("text", result, ctx)))
+            yield b"".join(lines)
+        for next_done in asyncio.as_completed(tasks):
+            index, item_id, result = await next_done
+            yield _ndjson_line(index, item_id, result)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+@router.post("/batch", status_code=200)
+async def create_appointments_batch(request: Request):
+    """Process a list of `text` / `image_base64` items and stream NDJSON results.
+
+    Body: ``{"items": [{"id": optional, "text" | "image_base64": ...}, ...]}``.
+    One line is written per item, in completion order: typed text first (the NLP
+    stages are cheap and run back to back), then OCR items as their jobs finish.
+    Each line holds the item's `index` (and `id` when given), its `status_code`
+    and the same body `POST /appointments` would return (lean with `?view=lean`
+    or `Prefer: return=minimal`). A bad item only fails its own line. With
+    `?book=true` every item is booked; item `i` is booked under the
+    `Idempotency-Key` header with `:i` appended.
+    """
     try:
-        norm_conf = score_normalization(entities, normalized)
+        body = await request.json()
     except Exception:
-        norm_conf = 0.9 if normalized.get("date") and normalized.get("time") else 0.0
-
-    pipeline = {
-        "ocr": ocr_info,
-        "entities": {"entities": entities, "entities_confidence": entities_confidence},
-        "normalization": {"normalized": normalized, "normalization_confidence": norm_conf},
-    }
-
-    # Build final appointment
-    if normalized.get("date") and normalized.get("time"):
-        # department from extract_entities is already canonicalized when possible
-        department = entities.get("department")
-        appointment = {"department": department, "date": normalized.get("date"), "time": normalized.get("time"), "tz": normalized.get("tz")}
-    else:
-        # Shouldn't happen because guardrails would have caught earlier
-        if payload_text and is_json:
-            raise HTTPException(status_code=400, detail="Unable to extract appointment details")
-        return JSONResponse(status_code=400, content={"status": "error", "message": "Unable to extract appointment details"})
+        return FastJSONResponse(status_code=400, content={"status": "error", "message": "Invalid input format"})
+    items = body.get("items") if isinstance(body, dict) else None
+    if not isinstance(items, list) or not items:
+        return FastJSONResponse(status_code=422, content={
+            "detail": [{"loc": ["body", "items"], "msg": "Field required.", "type": "value_error"}]
+        })
+    if len(items) > settings.BATCH_MAX_ITEMS:
+        return FastJSONResponse(status_code=413, content={"status": "error", "message": f"Batch exceeds {settings.BATCH_MAX_ITEMS} items"})
+
+    invalid, texts, images = [], [], []
+    for index, item in enumerate(items):
+        item_id = item.get("id") if isinstance(item, dict) else None
+        kind, value = parse_json_item(item)
+        {"error": invalid, "text": texts, "image": images}[kind].append((index, item_id, value))
+
+    return StreamingResponse(
+        _stream_batch(request, _reference_date(), invalid, texts, images),
+        media_type="application/x-ndjson",
+    )
 
-    # For backwards compatibility include an appointment_id for JSON/text inputs
+
+# Background job tasks; kept referenced so they are not garbage collected mid-run
+_job_tasks: Set[asyncio.Task] = set()
+_job_ocr_slots: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+
+
+def _ocr_slots() -> asyncio.Semaphore:
+    # One OCR job per worker, as in batches: a burst of jobs waits here instead of
+    # filling the executor queue and failing with 503. Semaphores belong to one loop.
+    global _job_ocr_slots
+    loop = asyncio.get_running_loop()
+    if _job_ocr_slots is None or _job_ocr_slots[0] is not loop:
+        _job_ocr_slots = (loop, asyncio.Semaphore(ocr_executor.workers))
+    return _job_ocr_slots[1]
+
+
+async def _run_job(
+    job_id: str, input_kind: str, ref_dt, inputs: Dict[str, Any], steps: Dict[str, float], with_timings: bool, lean_shape: bool
+):
+    store = get_job_store()
+    failed = False
+    ctx = None
     try:
-        json_text_provided = bool(is_json and json_has_text)
+        if inputs.get("image_bytes") is not None:
+            async with _ocr_slots():
+                store.start(job_id)
+                # No request: the client is gone by now, so disconnects must not cancel OCR
+                result, ctx = await _run_pipeline(None, ref_dt, steps=steps, **inputs)
+        else:
+            store.start(job_id)
+            result, ctx = await _run_pipeline(None, ref_dt, steps=steps, **inputs)
     except Exception:
-        json_text_provided = False
+        failed = True
+        result = (500, {"status": "error", "message": "Processing failed"})
+    timings = ctx.timings() if ctx is not None else dict(steps)
+    _record("job", input_kind, result, timings)
+    if with_timings and ctx is not None:
+        result[1]["timings"] = timings
+    store.finish(job_id, result[0], lean(result[1]) if lean_shape else result[1], failed=failed)
+
 
-    response_content = {"pipeline": pipeline, "appointment": appointment, "status": "ok"}
-    if json_text_provided:
-        response_content["appointment_id"] = str(uuid4())
+@router.post("/jobs", status_code=202)
+async def create_appointment_job(request: Request, image: Optional[UploadFile] = File(None)):
+    """Accept the same inputs as `POST /appointments` and process them in the background.
 
-    return JSONResponse(status_code=200, content=response_content)
\ No newline at end of file
+    Input errors are returned straight away with the usual status codes. Otherwise
+    the response is `202` with the job (`job_id`, `status: "queued"`) and a
+    `Location` header to poll. OCR jobs run at most one per OCR worker at a time,
+    so a burst queues up here instead of being turned away by the OCR executor.
+    `503` means `JOBS_MAX_PENDING` jobs are already waiting or running. The
+    stored result is lean when the job was created with `?view=lean` or
+    `Prefer: return=minimal`, lists every appointment with `?multiple=true` and
+    is booked with `?book=true`.
+    """
+    steps: Dict[str, float] = {}
+    input_kind, error, inputs = await _parse_single(request, image, steps)
+    if error is not None:
+        _record("job", input_kind, error, steps)
+        return _json_response(error)
+    try:
+        job = get_job_store().create(input_kind)
+    except JobStoreFull as e:
+        result = (503, {"status": "error", "message": str(e)})
+        _record("job", input_kind, result, steps)
+        return _json_response(result)
+
+    inputs.update(multiple=_wants_multiple(request), book=_wants_booking(request), idempotency_key=_idempotency_key(request))
+    task = asyncio.ensure_future(
+        _run_job(job.id, input_kind, _reference_date(), inputs, steps, _wants_timings(request), wants_lean(request))
+    )
+    _job_tasks.add(task)
+    task.add_done_callback(_job_tasks.discard)
+    location = str(request.url_for("get_appointment_job", job_id=job.id))
+    return FastJSONResponse(status_code=202, content=job.to_dict(), headers={"Location": location})
+
+
+@router.get("/jobs/{job_id}", status_code=200)
+async def get_appointment_job(job_id: str, wait: float = 0.0):
+    """Return a job's `status` (`queued`, `running`, `completed`, `failed`).
+
+    Finished jobs also carry `status_code` and `result`, the body
+    `POST /appointments` would have returned. `?wait=N` holds the request for
+    up to N seconds (at most `JOBS_MAX_WAIT`) until the job finishes. Unknown
+    and expired jobs return `404`.
+    """
+    job = await get_job_store().wait(job_id, min(max(wait, 0.0), settings.JOBS_MAX_WAIT))
+    if job is None:
+        return FastJSONResponse(status_code=404, content={"status": "error", "message": "Job not found"})
+    return FastJSONResponse(content=job.to_dict())
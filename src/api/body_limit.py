@@ -0,0 +1,64 @@
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.api.responses import FastJSONResponse
+from src.core.config import settings
+
+
+class MultipartBodyLimit:
+    """Refuse multipart request bodies larger than an image upload can be, before they are parsed.
+
+    FastAPI parses (and spools to disk) a whole multipart form before the
+    endpoint runs, so ``read_upload`` alone cannot bound what the server
+    accepts. A `Content-Length` over ``limit`` (default ``IMAGE_MAX_BYTES`` plus
+    ``IMAGE_FORM_OVERHEAD``) is refused with `413` without reading the body; an
+    unsized body is counted as it arrives and refused once it passes the limit,
+    the app seeing a client disconnect. Other requests pass straight through.
+    """
+
+    def __init__(self, app: ASGIApp, limit: Optional[int] = None):
+        self.app = app
+        self.limit = limit
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if "multipart/form-data" not in headers.get("content-type", ""):
+            await self.app(scope, receive, send)
+            return
+        limit = settings.IMAGE_MAX_BYTES + settings.IMAGE_FORM_OVERHEAD if self.limit is None else self.limit
+        too_large = FastJSONResponse(status_code=413, content={"status": "error", "message": f"Request body exceeds {limit} bytes"})
+        content_length = headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > limit:
+            await too_large(scope, receive, send)
+            return
+
+        received = 0
+        started = refused = False
+
+        async def capped_receive() -> Message:
+            nonlocal received, refused
+            if refused:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit and not started:
+                    refused = True
+                    await too_large(scope, receive, send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal started
+            # The app's own answer to the disconnect is dropped once 413 went out
+            if refused:
+                return
+            started = True
+            await send(message)
+
+        await self.app(scope, capped_receive, guarded_send)
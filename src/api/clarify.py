@@ -1,35 +1,72 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from src.api.responses import FastJSONResponse
 from typing import Dict, Any
+from src.services.appointment_store import AppointmentConflict, get_appointment_store
+from src.services.clarification import InvalidCorrection, clarification_sessions
+from src.services.metrics import metrics
 
 router = APIRouter()
 
 
 @router.post("/clarify", status_code=200)
 async def clarify_appointment(payload: Dict[str, Any]):
-    """Accept a pipeline + appointment object and a `corrections` dict.
+    """Correct a run that ended in `needs_clarification`: `{session_id, corrections}`.
 
-    This endpoint is intentionally lightweight: it performs a shallow merge of
-    the provided `corrections` into the appointment, validates basic shape,
-    and returns the merged appointment. It's useful as a follow-up endpoint
-    when the pipeline returns `needs_clarification`.
-    """
-    pipeline = payload.get("pipeline")
-    appointment = payload.get("appointment")
-    corrections = payload.get("corrections") or {}
+    `session_id` comes from the `needs_clarification` response; the session
+    holds the OCR text, entities and partial normalization, so OCR never runs
+    again. `corrections` maps `name`, `department`, `date_phrase`, `time_phrase`,
+    `date` (YYYY-MM-DD) or `time` to strings. Only the stages a correction
+    affects run again (a corrected `time_phrase` is normalized on its own); the
+    guardrails and scores always do. `stages_rerun` lists them.
 
-    if not pipeline or not appointment:
-        raise HTTPException(status_code=422, detail="pipeline and appointment required")
+    The response has the shape of a `POST /appointments` response: `200` with the
+    `appointment` (the session ends), `400` `needs_clarification` when something
+    is still missing (correct again with the same `session_id`). When the
+    original request asked to book (`?book=true`), the appointment is booked
+    under that request's `Idempotency-Key`: the `200` carries its
+    `appointment_id`, and a taken slot returns `409`. Unknown or expired
+    sessions return `404`, malformed corrections `422`.
+    """
+    session_id = payload.get("session_id")
+    corrections = payload.get("corrections")
+    if not isinstance(session_id, str) or not session_id:
+        raise HTTPException(status_code=422, detail="session_id required")
+    if not isinstance(corrections, dict) or not corrections:
+        raise HTTPException(status_code=422, detail="corrections must be a non-empty dict")
 
-    if not isinstance(corrections, dict):
-        raise HTTPException(status_code=422, detail="corrections must be a dict")
+    session = clarification_sessions.get(session_id)
+    if session is None:
+        metrics.requests.inc("clarify", "session", "error")
+        return FastJSONResponse(status_code=404, content={"status": "error", "message": "Clarification session not found or expired"})
+    try:
+        session, stages = session.corrected(corrections)
+    except InvalidCorrection as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
-    # Shallow merge corrections into appointment
-    merged = dict(appointment)
-    for k, v in corrections.items():
-        # Only allow certain fields to be corrected for safety
-        if k in ("date", "time", "department", "name", "tz"):
-            merged[k] = v
+    content: Dict[str, Any] = {"pipeline": session.pipeline(), "appointment": session.appointment, "stages_rerun": stages}
+    if session.message is not None:
+        clarification_sessions.save(session)
+        metrics.requests.inc("clarify", "session", "needs_clarification")
+        content.update(status="needs_clarification", message=session.message, session_id=session.id)
+        return FastJSONResponse(status_code=400, content=content)
 
-    # Return the merged appointment and echo the original pipeline for context
-    return JSONResponse(status_code=200, content={"status": "ok", "pipeline": pipeline, "appointment": merged})
+    if not session.book:
+        clarification_sessions.close(session.id)
+        metrics.requests.inc("clarify", "session", "ok")
+        content["status"] = "ok"
+        return FastJSONResponse(status_code=200, content=content)
+    try:
+        stored = await asyncio.to_thread(
+            get_appointment_store().add, {**session.appointment, "name": session.entities.get("name")}, session.idempotency_key
+        )
+    except AppointmentConflict as e:
+        # Keep the session so the client can pick another time
+        clarification_sessions.save(session)
+        metrics.requests.inc("clarify", "session", "conflict")
+        content.update(status="conflict", message=str(e), conflicts=e.conflicts, session_id=session.id)
+        return FastJSONResponse(status_code=409, content=content)
+    clarification_sessions.close(session.id)
+    metrics.requests.inc("clarify", "session", "ok")
+    content.update(status="ok", appointment_id=stored.id)
+    return FastJSONResponse(status_code=200, content=content)
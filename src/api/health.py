@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from src.core.config import settings
+from src.services.ocr_executor import ocr_executor
+
+router = APIRouter()
+
+
+@router.get("/healthz", status_code=200)
+def healthz():
+    """Liveness: the server answers. Says nothing about OCR."""
+    return {"status": "ok"}
+
+
+@router.get("/readyz", status_code=200)
+def readyz():
+    """Readiness: 200 once the OCR workers have warmed up, 503 while warming or if warm-up failed.
+
+    Text requests are served before this, since they never touch OCR.
+    """
+    stats = ocr_executor.stats()
+    body = {"ocr": stats["warm_state"], "warm_up_ms": stats["warm_up_ms"]}
+    if not settings.OCR_WARM_UP or stats["warm_state"] == "ready":
+        return {"status": "ready", **body}
+    if ocr_executor.warm_up_error:
+        body["error"] = ocr_executor.warm_up_error
+    return JSONResponse(status_code=503, content={"status": "not_ready", **body})
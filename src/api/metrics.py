@@ -0,0 +1,111 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from src.services.admission import admission
+from src.services.appointment_store import get_appointment_store
+from src.services.job_store import get_job_store
+from src.services.metrics import metrics
+from src.services.ocr_cache import ocr_cache
+from src.services.ocr_executor import ocr_executor, ocr_flights
+
+router = APIRouter()
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _ocr_collector():
+    stats = ocr_executor.stats()
+    gauges = [
+        ("ocr_workers", "Configured OCR workers.", stats["workers"]),
+        ("ocr_in_flight", "OCR jobs running or queued.", stats["in_flight"]),
+        ("ocr_running", "OCR jobs currently running.", stats["running"]),
+        ("ocr_queued", "OCR jobs waiting for a worker.", stats["queued"]),
+        ("ocr_ready", "1 once the OCR workers have warmed up.", int(stats["warm_state"] == "ready")),
+    ]
+    blocks = [(name, "gauge", doc, [f"{name} {value}"]) for name, doc, value in gauges]
+    outcomes = ("submitted", "completed", "failed", "rejected", "timed_out", "cancelled")
+    blocks.append((
+        "ocr_jobs_total",
+        "counter",
+        "OCR jobs by outcome.",
+        [f'ocr_jobs_total{{outcome="{o}"}} {stats[o]}' for o in outcomes],
+    ))
+    cache = ocr_cache.stats()
+    results = ("memory_hits", "disk_hits", "misses")
+    blocks.append((
+        "ocr_cache_lookups_total",
+        "counter",
+        "OCR cache lookups by result.",
+        [f'ocr_cache_lookups_total{{result="{r}"}} {cache[r]}' for r in results],
+    ))
+    flights = ocr_flights.stats()
+    blocks.append((
+        "ocr_coalesced_requests_total",
+        "counter",
+        "Requests that reused an identical image's in-flight OCR job instead of starting their own.",
+        [f"ocr_coalesced_requests_total {flights['coalesced']}"],
+    ))
+    return blocks
+
+
+def _jobs_collector():
+    stats = get_job_store().stats()
+    return [(
+        "appointment_jobs",
+        "gauge",
+        "Background jobs held by the job store, by status.",
+        [f'appointment_jobs{{status="{status}"}} {stats[status]}' for status in ("queued", "running", "finished")],
+    ), (
+        "appointment_jobs_rejected_total",
+        "counter",
+        "Jobs refused because JOBS_MAX_PENDING were in progress.",
+        [f"appointment_jobs_rejected_total {stats['rejected']}"],
+    )]
+
+
+def _bookings_collector():
+    # Counters only: the store's stats() counts its rows, too slow for every scrape
+    store = get_appointment_store()
+    counts = {"created": store.created, "conflict": store.conflicts, "replayed": store.replayed}
+    return [(
+        "appointment_bookings_total",
+        "counter",
+        "Booking attempts by this worker, by result.",
+        [f'appointment_bookings_total{{result="{result}"}} {count}' for result, count in counts.items()],
+    )]
+
+
+def _admission_collector():
+    lanes = admission.stats()["lanes"]
+    return [(
+        "admission_active",
+        "gauge",
+        "Requests admitted and running, by lane.",
+        [f'admission_active{{lane="{name}"}} {lane["active"]}' for name, lane in lanes.items()],
+    ), (
+        "admission_waiting",
+        "gauge",
+        "Requests waiting to be admitted, by lane.",
+        [f'admission_waiting{{lane="{name}"}} {lane["waiting"]}' for name, lane in lanes.items()],
+    ), (
+        "admission_rejected_total",
+        "counter",
+        "Requests turned away by admission control, by lane and reason.",
+        [
+            f'admission_rejected_total{{lane="{name}",reason="{reason}"}} {lane[reason]}'
+            for name, lane in lanes.items()
+            for reason in ("queue_full", "deadline", "shed")
+        ],
+    )]
+
+
+metrics.add_collector(_ocr_collector)
+metrics.add_collector(_jobs_collector)
+metrics.add_collector(_bookings_collector)
+metrics.add_collector(_admission_collector)
+
+
+@router.get("/metrics", status_code=200)
+def get_metrics():
+    """Stage latency histograms, request counts and OCR gauges in Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
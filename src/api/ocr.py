@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from src.services.admission import admission
+from src.services.ocr_cache import ocr_cache
+from src.services.ocr_executor import ocr_executor, ocr_flights
+
+router = APIRouter()
+
+
+@router.get("/stats", status_code=200)
+def ocr_stats():
+    """Report OCR queue depth, worker utilisation, job, cache, coalescing and admission counters."""
+    return {"executor": ocr_executor.stats(), "cache": ocr_cache.stats(), "coalescing": ocr_flights.stats(), "admission": admission.stats()}
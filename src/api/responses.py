@@ -0,0 +1,70 @@
+import json
+from typing import Any, Callable, Dict, Optional
+
+from fastapi.responses import JSONResponse
+from starlette.requests import Request
+
+from src.core.config import settings
+
+JSON_SERIALIZERS = ("auto", "orjson", "json")
+
+# Prefer header value asking for the lean shape (RFC 7240)
+PREFER_MINIMAL = "return=minimal"
+
+
+def _stdlib_dumps(content: Any) -> bytes:
+    # Same output as Starlette's JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def get_dumps(name: Optional[str] = None) -> Callable[[Any], bytes]:
+    """The JSON encoder named by ``name`` (default: ``JSON_SERIALIZER``), as ``content -> bytes``."""
+    name = (name or settings.JSON_SERIALIZER).lower()
+    if name not in JSON_SERIALIZERS:
+        raise ValueError(f"Unknown JSON serializer: {name!r} (expected one of {list(JSON_SERIALIZERS)})")
+    if name == "json":
+        return _stdlib_dumps
+    try:
+        import orjson  # optional; the standard library encoder is the fallback
+    except ImportError:
+        if name == "orjson":
+            raise
+        return _stdlib_dumps
+    return lambda content: orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+dumps = get_dumps()
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` rendered with the configured encoder (orjson when available)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def wants_lean(request: Optional[Request]) -> bool:
+    """Whether the client asked for the lean shape: `?view=lean` or `Prefer: return=minimal`."""
+    if request is None:
+        return False
+    if request.query_params.get("view", "").lower() == "lean":
+        return True
+    return PREFER_MINIMAL in request.headers.get("prefer", "").lower()
+
+
+def lean(content: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop the `pipeline` from an appointment response and keep only its confidences.
+
+    Everything else (`status`, `appointment`, `appointment_id`, `message`,
+    `session_id`, `conflicts`, ...) stays as it is.
+    """
+    pipeline = content.get("pipeline")
+    if pipeline is None:
+        return content
+    slim = {k: v for k, v in content.items() if k != "pipeline"}
+    slim["confidence"] = {
+        "ocr": (pipeline.get("ocr") or {}).get("confidence"),
+        "entities": (pipeline.get("entities") or {}).get("entities_confidence"),
+        "normalization": (pipeline.get("normalization") or {}).get("normalization_confidence"),
+    }
+    return slim
@@ -0,0 +1,281 @@
+"""Offline bulk processing: a JSONL file or a directory of images through the appointment pipeline.
+
+Run from the repository root::
+
+    python -m src.bulk messages.jsonl -o results.jsonl
+    python -m src.bulk scans/ -o results.jsonl --workers 8 --ref-date 2026-01-31
+    python -m src.bulk scans/ -o results.jsonl --resume
+
+Each JSONL line is an object like a ``POST /appointments`` JSON body,
+``{"text": ...}`` or ``{"image_base64": ...}``, with an optional ``id`` (the
+line number otherwise); it is checked, and rejected, as the API would
+(``parse_json_item``, including the ``IMAGE_MAX_BYTES`` cap). A directory is
+walked recursively in sorted order and every PNG, JPEG, TIFF or PDF file (by
+extension) is one item, its id the relative path. Items run through the same stages as ``create_appointment`` (ingest, OCR,
+clean, extract, guardrails, normalize, score) but nothing is booked. With
+``--multiple`` every page of a document is read and ``result`` lists every
+appointment found, as ``POST /appointments?multiple=true`` does.
+
+Items are sent to a pool of ``--workers`` processes in chunks of
+``--chunk-size``; at most a few chunks per worker are read ahead, so memory
+stays bounded whatever the input size. Results are written in input order, one
+line per item: ``{"id", "status_code", "result"}`` where ``result`` is the body
+the API would have returned (``--lean`` for the lean view). After every chunk
+the output is flushed and ``<output>.checkpoint`` records how many items and
+bytes are done; ``--resume`` truncates the output to that point and carries on.
+Throughput is printed to stderr every ``--progress`` seconds.
+"""
+import argparse
+import json
+import mimetypes
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.pipelines.engine import PipelineContext, PipelineEngine
+from src.pipelines.responses import build_multiple_response, build_response, parse_json_item
+from src.pipelines.stages import (
+    CleanStage,
+    ExtractAppointmentsStage,
+    ExtractStage,
+    GuardrailStage,
+    IngestStage,
+    LocalOCRStage,
+    NormalizeStage,
+    ScoreStage,
+)
+from src.services.image_ingest import IMAGE_SIGNATURES
+
+# File extensions of the formats ingest accepts (see IMAGE_SIGNATURES)
+IMAGE_EXTENSIONS = tuple(sorted({ext for mime in set(IMAGE_SIGNATURES.values()) for ext in mimetypes.guess_all_extensions(mime)}))
+# Chunks read ahead per worker: enough to keep workers busy while one result is written
+_CHUNKS_PER_WORKER = 2
+
+# Per worker process, set up by ``_init_worker``
+_engine: Optional[PipelineEngine] = None
+_ref_date: Optional[date] = None
+_lean = False
+_multiple = False
+
+
+def _init_worker(ref_date: Optional[date], lean: bool, multiple: bool = False, workers: int = 1) -> None:
+    global _engine, _ref_date, _lean, _multiple
+    if multiple:
+        stages = (IngestStage(), LocalOCRStage(read_all_pages=True, ocr_workers=workers, multiple=True), CleanStage(keep_lines=True), ExtractAppointmentsStage())
+    else:
+        stages = (IngestStage(), LocalOCRStage(ocr_workers=workers), CleanStage(), ExtractStage(), GuardrailStage(), NormalizeStage(), ScoreStage())
+    _engine = PipelineEngine(stages)
+    _ref_date, _lean, _multiple = ref_date, lean, multiple
+
+
+def _error(item_id: str, status_code: int, message: str) -> Dict[str, Any]:
+    return {"id": item_id, "status_code": status_code, "result": {"status": "error", "message": message}}
+
+
+def _process(item: Tuple[str, str, str]) -> Dict[str, Any]:
+    """Run one ``(kind, id, payload)`` item; kind is "line" (a JSONL line) or "file" (a path)."""
+    # Imported here: pulls in FastAPI only in worker processes
+    from src.api.responses import lean
+
+    kind, item_id, payload = item
+    text, image_bytes = None, None
+    if kind == "file":
+        with open(payload, "rb") as f:
+            image_bytes = f.read()
+    else:
+        try:
+            body = json.loads(payload)
+        except ValueError:
+            return _error(item_id, 422, "Line is not valid JSON")
+        if not isinstance(body, dict):
+            return _error(item_id, 422, "Line must be a JSON object")
+        item_id = str(body.get("id", item_id))
+        kind, value = parse_json_item(body)
+        if kind == "error":
+            status_code, content = value
+            return {"id": item_id, "status_code": status_code, "result": content}
+        text, image_bytes = (value, None) if kind == "text" else (None, value)
+
+    try:
+        ctx = _engine.run(PipelineContext(text=text, image_bytes=image_bytes, ref_date=_ref_date))
+    except Exception as e:
+        return _error(item_id, 500, f"{type(e).__name__}: {e}")
+    build = build_multiple_response if _multiple else build_response
+    status_code, content = build(ctx, text_input=text is not None)
+    return {"id": item_id, "status_code": status_code, "result": lean(content) if _lean else content}
+
+
+def _process_chunk(chunk: List[Tuple[str, str, str]]) -> List[Tuple[int, bytes]]:
+    """``(status_code, JSONL line)`` per item, serialized in the worker."""
+    from src.api.responses import dumps
+
+    records = [_process(item) for item in chunk]
+    return [(record["status_code"], dumps(record) + b"\n") for record in records]
+
+
+def iter_items(source: str, skip: int = 0) -> Iterator[Tuple[str, str, str]]:
+    """``(kind, id, payload)`` for every item of a JSONL file or image directory, after the first ``skip``."""
+    if os.path.isdir(source):
+        n = 0
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if not name.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                n += 1
+                if n > skip:
+                    path = os.path.join(root, name)
+                    yield "file", os.path.relpath(path, source), path
+        return
+    with open(source, encoding="utf-8") as f:
+        n = 0
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            n += 1
+            if n > skip:
+                yield "line", str(number), line
+
+
+def _chunks(items: Iterator[Tuple[str, str, str]], size: int) -> Iterator[List[Tuple[str, str, str]]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Checkpoint:
+    """Items done and output bytes written so far, saved next to the output file."""
+
+    def __init__(self, output: str, source: str):
+        self.path = output + ".checkpoint"
+        self.source = os.path.abspath(source)
+        self.items = 0
+        self.bytes = 0
+
+    def load(self) -> None:
+        with open(self.path) as f:
+            state = json.load(f)
+        if state["source"] != self.source:
+            raise ValueError(f"Checkpoint {self.path} is for {state['source']}, not {self.source}")
+        self.items, self.bytes = state["items"], state["bytes"]
+
+    def save(self) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"source": self.source, "items": self.items, "bytes": self.bytes}, f)
+        os.replace(tmp, self.path)
+
+
+class Progress:
+    """Prints items done, overall and recent throughput, and outcome counts to stderr."""
+
+    def __init__(self, interval: float, already_done: int = 0, stream=None):
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.started = self.last_at = time.perf_counter()
+        self.done = 0
+        self.last_done = 0
+        self.already_done = already_done
+        self.statuses: Counter = Counter()
+
+    def add(self, status_codes: List[int]) -> None:
+        self.done += len(status_codes)
+        self.statuses.update(status_codes)
+        now = time.perf_counter()
+        if self.interval and now - self.last_at >= self.interval:
+            self.report(now)
+
+    def report(self, now: Optional[float] = None, final: bool = False) -> None:
+        now = now or time.perf_counter()
+        overall = self.done / max(now - self.started, 1e-9)
+        recent = (self.done - self.last_done) / max(now - self.last_at, 1e-9)
+        statuses = " ".join(f"{code}:{count}" for code, count in sorted(self.statuses.items()))
+        label = "done" if final else f"{recent:,.1f}/s now"
+        print(f"{self.already_done + self.done:,} items, {overall:,.1f}/s overall, {label} [{statuses}]", file=self.stream, flush=True)
+        self.last_at, self.last_done = now, self.done
+
+
+def run_bulk(
+    source: str,
+    output: str,
+    workers: int = 0,
+    chunk_size: int = 64,
+    resume: bool = False,
+    ref_date: Optional[date] = None,
+    lean: bool = False,
+    progress: float = 5.0,
+    multiple: bool = False,
+) -> Dict[str, Any]:
+    """Process ``source`` into ``output``; returns item and status counts.
+
+    ``workers=0`` runs everything in this process (no pool).
+    """
+    checkpoint = Checkpoint(output, source)
+    if resume and os.path.exists(checkpoint.path):
+        checkpoint.load()
+    elif os.path.exists(output) and not resume:
+        # A fresh run starts a fresh output
+        open(output, "wb").close()
+
+    meter = Progress(progress, already_done=checkpoint.items)
+    chunks = _chunks(iter_items(source, skip=checkpoint.items), chunk_size)
+    mode = "r+b" if os.path.exists(output) else "wb"
+    with open(output, mode) as out:
+        # Drop anything written after the last checkpoint (a partly written chunk)
+        out.truncate(checkpoint.bytes)
+        out.seek(checkpoint.bytes)
+
+        def write(results: List[Tuple[int, bytes]]) -> None:
+            out.writelines(line for _, line in results)
+            out.flush()
+            checkpoint.items += len(results)
+            checkpoint.bytes = out.tell()
+            checkpoint.save()
+            meter.add([status_code for status_code, _ in results])
+
+        if workers <= 0:
+            _init_worker(ref_date, lean, multiple)
+            for chunk in chunks:
+                write(_process_chunk(chunk))
+        else:
+            # spawn: workers do not inherit the parent's threads, like the OCR executor's pool
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker, initargs=(ref_date, lean, multiple, workers)) as pool:
+                pending: deque = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(_process_chunk, chunk))
+                    if len(pending) >= workers * _CHUNKS_PER_WORKER:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+    meter.report(final=True)
+    return {"items": checkpoint.items, "processed": meter.done, "status_codes": dict(meter.statuses)}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m src.bulk", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="JSONL file or directory of images")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file for the results")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes; 0 runs in this process")
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--resume", action="store_true", help="continue from <output>.checkpoint")
+    parser.add_argument("--ref-date", type=date.fromisoformat, default=None, help="resolve relative dates against this day (YYYY-MM-DD)")
+    parser.add_argument("--lean", action="store_true", help="write the lean result view")
+    parser.add_argument("--multiple", action="store_true", help="read every page and list every appointment found")
+    parser.add_argument("--progress", type=float, default=5.0, help="seconds between progress lines; 0 for none")
+    args = parser.parse_args(argv)
+    run_bulk(args.source, args.output, args.workers, args.chunk_size, args.resume, args.ref_date, args.lean, args.progress, args.multiple)
+
+
+if __name__ == "__main__":
+    main()
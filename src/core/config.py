@@ -1,4 +1,4 @@
-from pydantic import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     # Define your application settings here
@@ -7,8 +7,152 @@ class Settings(BaseSettings):
     NLP_SERVICE_URL: str = "http://localhost:8000/nlp"
     APP_ENV: str = "development"
 
-    class Config:
-        env_file = ".env"
-        env_file_encoding = 'utf-8'
+    # OCR execution: "process" runs OCR in a process pool (one tesseract per core),
+    # "thread" keeps it in-process on a thread pool (handy for tests and debugging).
+    OCR_EXECUTOR: str = "process"
+    # Number of OCR workers; 0 means one per CPU core.
+    OCR_WORKERS: int = 0
+    # Jobs allowed to wait for a free worker before new OCR requests are rejected.
+    OCR_MAX_QUEUE: int = 32
+    # Seconds a request waits for its OCR result before giving up.
+    OCR_TASK_TIMEOUT: float = 30.0
+    # How often (seconds) a waiting request checks whether its client went away.
+    OCR_DISCONNECT_POLL_INTERVAL: float = 0.25
+    # Assumed worker time per OCR job (seconds) until real jobs have been timed;
+    # used to estimate queue waits for admission control.
+    OCR_SERVICE_TIME_ESTIMATE: float = 0.5
+    # OCR engine: "tesseract" (pytesseract, one subprocess per image) or
+    # "easyocr" (model loaded once and kept resident in each worker process).
+    OCR_BACKEND: str = "tesseract"
+    # Tesseract language(s), e.g. "eng" or "eng+hin".
+    OCR_LANG: str = "eng"
+    # EasyOCR language codes (comma separated) and whether to use a GPU.
+    OCR_EASYOCR_LANGS: str = "en"
+    OCR_EASYOCR_GPU: bool = False
 
-settings = Settings()
\ No newline at end of file
+    # OCR preprocessing, run in the worker before recognition. OCR_PREPROCESS lists
+    # the optional steps (draft, downscale, deskew, contrast, binarize); grayscale
+    # conversion always runs. Downscaling aims for text lines about
+    # OCR_TARGET_LINE_HEIGHT px tall and a long side of at most OCR_MAX_SIDE px
+    # (0 turns either limit off).
+    OCR_PREPROCESS: str = "draft,downscale,deskew,contrast"
+    OCR_TARGET_LINE_HEIGHT: int = 48
+    OCR_MAX_SIDE: int = 2000
+
+    # OCR cascade: tiers tried in order until one yields date/time that pass the
+    # guardrails with an entity score of at least OCR_CASCADE_MIN_CONFIDENCE.
+    # "fast" is a single-block pass on a smaller image (long side at most
+    # OCR_CASCADE_FAST_MAX_SIDE, lines about OCR_CASCADE_FAST_LINE_HEIGHT px),
+    # "full" the OCR_PREPROCESS image, "sparse" the same image read as scattered
+    # text, "crop" the date/time lines found so far, enlarged. "full" alone is one pass.
+    # Nothing appointment-like after "full" (a blank or unrelated image) ends the
+    # cascade there; "sparse" and "crop" are for pages read only in part.
+    OCR_CASCADE: str = "fast,full"
+    OCR_CASCADE_MIN_CONFIDENCE: float = 0.6
+    OCR_CASCADE_FAST_MAX_SIDE: int = 1000
+    OCR_CASCADE_FAST_LINE_HEIGHT: int = 32
+
+    # Tiled OCR: an image of at least OCR_TILE_MIN_PIXELS (after preprocessing) is
+    # split into text blocks, found from ink projection profiles, which are
+    # recognized on up to OCR_TILE_WORKERS threads per OCR worker and joined in
+    # reading order. 0 means the cores left per OCR worker (cores // OCR workers),
+    # so tiling is off when there is one worker per core; 1 turns tiling off.
+    OCR_TILE_WORKERS: int = 0
+    OCR_TILE_MIN_PIXELS: int = 2_000_000
+    # Warm the OCR workers at startup (engine loaded, a small built-in image read);
+    # /readyz reports 503 until this has finished. Off: ready at once, and the
+    # first image request pays for loading the engine.
+    OCR_WARM_UP: bool = True
+
+    # OCR result cache: in-memory LRU tier (entries, TTL seconds) in front of a
+    # SQLite file shared by all workers on the host. An empty path disables the disk tier.
+    OCR_CACHE_MAX_ENTRIES: int = 512
+    OCR_CACHE_TTL: float = 3600.0
+    OCR_CACHE_PATH: str = ".cache/ocr_cache.sqlite3"
+    OCR_CACHE_DISK_MAX_ENTRIES: int = 100_000
+    OCR_CACHE_DISK_TTL: float = 7 * 24 * 3600.0
+
+    # Image intake: raw image bodies are read in chunks of IMAGE_READ_CHUNK bytes
+    # and rejected as soon as they pass IMAGE_MAX_BYTES. Multipart bodies are
+    # refused (413) past IMAGE_MAX_BYTES plus IMAGE_FORM_OVERHEAD bytes (boundaries,
+    # part headers, form fields) while they stream in, before they are parsed.
+    # Images whose header declares more than IMAGE_MAX_PIXELS are rejected before decoding.
+    IMAGE_MAX_BYTES: int = 5 * 1024 * 1024
+    IMAGE_MAX_PIXELS: int = 40_000_000
+    IMAGE_READ_CHUNK: int = 64 * 1024
+    IMAGE_FORM_OVERHEAD: int = 64 * 1024
+    # Multi-page TIFF and PDF uploads: at most DOCUMENT_MAX_PAGES pages, each OCRed
+    # as its own job. PDF pages are rendered at DOCUMENT_PDF_DPI (long side capped
+    # at OCR_MAX_SIDE) and need the optional pypdfium2 package (the "pdf" extra).
+    DOCUMENT_MAX_PAGES: int = 50
+    DOCUMENT_PDF_DPI: int = 200
+
+    # Admission control for POST /appointments and /appointments/image. Typed text,
+    # raw/multipart images and base64 images each get their own lane: at most
+    # *_CONCURRENCY requests run and *_QUEUE wait (beyond that: 429). 0 concurrency
+    # for an image lane means one per OCR worker. Image requests are shed with 503
+    # when the estimated OCR wait exceeds their deadline: X-Request-Deadline-Ms, or
+    # ADMISSION_DEFAULT_DEADLINE seconds. JSON bodies up to ADMISSION_TEXT_MAX_BYTES
+    # are admitted as text before they are parsed; a base64 image among them then
+    # moves to the base64 lane for its OCR.
+    ADMISSION_TEXT_CONCURRENCY: int = 256
+    ADMISSION_TEXT_QUEUE: int = 1024
+    ADMISSION_IMAGE_CONCURRENCY: int = 0
+    ADMISSION_IMAGE_QUEUE: int = 64
+    ADMISSION_BASE64_CONCURRENCY: int = 0
+    ADMISSION_BASE64_QUEUE: int = 64
+    ADMISSION_DEFAULT_DEADLINE: float = 10.0
+    ADMISSION_TEXT_MAX_BYTES: int = 64 * 1024
+
+    # Background jobs (POST /appointments/jobs). JOB_STORE picks where jobs live
+    # ("memory": in the worker process). At most JOBS_MAX_ENTRIES jobs are kept and
+    # JOBS_MAX_PENDING of them unfinished; finished results expire after
+    # JOBS_RESULT_TTL seconds. JOBS_MAX_WAIT caps the ?wait= long-poll (seconds).
+    JOB_STORE: str = "memory"
+    JOBS_MAX_ENTRIES: int = 10_000
+    JOBS_MAX_PENDING: int = 1000
+    JOBS_RESULT_TTL: float = 3600.0
+    JOBS_MAX_WAIT: float = 30.0
+
+    # Booked appointments (requests with ?book=true). APPOINTMENT_STORE picks where
+    # they live ("memory": in the worker process; "sqlite": the APPOINTMENT_DB_PATH
+    # file in WAL mode, shared by all workers on the host, with up to
+    # APPOINTMENT_DB_POOL_SIZE connections per worker; a relative path is taken from
+    # the working directory). An appointment holds its department for
+    # APPOINTMENT_SLOT_MINUTES; an overlapping booking is refused with 409.
+    # Availability lists free slots between APPOINTMENT_DAY_START and
+    # APPOINTMENT_DAY_END. Each worker keeps the bookings of up to
+    # APPOINTMENT_INDEX_MAX_DAYS (department, day) pairs indexed.
+    APPOINTMENT_STORE: str = "memory"
+    APPOINTMENT_DB_PATH: str = "data/appointments.sqlite3"
+    APPOINTMENT_DB_POOL_SIZE: int = 4
+    APPOINTMENT_SLOT_MINUTES: int = 30
+    APPOINTMENT_DAY_START: str = "09:00"
+    APPOINTMENT_DAY_END: str = "17:00"
+    APPOINTMENT_INDEX_MAX_DAYS: int = 50_000
+
+    # Clarification sessions: a run that needs clarification keeps its OCR text,
+    # entities and partial normalization under a session id for
+    # POST /appointments/clarify. At most CLARIFY_MAX_SESSIONS are kept per worker,
+    # each for CLARIFY_SESSION_TTL seconds after its last use.
+    CLARIFY_MAX_SESSIONS: int = 10_000
+    CLARIFY_SESSION_TTL: float = 1800.0
+
+    # Departments: DEPARTMENT_SYNONYMS_PATH names a JSON file of {"synonym": "Department"}
+    # entries added to the built-in table at startup. A word that matches no synonym
+    # is matched to the closest one within DEPARTMENT_FUZZY_MAX_DISTANCE edits (OCR
+    # misreads like "cardiolgy"); synonyms under 7 letters only match exactly,
+    # under 10 letters within one edit. 0 turns fuzzy matching off.
+    DEPARTMENT_SYNONYMS_PATH: str = ""
+    DEPARTMENT_FUZZY_MAX_DISTANCE: int = 2
+
+    # JSON encoder for appointment responses: "orjson" (optional package, several
+    # times faster), "json" (standard library) or "auto" (orjson when installed).
+    JSON_SERIALIZER: str = "auto"
+
+    # Maximum number of items accepted by POST /appointments/batch.
+    BATCH_MAX_ITEMS: int = 1000
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+settings = Settings()
@@ -1,8 +1,31 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from src.api.appointments import router as appointments_router
+from src.api.body_limit import MultipartBodyLimit
+from src.api.health import router as health_router
+from src.api.metrics import router as metrics_router
+from src.api.ocr import router as ocr_router
+from src.core.config import settings
+from src.services.appointment_store import get_appointment_store
+from src.services.ocr_executor import ocr_executor
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm OCR in the background: the server (and the text path) is up at once,
+    # /readyz turns 200 when the workers have loaded the engine
+    warm_up = asyncio.ensure_future(ocr_executor.warm_up()) if settings.OCR_WARM_UP else None
+    yield
+    if warm_up is not None:
+        warm_up.cancel()
+    # Stop OCR workers so reloads and shutdowns don't leave tesseract processes behind
+    ocr_executor.shutdown(wait=False)
+    get_appointment_store().close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -11,9 +34,14 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Oversized multipart uploads are refused before FastAPI parses and spools them
+app.add_middleware(MultipartBodyLimit)
 
 app.include_router(appointments_router, prefix="/appointments", tags=["appointments"])
+app.include_router(ocr_router, prefix="/ocr", tags=["ocr"])
+app.include_router(metrics_router, tags=["metrics"])
+app.include_router(health_router, tags=["health"])
 
 @app.get("/")
 def read_root():
-    return {"message": "Welcome to the OCR-based NLP Appointment Scheduling Service!"}
\ No newline at end of file
+    return {"message": "Welcome to the OCR-based NLP Appointment Scheduling Service!"}
@@ -1,35 +1,29 @@
 from typing import Dict, Any
 from fastapi import HTTPException
-from src.services.nlp_service import extract_entities, normalize_entities, handle_ambiguity
+from src.pipelines.engine import PipelineContext, PipelineEngine
+from src.pipelines.stages import ExtractStage, GuardrailStage, IngestStage, NormalizeStage
 
 
 class AppointmentPipeline:
     """Minimal pipeline used by tests.
 
     run(text: str) -> Dict[str, Any]
-    """
-
-    def run(self, text: str, ref_date=None) -> Dict[str, Any]:
-        if not isinstance(text, str) or not text.strip():
-            raise HTTPException(status_code=422, detail="Text must not be empty.")
 
-        # Step 1: (text input) — already text
-        raw_text = text.strip()
+    Runs typed text through the shared stage engine. The text is not passed
+    through the OCR clean stage, so names keep their capitalization.
+    """
 
-        # Step 2: entity extraction
-        entities = extract_entities(raw_text)
+    engine = PipelineEngine((IngestStage(), ExtractStage(), GuardrailStage(), NormalizeStage()))
 
-        # Guardrails: ambiguous or missing required entities
-        try:
-            handle_ambiguity(entities)
-        except ValueError:
+    def run(self, text: str, ref_date=None) -> Dict[str, Any]:
+        ctx = self.engine.run(PipelineContext(text=text, ref_date=ref_date))
+        if ctx.error is not None:
+            raise HTTPException(status_code=ctx.error.status_code, detail=ctx.error.message)
+        if ctx.clarification is not None:
             # Tests expect a generic failure message for inability to extract details
             raise HTTPException(status_code=400, detail="Unable to extract appointment details")
 
-    # Step 3: normalization (pass ref_date for deterministic tests when provided)
-        normalized = normalize_entities(entities, ref_date=ref_date)
-
-        # Build appointment
+        entities, normalized = ctx.entities, ctx.normalized
         appointment = {
             "name": entities.get("name"),
             "department": entities.get("department"),
@@ -38,4 +32,4 @@ class AppointmentPipeline:
             "tz": normalized.get("tz"),
         }
 
-        return {"status": "success", "appointment": appointment}
\ No newline at end of file
+        return {"status": "success", "appointment": appointment}
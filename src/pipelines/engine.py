@@ -0,0 +1,160 @@
+import inspect
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+
+
+class PipelineError(Exception):
+    """Stops a pipeline run with an HTTP-style status code.
+
+    ``message`` is the human readable reason; ``content`` is the JSON body the
+    API returns for it (``{"status": "error", "message": ...}`` by default).
+    """
+
+    def __init__(self, status_code: int, message: str, content: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.content = content if content is not None else {"status": "error", "message": message}
+
+
+@dataclass
+class StageRecord:
+    """What one stage did during a run: ``status`` is "ok", "skipped" or "error"."""
+
+    stage: str
+    status: str
+    elapsed_ms: float = 0.0
+    output: Any = None
+
+
+@dataclass
+class PipelineContext:
+    """State threaded through the stages of one run.
+
+    The input is ``image_bytes`` when set, otherwise ``text``. ``request`` is the
+    Starlette request when running behind the API (used for cache headers and
+    disconnect detection). Stages fill in the remaining fields.
+    """
+
+    text: Optional[str] = None
+    image_bytes: Optional[bytes] = None
+    ref_date: Optional[date] = None
+    request: Any = None
+
+    # What the ingest stage read from the image header: mime, size, pages for documents
+    image_info: Dict[str, Any] = field(default_factory=dict)
+    ocr_info: Dict[str, Any] = field(default_factory=dict)
+    source_text: Optional[str] = None
+    cleaned: Optional[str] = None
+    entities: Optional[Dict[str, Any]] = None
+    clarification: Optional[str] = None
+    normalized: Optional[Dict[str, Any]] = None
+    entities_confidence: Optional[float] = None
+    normalization_confidence: Optional[float] = None
+    # Multi-appointment runs: one dict per appointment found (see extract_appointments)
+    appointments: Optional[List[Dict[str, Any]]] = None
+
+    error: Optional[PipelineError] = None
+    trace: List[StageRecord] = field(default_factory=list)
+    # Finer-grained timings (ms) recorded outside the stage loop, e.g. request
+    # parsing by the API or the OCR worker's decode/recognize steps.
+    step_timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def is_text(self) -> bool:
+        return self.image_bytes is None
+
+    def timings(self) -> Dict[str, float]:
+        """Milliseconds spent in each stage that ran, plus ``step_timings``."""
+        timings = dict(self.step_timings)
+        timings.update((r.stage, r.elapsed_ms) for r in self.trace if r.status != "skipped")
+        return timings
+
+
+class Stage:
+    """One step of the pipeline.
+
+    Subclasses set ``name`` and implement ``run(ctx)``, which may be a coroutine
+    function for stages that wait on I/O. The return value is recorded as the
+    stage's output. ``applies(ctx)`` lets a stage opt out of a run (e.g. OCR for
+    typed text). Stages are built once and shared by all runs, so they must not
+    keep per-request state on ``self``.
+    """
+
+    name = "stage"
+
+    def applies(self, ctx: PipelineContext) -> bool:
+        return True
+
+    def run(self, ctx: PipelineContext) -> Any:
+        raise NotImplementedError
+
+
+class PipelineEngine:
+    """Runs a fixed sequence of stages over a ``PipelineContext``.
+
+    A ``PipelineError`` raised by a stage is stored on ``ctx.error`` and ends
+    the run; any other exception is recorded and re-raised. Every stage gets a
+    ``StageRecord`` in ``ctx.trace``, including skipped ones.
+    """
+
+    def __init__(self, stages: Sequence[Stage]):
+        self.stages = tuple(stages)
+        names = [s.name for s in self.stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate stage names: {names}")
+        self._async = {s.name for s in self.stages if inspect.iscoroutinefunction(s.run)}
+
+    def _should_run(self, stage: Stage, ctx: PipelineContext) -> bool:
+        if ctx.error is None and stage.applies(ctx):
+            return True
+        ctx.trace.append(StageRecord(stage.name, "skipped"))
+        return False
+
+    def _finish(self, stage: Stage, ctx: PipelineContext, started: float, output: Any = None, exc: Optional[BaseException] = None) -> None:
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+        if exc is None:
+            ctx.trace.append(StageRecord(stage.name, "ok", elapsed_ms, output))
+            return
+        ctx.trace.append(StageRecord(stage.name, "error", elapsed_ms, str(exc)))
+        if isinstance(exc, PipelineError):
+            ctx.error = exc
+
+    def run(self, ctx: PipelineContext) -> PipelineContext:
+        """Run synchronously. Only valid when no async stage applies to ``ctx``."""
+        for stage in self.stages:
+            if not self._should_run(stage, ctx):
+                continue
+            if stage.name in self._async:
+                raise RuntimeError(f"Stage {stage.name!r} is async; use run_async()")
+            started = time.perf_counter()
+            try:
+                output = stage.run(ctx)
+            except PipelineError as e:
+                self._finish(stage, ctx, started, exc=e)
+            except Exception as e:
+                self._finish(stage, ctx, started, exc=e)
+                raise
+            else:
+                self._finish(stage, ctx, started, output)
+        return ctx
+
+    async def run_async(self, ctx: PipelineContext) -> PipelineContext:
+        for stage in self.stages:
+            if not self._should_run(stage, ctx):
+                continue
+            started = time.perf_counter()
+            try:
+                output = stage.run(ctx)
+                if stage.name in self._async:
+                    output = await output
+            except PipelineError as e:
+                self._finish(stage, ctx, started, exc=e)
+            except Exception as e:
+                self._finish(stage, ctx, started, exc=e)
+                raise
+            else:
+                self._finish(stage, ctx, started, output)
+        return ctx
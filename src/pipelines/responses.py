@@ -0,0 +1,114 @@
+"""Response bodies for finished pipeline runs, shared by the API and offline bulk runs.
+
+Both builders return ``(status_code, content)``; booking, clarification
+sessions and the lean view are left to the caller. ``parse_json_item`` checks
+a JSON item (a batch item or a bulk JSONL line) the way `POST /appointments`
+checks its body, with the same error responses.
+"""
+from typing import Any, Dict, Tuple
+
+from src.pipelines.engine import PipelineContext
+from src.services.image_ingest import ImageRejected, decode_base64_capped
+
+
+def build_response(ctx: PipelineContext, text_input: bool) -> Tuple[int, Dict[str, Any]]:
+    """Turn a finished pipeline run into ``(status_code, content)``.
+
+    ``text_input`` marks JSON `text` requests, which keep their legacy
+    `detail` error shapes.
+    """
+    if ctx.error is not None:
+        return ctx.error.status_code, ctx.error.content
+
+    entities = {"entities": ctx.entities, "entities_confidence": ctx.entities_confidence}
+    if ctx.clarification is not None:
+        # Unified response: return pipeline partial and needs_clarification for any input
+        pipeline = {"ocr": ctx.ocr_info, "entities": entities, "normalization": {}}
+        # include legacy `detail` field for older clients/tests that expect it
+        content = {
+            "pipeline": pipeline,
+            "status": "needs_clarification",
+            "message": ctx.clarification,
+            "detail": ctx.clarification,
+        }
+        return 400, content
+
+    normalized = ctx.normalized
+    pipeline = {
+        "ocr": ctx.ocr_info,
+        "entities": entities,
+        "normalization": {"normalized": normalized, "normalization_confidence": ctx.normalization_confidence},
+    }
+
+    # Build final appointment
+    if normalized.get("date") and normalized.get("time"):
+        # department from extract_entities is already canonicalized when possible
+        department = ctx.entities.get("department")
+        appointment = {"department": department, "date": normalized.get("date"), "time": normalized.get("time"), "tz": normalized.get("tz")}
+    else:
+        # The phrases passed the guardrails but did not normalize (e.g. "13 pm")
+        if text_input:
+            return 400, {"detail": "Unable to extract appointment details"}
+        return 400, {"status": "error", "message": "Unable to extract appointment details"}
+
+    return 200, {"pipeline": pipeline, "appointment": appointment, "status": "ok"}
+
+
+def build_multiple_response(ctx: PipelineContext, text_input: bool) -> Tuple[int, Dict[str, Any]]:
+    """Turn a finished multi-appointment run into ``(status_code, content)``.
+
+    Every appointment found is an item of `appointments` with its own `status`:
+    "ok" with the `appointment`, or "needs_clarification" / "error" with a
+    `message`. The run fails with `400` only when nothing was found.
+    """
+    if ctx.error is not None:
+        return ctx.error.status_code, ctx.error.content
+
+    items = []
+    for found in ctx.appointments:
+        item = {key: found[key] for key in ("text", "span", "entities", "entities_confidence", "normalized", "normalization_confidence")}
+        normalized = found["normalized"] or {}
+        if found["clarification"] is not None:
+            item.update(status="needs_clarification", message=found["clarification"])
+        elif normalized.get("date") and normalized.get("time"):
+            item.update(
+                status="ok",
+                appointment={"department": found["entities"].get("department"), "date": normalized["date"], "time": normalized["time"], "tz": normalized.get("tz")},
+            )
+        else:
+            item.update(status="error", message="Unable to extract appointment details")
+        items.append(item)
+
+    pipeline = {"ocr": ctx.ocr_info}
+    if not items:
+        content = {"pipeline": pipeline, "status": "error", "message": "No appointments found"}
+        if text_input:
+            content["detail"] = content["message"]
+        return 400, content
+    return 200, {"pipeline": pipeline, "appointments": items, "status": "ok"}
+
+
+def invalid_image(e: ImageRejected) -> Tuple[int, Dict[str, Any]]:
+    return 400, {"status": "error", "message": "Invalid input format", "reason": e.reason}
+
+
+def parse_json_item(item: Any):
+    """Validate one JSON item (batch item, bulk line) like a single `POST /appointments` JSON body.
+
+    Returns ``("text", text)``, ``("image", image_bytes)`` or ``("error", (status_code, content))``.
+    """
+    invalid = (400, {"status": "error", "message": "Invalid input format"})
+    if not isinstance(item, dict):
+        return "error", invalid
+    provided = [k for k in ("text", "image_base64") if k in item]
+    if not provided:
+        return "error", (422, {"detail": [{"loc": ["body", "text"], "msg": "Field required.", "type": "value_error"}]})
+    if len(provided) != 1:
+        return "error", invalid
+    if provided[0] == "text":
+        # emptiness is checked by the ingest stage
+        return "text", item["text"]
+    try:
+        return "image", decode_base64_capped(item["image_base64"])
+    except ImageRejected as e:
+        return "error", invalid_image(e)
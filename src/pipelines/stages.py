@@ -0,0 +1,346 @@
+import asyncio
+from typing import Any, Dict, Optional, Tuple
+
+from src.core.config import settings
+from src.pipelines.engine import PipelineContext, PipelineEngine, PipelineError, Stage
+from src.services.image_ingest import ImageRejected, inspect_image
+from src.services.nlp_service import (
+    extract_appointments,
+    extract_entities,
+    handle_ambiguity,
+    normalize_entities,
+    normalize_ocr_lines,
+    normalize_ocr_noise,
+    score_entities,
+    score_normalization,
+)
+from src.services.ocr_cache import OCRCache, cache_key, ocr_cache
+from src.services.ocr_cascade import assess
+from src.services.ocr_executor import (
+    OCRClientDisconnected,
+    OCRExecutor,
+    OCRQueueFull,
+    OCRTimeout,
+    job_timings,
+    ocr_executor,
+    ocr_flights,
+)
+from src.utils.single_flight import SingleFlight
+
+INVALID_INPUT = "Invalid input format"
+
+
+class IngestStage(Stage):
+    """Validate the input and set ``ctx.source_text`` for typed text.
+
+    Images are checked by size, magic bytes and header dimensions (every page
+    for TIFF and PDF documents) and the result is kept in ``ctx.image_info``;
+    the pixels are not decoded here.
+    """
+
+    name = "ingest"
+
+    def run(self, ctx: PipelineContext) -> Dict[str, Any]:
+        if not ctx.is_text:
+            try:
+                if len(ctx.image_bytes) > settings.IMAGE_MAX_BYTES:
+                    raise ImageRejected(f"Image exceeds {settings.IMAGE_MAX_BYTES} bytes", too_large=True)
+                info = inspect_image(ctx.image_bytes)
+            except ImageRejected as e:
+                raise PipelineError(400, INVALID_INPUT, {"status": "error", "message": INVALID_INPUT, "reason": e.reason})
+            ctx.image_info = info
+            return {"kind": "image", "bytes": len(ctx.image_bytes), **info}
+
+        text = ctx.text
+        if not isinstance(text, str) or not text.strip():
+            msg = "Text must not be empty."
+            raise PipelineError(422, msg, {"detail": [{"loc": ["body", "text"], "msg": msg, "type": "value_error"}]})
+        ctx.source_text = text.strip()
+        ctx.ocr_info = {"raw_text": text, "confidence": 1.0}
+        return {"kind": "text", "chars": len(ctx.source_text)}
+
+
+def _merge_pages(results: Dict[int, Dict[str, Any]], page_count: int) -> Dict[str, Any]:
+    """One ``ocr_info`` for a document from the OCR results of the pages read, by 0-based page."""
+    pages = [
+        {"page": page + 1, "raw_text": info.get("raw_text", ""), "confidence": info.get("confidence"), "tier": info.get("tier")}
+        for page, info in sorted(results.items())
+    ]
+    confidences = [p["confidence"] for p in pages if p["confidence"] is not None]
+    return {
+        "raw_text": "\n".join(p["raw_text"] for p in pages),
+        "confidence": round(sum(confidences) / len(confidences), 2) if confidences else 0.0,
+        "page_count": page_count,
+        "pages": pages,
+    }
+
+
+class OCRStage(Stage):
+    """Run OCR on the shared executor, going through the content-addressed cache.
+
+    ``Cache-Control: no-cache`` on the request skips the lookup and ``no-store``
+    also skips storing the fresh result. Concurrent requests for the same image
+    (same cache key) share one executor job; each still gives up on its own
+    when its client disconnects. Skipped for typed text.
+
+    TIFF and PDF documents are OCRed page by page, one executor job (and cache
+    entry) per page, with at most one page per OCR worker in flight. Each
+    worker decodes only its own page. Once a page yields a date and time that
+    pass the guardrails, later pages are cancelled or never started; earlier
+    pages still running are awaited, since the appointment may start there.
+    With ``read_all_pages`` every page is read. ``multiple`` has the OCR
+    cascade judge its tiers as a multi-appointment run would (see ``assess``).
+    """
+
+    name = "ocr"
+
+    def __init__(
+        self,
+        executor: Optional[OCRExecutor] = None,
+        cache: Optional[OCRCache] = None,
+        flights: Optional[SingleFlight] = None,
+        read_all_pages: bool = False,
+        multiple: bool = False,
+    ):
+        self.read_all_pages = read_all_pages
+        self.multiple = multiple
+        self.executor = executor if executor is not None else ocr_executor
+        self.cache = cache if cache is not None else ocr_cache
+        self.flights = flights if flights is not None else ocr_flights
+
+    def applies(self, ctx: PipelineContext) -> bool:
+        return not ctx.is_text
+
+    async def _recognize(self, image_bytes: bytes, page: Optional[Tuple[str, int]] = None):
+        # Shared by coalesced requests, so no single request's disconnect may cancel it
+        options: Dict[str, Any] = {} if page is None else {"page": page}
+        if self.multiple:
+            options["multiple"] = True
+        result = await self.executor.run(image_bytes, **options)
+        return result, job_timings()
+
+    async def _ocr(self, ctx: PipelineContext, read_cache: bool, write_cache: bool, page: Optional[Tuple[str, int]] = None):
+        """OCR the image, or one ``(mime, index)`` page of it: ``(ocr_info, cached, coalesced)``."""
+        key = cache_key(ctx.image_bytes, page=page[1] if page is not None else None, multiple=self.multiple)
+        ocr_info = None
+        if read_cache:
+            ocr_info = await self.cache.get(key)
+        else:
+            self.cache.record_bypass()
+        if ocr_info is not None:
+            return ocr_info, True, False
+
+        until = self.executor.raise_on_disconnect(ctx.request) if ctx.request is not None else None
+        (ocr_info, timings), coalesced = await self.flights.run(key, lambda: self._recognize(ctx.image_bytes, page), until=until)
+        # Every coalesced request gets its own copy of the shared result
+        ocr_info = dict(ocr_info)
+        if not coalesced:
+            for step, ms in timings.items():
+                # Pages add up
+                ctx.step_timings[step] = round(ctx.step_timings.get(step, 0.0) + ms, 3)
+            if write_cache:
+                await self.cache.set(key, ocr_info)
+        return ocr_info, False, coalesced
+
+    async def _ocr_pages(self, ctx: PipelineContext, read_cache: bool, write_cache: bool) -> Dict[int, Tuple[Dict[str, Any], bool, bool]]:
+        mime, pages = ctx.image_info["mime"], ctx.image_info["pages"]
+        window = max(1, self.executor.workers)
+        results: Dict[int, Tuple[Dict[str, Any], bool, bool]] = {}
+        running: Dict[asyncio.Future, int] = {}
+        next_page = 0
+        # Lowest page whose text holds a complete appointment
+        complete: Optional[int] = None
+        try:
+            while running or (next_page < pages and complete is None):
+                while next_page < pages and complete is None and len(running) < window:
+                    running[asyncio.ensure_future(self._ocr(ctx, read_cache, write_cache, (mime, next_page)))] = next_page
+                    next_page += 1
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    page = running.pop(task)
+                    results[page] = task.result()
+                    if not self.read_all_pages and (complete is None or page < complete) and assess(results[page][0])[0]:
+                        complete = page
+                if complete is not None:
+                    for task, page in list(running.items()):
+                        if page > complete:
+                            task.cancel()
+                            del running[task]
+        finally:
+            for task in running:
+                task.cancel()
+        return {page: result for page, result in results.items() if complete is None or page <= complete}
+
+    async def run(self, ctx: PipelineContext) -> Dict[str, Any]:
+        cache_control = ctx.request.headers.get("cache-control", "").lower() if ctx.request is not None else ""
+        read_cache = "no-cache" not in cache_control and "no-store" not in cache_control
+        write_cache = "no-store" not in cache_control
+
+        try:
+            if "pages" not in ctx.image_info:
+                ocr_info, cached, coalesced = await self._ocr(ctx, read_cache, write_cache)
+                output = {"cached": cached, "coalesced": coalesced, "tier": ocr_info.get("tier")}
+            else:
+                results = await self._ocr_pages(ctx, read_cache, write_cache)
+                ocr_info = _merge_pages({page: info for page, (info, _, _) in results.items()}, ctx.image_info["pages"])
+                output = {
+                    "cached": all(cached for _, cached, _ in results.values()),
+                    "coalesced": any(coalesced for _, _, coalesced in results.values()),
+                    "pages_read": len(ocr_info["pages"]),
+                }
+        except OCRQueueFull:
+            raise PipelineError(503, "OCR queue is full, retry later")
+        except OCRTimeout:
+            raise PipelineError(504, "OCR timed out")
+        except OCRClientDisconnected:
+            # nginx-style "client closed request"; nobody is listening for the body
+            raise PipelineError(499, "Client closed request")
+
+        ctx.ocr_info = ocr_info
+        ctx.source_text = ocr_info.get("raw_text", "")
+        output["confidence"] = ocr_info.get("confidence")
+        return output
+
+
+class LocalOCRStage(Stage):
+    """Run OCR in this process with an ``OCRService``, for offline runs whose own worker processes are the pool.
+
+    No executor, cache or coalescing. Document pages are read in order until
+    one yields a date and time that pass the guardrails, or all of them with
+    ``read_all_pages``. The service (and with it NumPy, Pillow and the OCR
+    engine) is created on first use; ``ocr_workers`` is the number of
+    processes running one, which sizes its tile threads, and ``multiple`` is
+    passed on to it as in ``OCRStage``.
+    """
+
+    name = "ocr"
+
+    def __init__(self, service=None, read_all_pages: bool = False, ocr_workers: Optional[int] = None, multiple: bool = False):
+        self._service = service
+        self.read_all_pages = read_all_pages
+        self.ocr_workers = ocr_workers
+        self.multiple = multiple
+
+    def applies(self, ctx: PipelineContext) -> bool:
+        return not ctx.is_text
+
+    @property
+    def service(self):
+        if self._service is None:
+            from src.services.ocr_service import OCRService, tile_worker_count
+
+            self._service = OCRService(tile_workers=tile_worker_count(self.ocr_workers), multiple=self.multiple)
+        return self._service
+
+    def run(self, ctx: PipelineContext) -> Dict[str, Any]:
+        if "pages" not in ctx.image_info:
+            ocr_info = self.service.extract_text_from_bytes(ctx.image_bytes)
+            output = {"tier": ocr_info.get("tier")}
+        else:
+            results = {}
+            for page in range(ctx.image_info["pages"]):
+                results[page] = self.service.extract_text_from_page(ctx.image_bytes, ctx.image_info["mime"], page)
+                if not self.read_all_pages and assess(results[page])[0]:
+                    break
+            ocr_info = _merge_pages(results, ctx.image_info["pages"])
+            output = {"pages_read": len(results)}
+        ctx.ocr_info = ocr_info
+        ctx.source_text = ocr_info.get("raw_text", "")
+        output["confidence"] = ocr_info.get("confidence")
+        return output
+
+
+class CleanStage(Stage):
+    """Lower-case, collapse whitespace and fix common OCR misreads.
+
+    ``keep_lines`` keeps the line breaks, which separate appointments in
+    multi-appointment runs.
+    """
+
+    name = "clean"
+
+    def __init__(self, keep_lines: bool = False):
+        self.keep_lines = keep_lines
+
+    def run(self, ctx: PipelineContext) -> str:
+        ctx.cleaned = (normalize_ocr_lines if self.keep_lines else normalize_ocr_noise)(ctx.source_text)
+        return ctx.cleaned
+
+
+class ExtractStage(Stage):
+    """Extract name, date/time phrases and department from the cleaned (or raw) text."""
+
+    name = "extract"
+
+    def run(self, ctx: PipelineContext) -> Dict[str, Any]:
+        text = ctx.cleaned if ctx.cleaned is not None else ctx.source_text
+        ctx.entities = extract_entities(text)
+        return ctx.entities
+
+
+class ExtractAppointmentsStage(Stage):
+    """Every appointment in the cleaned text; each is checked, normalized and scored on its own."""
+
+    name = "extract_all"
+
+    def run(self, ctx: PipelineContext) -> Dict[str, Any]:
+        text = ctx.cleaned if ctx.cleaned is not None else ctx.source_text
+        ctx.appointments = extract_appointments(text, ctx.ocr_info.get("confidence", 1.0), ref_date=ctx.ref_date)
+        return {"appointments": len(ctx.appointments)}
+
+
+class GuardrailStage(Stage):
+    """Flag ambiguous or missing date/time; later stages skip normalization."""
+
+    name = "guardrails"
+
+    def run(self, ctx: PipelineContext) -> Optional[str]:
+        try:
+            handle_ambiguity(ctx.entities)
+        except ValueError as e:
+            ctx.clarification = str(e)
+        return ctx.clarification
+
+
+class NormalizeStage(Stage):
+    """Resolve date/time phrases to YYYY-MM-DD and HH:MM against ``ctx.ref_date``."""
+
+    name = "normalize"
+
+    def applies(self, ctx: PipelineContext) -> bool:
+        return ctx.clarification is None
+
+    def run(self, ctx: PipelineContext) -> Dict[str, Any]:
+        ctx.normalized = normalize_entities(ctx.entities, ref_date=ctx.ref_date)
+        return ctx.normalized
+
+
+class ScoreStage(Stage):
+    """Confidence for the extracted entities (blended with OCR) and for normalization."""
+
+    name = "score"
+
+    def run(self, ctx: PipelineContext) -> Dict[str, Any]:
+        ctx.entities_confidence = score_entities(ctx.entities, ctx.ocr_info.get("confidence", 1.0))
+        if ctx.normalized is not None:
+            ctx.normalization_confidence = score_normalization(ctx.entities, ctx.normalized)
+        return {"entities": ctx.entities_confidence, "normalization": ctx.normalization_confidence}
+
+
+# ingest -> OCR -> clean -> extract -> guardrails -> normalize -> score
+DEFAULT_STAGES = (
+    IngestStage(),
+    OCRStage(),
+    CleanStage(),
+    ExtractStage(),
+    GuardrailStage(),
+    NormalizeStage(),
+    ScoreStage(),
+)
+
+appointment_engine = PipelineEngine(DEFAULT_STAGES)
+
+# ingest -> OCR (every page) -> clean -> extract every appointment (normalized and scored per appointment)
+MULTIPLE_STAGES = (DEFAULT_STAGES[0], OCRStage(read_all_pages=True, multiple=True), CleanStage(keep_lines=True), ExtractAppointmentsStage())
+
+multiple_appointments_engine = PipelineEngine(MULTIPLE_STAGES)
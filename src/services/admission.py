@@ -0,0 +1,183 @@
+import asyncio
+import math
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from src.core.config import settings
+from src.services.ocr_executor import OCRExecutor, ocr_executor
+
+# Header carrying a per-request deadline in milliseconds.
+DEADLINE_HEADER = "x-request-deadline-ms"
+
+TEXT, IMAGE, IMAGE_BASE64 = "text", "image", "image_base64"
+# Lanes whose requests end up on the OCR executor
+OCR_LANES = (IMAGE, IMAGE_BASE64)
+
+
+class AdmissionRejected(Exception):
+    """A request turned away before it ran: 429 (lane queue full) or 503 (deadline)."""
+
+    def __init__(self, status_code: int, message: str, retry_after: float):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        # Whole seconds, at least one, as Retry-After wants
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class Lane:
+    """FIFO admission for one kind of request: ``limit`` run at once, ``max_queue`` wait.
+
+    Waiters are plain futures created on the caller's event loop, and a
+    released slot is handed straight to the oldest waiter.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.counters = {"admitted": 0, "queue_full": 0, "deadline": 0, "shed": 0}
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, timeout: float, retry_after: float) -> None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.counters["admitted"] += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.counters["queue_full"] += 1
+            raise AdmissionRejected(429, f"Too many {self.name} requests waiting, retry later", retry_after)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # shield: a timeout must not cancel the future release() may be resolving
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except BaseException as exc:
+            if waiter.done() and not waiter.cancelled():
+                # Handed a slot just as this caller gave up: pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(exc, asyncio.TimeoutError):
+                self.counters["deadline"] += 1
+                raise AdmissionRejected(503, "Request deadline passed while waiting to be admitted", retry_after)
+            raise
+        self.counters["admitted"] += 1
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            try:
+                # The slot passes to the waiter; ``active`` stays the same
+                waiter.set_result(None)
+                return
+            except RuntimeError:
+                # its event loop is closed
+                continue
+        self.active -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"limit": self.limit, "max_queue": self.max_queue, "active": self.active, "waiting": self.waiting, **self.counters}
+
+
+class Slot:
+    """The lane slot a request holds inside ``AdmissionController.admit``."""
+
+    def __init__(self, controller: "AdmissionController", lane: str, deadline: float):
+        self.controller = controller
+        self.lane: Optional[str] = lane
+        self.deadline = deadline
+
+    async def switch(self, lane: str) -> None:
+        """Give this slot back and wait for one in ``lane``, or raise ``AdmissionRejected``.
+
+        For requests whose kind is only known once the body is parsed, e.g. a
+        small JSON body that turns out to hold a base64 image.
+        """
+        if lane == self.lane:
+            return
+        self.controller.lanes[self.lane].release()
+        self.lane = None
+        await self.controller._acquire(lane, self.deadline)
+        self.lane = lane
+
+
+class AdmissionController:
+    """Per-kind concurrency limits and queues in front of the pipeline.
+
+    Typed text, raw/multipart images and base64 images each have their own
+    ``Lane``, so a burst of images can fill its lanes without delaying text.
+    Image requests are also shed up front with 503 when the OCR executor's
+    estimated wait (queued jobs plus image requests waiting here) is longer
+    than the request's deadline.
+    """
+
+    def __init__(self, executor: Optional[OCRExecutor] = None):
+        self.executor = executor if executor is not None else ocr_executor
+        workers = self.executor.workers
+        self.default_deadline = settings.ADMISSION_DEFAULT_DEADLINE
+        self.lanes = {
+            TEXT: Lane(TEXT, settings.ADMISSION_TEXT_CONCURRENCY, settings.ADMISSION_TEXT_QUEUE),
+            IMAGE: Lane(IMAGE, settings.ADMISSION_IMAGE_CONCURRENCY or workers, settings.ADMISSION_IMAGE_QUEUE),
+            IMAGE_BASE64: Lane(IMAGE_BASE64, settings.ADMISSION_BASE64_CONCURRENCY or workers, settings.ADMISSION_BASE64_QUEUE),
+        }
+
+    def deadline(self, headers) -> float:
+        """Seconds this request may wait: ``X-Request-Deadline-Ms`` or the default."""
+        value = headers.get(DEADLINE_HEADER)
+        try:
+            ms = float(value) if value is not None else 0.0
+        except ValueError:
+            ms = 0.0
+        return ms / 1000 if ms > 0 else self.default_deadline
+
+    def estimated_ocr_wait(self) -> float:
+        waiting = sum(self.lanes[name].waiting for name in OCR_LANES)
+        return self.executor.estimated_wait(extra_jobs=waiting)
+
+    def check_ocr_wait(self, lane: str, deadline: float) -> None:
+        """Raise 503 when an OCR request would wait longer than ``deadline``."""
+        wait = self.estimated_ocr_wait()
+        if wait > deadline:
+            self.lanes[lane].counters["shed"] += 1
+            raise AdmissionRejected(503, "OCR is saturated, estimated wait exceeds the request deadline", wait)
+
+    async def _acquire(self, lane: str, deadline: float) -> None:
+        retry_after = 1.0
+        if lane in OCR_LANES:
+            self.check_ocr_wait(lane, deadline)
+            retry_after = self.estimated_ocr_wait()
+        await self.lanes[lane].acquire(deadline, retry_after)
+
+    @asynccontextmanager
+    async def admit(self, lane: str, deadline: float) -> AsyncIterator[Slot]:
+        """Hold a slot in ``lane`` for the body of the ``async with``, or raise ``AdmissionRejected``.
+
+        The body may move to another lane with ``Slot.switch``; whichever slot
+        is held at the end is released.
+        """
+        await self._acquire(lane, deadline)
+        slot = Slot(self, lane, deadline)
+        try:
+            yield slot
+        finally:
+            if slot.lane is not None:
+                self.lanes[slot.lane].release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "estimated_ocr_wait_s": round(self.estimated_ocr_wait(), 3),
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()},
+        }
+
+
+admission = AdmissionController()
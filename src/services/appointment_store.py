@@ -0,0 +1,413 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import uuid4
+
+from src.core.config import settings
+from src.utils.intervals import Interval, IntervalIndex
+
+_MINUTES_PER_DAY = 24 * 60
+
+
+def _minutes(hhmm: str) -> int:
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class AppointmentConflict(Exception):
+    """The department is already booked for part of the requested slot."""
+
+    def __init__(self, appointment: "StoredAppointment", conflicts: List[Dict[str, Any]]):
+        super().__init__(f"{appointment.department} is already booked at {appointment.time} on {appointment.date}")
+        self.appointment = appointment
+        self.conflicts = conflicts
+
+
+@dataclass
+class StoredAppointment:
+    id: str
+    department: Optional[str]
+    date: str
+    start: int
+    end: int
+    tz: Optional[str] = None
+    name: Optional[str] = None
+    # Idempotency key the client booked it under, if any
+    source: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def time(self) -> str:
+        return _hhmm(self.start)
+
+    @property
+    def key(self) -> Optional[Tuple[str, str]]:
+        """Interval index key; appointments without a department book nothing."""
+        return (self.department, self.date) if self.department else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "appointment_id": self.id,
+            "department": self.department,
+            "date": self.date,
+            "time": self.time,
+            "end_time": _hhmm(self.end),
+            "tz": self.tz,
+            "name": self.name,
+            "created_at": self.created_at,
+        }
+
+
+def _describe(intervals: Iterable[Interval]) -> List[Dict[str, Any]]:
+    return [{"appointment_id": i, "time": _hhmm(start), "end_time": _hhmm(end)} for start, end, i in intervals]
+
+
+class AppointmentStore:
+    """Where booked appointments live, with an interval index per department and day.
+
+    ``add`` stores an appointment (``department``, ``date``, ``time``, ``tz``,
+    ``name`` as the pipeline normalizes them) for ``slot_minutes`` and raises
+    ``AppointmentConflict`` when it overlaps one already booked for the same
+    department. Adding the same slot again under the same ``source`` (the
+    client's idempotency key, on a retried request) returns the earlier booking
+    instead. ``availability`` lists a
+    department's bookings and free slots for a day. Both are binary searches in
+    the index, which holds each (department, day) as a sorted list of
+    non-overlapping intervals. Stores are created once per process through
+    ``get_appointment_store``.
+    """
+
+    name = "base"
+
+    def __init__(self, slot_minutes: Optional[int] = None, max_days: Optional[int] = None):
+        self.slot_minutes = settings.APPOINTMENT_SLOT_MINUTES if slot_minutes is None else slot_minutes
+        self.index = IntervalIndex(max_keys=max_days)
+        self._lock = threading.Lock()
+        self.created = 0
+        self.conflicts = 0
+        self.replayed = 0
+
+    def record(self, appointment: Dict[str, Any], source: Optional[str] = None) -> StoredAppointment:
+        """A new, not yet stored appointment for the slot starting at ``appointment["time"]``."""
+        start = _minutes(appointment["time"])
+        return StoredAppointment(
+            id=str(uuid4()),
+            department=appointment.get("department"),
+            date=appointment["date"],
+            start=start,
+            end=min(start + self.slot_minutes, _MINUTES_PER_DAY),
+            tz=appointment.get("tz"),
+            name=appointment.get("name"),
+            source=source,
+        )
+
+    def _load_day(self, key: Tuple[str, str]) -> List[Interval]:
+        """Intervals booked under ``key``, for stores whose index is a cache."""
+        return []
+
+    def _day(self, key: Tuple[str, str]) -> None:
+        # Caller holds the lock
+        if key not in self.index:
+            self.index.load(key, self._load_day(key))
+
+    def _clash(self, record: StoredAppointment) -> List[Interval]:
+        if record.key is None:
+            return []
+        with self._lock:
+            self._day(record.key)
+            return self.index.overlapping(record.key, record.start, record.end)
+
+    def _index(self, records: Iterable[StoredAppointment]) -> None:
+        with self._lock:
+            for record in records:
+                if record.key is None or record.key not in self.index:
+                    # Not indexed yet; loading the day later picks the row up
+                    continue
+                if any(i == record.id for _, _, i in self.index.overlapping(record.key, record.start, record.end)):
+                    continue
+                self.index.add(record.key, record.start, record.end, record.id)
+
+    def _insert(self, records: List[StoredAppointment]) -> Tuple[List[StoredAppointment], List[Tuple[StoredAppointment, List[Interval]]]]:
+        """Store ``records`` that do not clash with stored ones; return ``(stored, clashes)``."""
+        raise NotImplementedError
+
+    def _replay(self, record: StoredAppointment, clash: List[Interval]) -> Optional[StoredAppointment]:
+        """The booking ``record`` repeats, if its only clash is the same slot under the same key."""
+        if record.source is None or len(clash) != 1 or clash[0][0] != record.start:
+            return None
+        existing = self.get(clash[0][2])
+        return existing if existing is not None and existing.source == record.source else None
+
+    def add(self, appointment: Dict[str, Any], source: Optional[str] = None) -> StoredAppointment:
+        record = self.record(appointment, source)
+        # Cheap check against the index first; the insert checks again atomically
+        clash = self._clash(record)
+        if not clash:
+            stored, clashes = self._insert([record])
+            if stored:
+                self.created += 1
+                return record
+            clash = clashes[0][1]
+        existing = self._replay(record, clash)
+        if existing is not None:
+            self.replayed += 1
+            return existing
+        self.conflicts += 1
+        raise AppointmentConflict(record, _describe(clash))
+
+    def add_many(self, appointments: Iterable[Dict[str, Any]]) -> Tuple[List[StoredAppointment], int]:
+        """Store many appointments in one transaction; return the stored ones and the number that clashed."""
+        stored, clashes = self._insert([self.record(a) for a in appointments])
+        self.created += len(stored)
+        self.conflicts += len(clashes)
+        return stored, len(clashes)
+
+    def get(self, appointment_id: str) -> Optional[StoredAppointment]:
+        raise NotImplementedError
+
+    def availability(self, department: str, date: str) -> Dict[str, Any]:
+        """Bookings and free slots of ``department`` on ``date`` (YYYY-MM-DD).
+
+        Free stretches are reported between APPOINTMENT_DAY_START and
+        APPOINTMENT_DAY_END and are at least one slot long.
+        """
+        key = (department, date)
+        opens, closes = _minutes(settings.APPOINTMENT_DAY_START), _minutes(settings.APPOINTMENT_DAY_END)
+        with self._lock:
+            self._day(key)
+            booked = list(self.index.intervals(key))
+            free = self.index.gaps(key, opens, closes, self.slot_minutes)
+        return {
+            "department": department,
+            "date": date,
+            "slot_minutes": self.slot_minutes,
+            "opening_hours": {"start": _hhmm(opens), "end": _hhmm(closes)},
+            "booked": _describe(booked),
+            "free": [{"start": _hhmm(start), "end": _hhmm(end)} for start, end in free],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "created": self.created,
+                "conflicts": self.conflicts,
+                "replayed": self.replayed,
+                "indexed": len(self.index),
+                "indexed_dropped_days": self.index.dropped,
+            }
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryAppointmentStore(AppointmentStore):
+    """In-process store: the index is the only copy, lost on restart and not shared between workers."""
+
+    name = "memory"
+
+    def __init__(self, slot_minutes: Optional[int] = None):
+        super().__init__(slot_minutes)
+        self._records: Dict[str, StoredAppointment] = {}
+
+    def _insert(self, records):
+        stored, clashes = [], []
+        with self._lock:
+            for record in records:
+                clash = self.index.overlapping(record.key, record.start, record.end) if record.key else []
+                if clash:
+                    clashes.append((record, clash))
+                    continue
+                if record.key:
+                    self.index.add(record.key, record.start, record.end, record.id)
+                self._records[record.id] = record
+                stored.append(record)
+        return stored, clashes
+
+    def get(self, appointment_id: str) -> Optional[StoredAppointment]:
+        with self._lock:
+            return self._records.get(appointment_id)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["size"] = len(self._records)
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+            self.index = IntervalIndex()
+
+
+class SQLiteAppointmentStore(AppointmentStore):
+    """Appointments in a SQLite file, shared by every worker on the host.
+
+    WAL mode lets the workers read while one writes. Each process keeps up to
+    ``pool_size`` connections, and an insert checks for overlaps and writes in
+    one ``BEGIN IMMEDIATE`` transaction, so two workers cannot book the same
+    slot. The interval index is a cache of the rows: days are loaded on first
+    use and the least recently used are dropped past ``max_days``. Availability
+    may miss a booking another worker made after the day was loaded; the
+    conflict check on insert never does.
+    """
+
+    name = "sqlite"
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        slot_minutes: Optional[int] = None,
+        max_days: Optional[int] = None,
+    ):
+        super().__init__(slot_minutes, settings.APPOINTMENT_INDEX_MAX_DAYS if max_days is None else max_days)
+        self.path = settings.APPOINTMENT_DB_PATH if path is None else path
+        self.pool_size = settings.APPOINTMENT_DB_POOL_SIZE if pool_size is None else pool_size
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._pool_lock = threading.Lock()
+        self._pid: Optional[int] = None
+
+    def _open(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS appointments ("
+            " id TEXT PRIMARY KEY, department TEXT, day TEXT NOT NULL,"
+            " start_min INTEGER NOT NULL, end_min INTEGER NOT NULL,"
+            " tz TEXT, name TEXT, source TEXT, created_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS appointments_slot ON appointments (department, day, start_min)")
+        return conn
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        with self._pool_lock:
+            # Connections must not cross a fork, so start a new pool in child processes.
+            if self._pid != os.getpid():
+                self._pool, self._opened, self._pid = queue.LifoQueue(), 0, os.getpid()
+            pool = self._pool
+            try:
+                conn = pool.get_nowait()
+            except queue.Empty:
+                conn = None
+                if self._opened < self.pool_size:
+                    self._opened += 1
+                    conn = self._open()
+        if conn is None:
+            conn = pool.get()
+        try:
+            yield conn
+        finally:
+            pool.put(conn)
+
+    def _load_day(self, key):
+        with self._connection() as conn:
+            return conn.execute(
+                "SELECT start_min, end_min, id FROM appointments WHERE department = ? AND day = ?", key
+            ).fetchall()
+
+    def _insert(self, records):
+        stored, clashes = [], []
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for record in records:
+                    clash = []
+                    if record.key:
+                        clash = conn.execute(
+                            "SELECT start_min, end_min, id FROM appointments"
+                            " WHERE department = ? AND day = ? AND start_min < ? AND end_min > ?"
+                            " ORDER BY start_min",
+                            (record.department, record.date, record.end, record.start),
+                        ).fetchall()
+                    if clash:
+                        clashes.append((record, clash))
+                        continue
+                    conn.execute(
+                        "INSERT INTO appointments (id, department, day, start_min, end_min, tz, name, source, created_at)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            record.id, record.department, record.date, record.start, record.end,
+                            record.tz, record.name, record.source, record.created_at,
+                        ),
+                    )
+                    stored.append(record)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        self._index(stored)
+        if clashes:
+            # Another worker booked these days since they were loaded
+            with self._lock:
+                for key in {record.key for record, _ in clashes}:
+                    self.index.discard(key)
+        return stored, clashes
+
+    def get(self, appointment_id: str) -> Optional[StoredAppointment]:
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT id, department, day, start_min, end_min, tz, name, source, created_at FROM appointments WHERE id = ?",
+                (appointment_id,),
+            ).fetchone()
+        return StoredAppointment(*row) if row is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        with self._connection() as conn:
+            (stats["size"],) = conn.execute("SELECT COUNT(*) FROM appointments").fetchone()
+        return stats
+
+    def clear(self) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM appointments")
+        with self._lock:
+            self.index = IntervalIndex(max_keys=self.index.max_keys)
+
+    def close(self) -> None:
+        with self._pool_lock:
+            while True:
+                try:
+                    self._pool.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._opened = 0
+
+
+APPOINTMENT_STORES = {
+    MemoryAppointmentStore.name: MemoryAppointmentStore,
+    SQLiteAppointmentStore.name: SQLiteAppointmentStore,
+}
+
+_instances: Dict[str, AppointmentStore] = {}
+_instances_lock = threading.Lock()
+
+
+def get_appointment_store(name: Optional[str] = None) -> AppointmentStore:
+    """Return the process-wide instance of the named appointment store (default: ``APPOINTMENT_STORE``)."""
+    name = (name or settings.APPOINTMENT_STORE).lower()
+    if name not in APPOINTMENT_STORES:
+        raise ValueError(f"Unknown appointment store: {name!r} (expected one of {sorted(APPOINTMENT_STORES)})")
+    store = _instances.get(name)
+    if store is None:
+        with _instances_lock:
+            store = _instances.get(name)
+            if store is None:
+                store = _instances[name] = APPOINTMENT_STORES[name]()
+    return store
@@ -0,0 +1,176 @@
+import secrets
+from dataclasses import dataclass, replace
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.config import settings
+from src.services.nlp_service import (
+    canonical_department,
+    handle_ambiguity,
+    normalize_entities,
+    score_entities,
+    score_normalization,
+)
+from src.utils.cache import LRUCache
+
+UNRESOLVED = "Unable to extract appointment details"
+
+# Fields a client may correct. `date` is YYYY-MM-DD and taken as is; `time` is
+# read like a time phrase ("15:00", "3:30 pm").
+CORRECTABLE = ("name", "department", "date_phrase", "time_phrase", "date", "time")
+
+
+class InvalidCorrection(ValueError):
+    """A correction names an unknown field or holds a value that cannot be used."""
+
+
+@dataclass(frozen=True)
+class ClarificationSession:
+    """What a run that needs clarification had found, kept so a correction never reruns OCR.
+
+    ``normalized`` is partial: each phrase present is normalized on its own,
+    whether or not the guardrails let the run get that far. ``message`` says
+    what is still missing; None once the appointment is complete. ``book`` and
+    ``idempotency_key`` are what the original request asked for, so the
+    completed appointment is booked only if that request was a booking.
+    """
+
+    id: str
+    ocr_info: Dict[str, Any]
+    entities: Dict[str, Any]
+    normalized: Dict[str, Any]
+    ref_date: date
+    book: bool
+    idempotency_key: Optional[str]
+    message: Optional[str]
+    entities_confidence: float
+    normalization_confidence: float
+
+    def corrected(self, corrections: Dict[str, Any]) -> Tuple["ClarificationSession", List[str]]:
+        """Apply ``corrections`` and re-run only the stages they touch.
+
+        A corrected date or time phrase is normalized on its own; the other
+        field keeps its earlier normalization. The guardrails and scores always
+        run again, since they look at every field. Returns the new session and
+        the stages that ran.
+        """
+        entities, normalized = dict(self.entities), dict(self.normalized)
+        stages = ["guardrails"]
+        for key, value in corrections.items():
+            if key not in CORRECTABLE:
+                raise InvalidCorrection(f"{key} cannot be corrected (expected some of {list(CORRECTABLE)})")
+            if not isinstance(value, str) or not value.strip():
+                raise InvalidCorrection(f"{key} must be a non-empty string")
+            value = value.strip()
+            if key == "department":
+                entities["department"] = canonical_department(value)
+                entities.pop("department_distance", None)
+                if entities["department"] is None:
+                    raise InvalidCorrection(f"Unknown department: {value}")
+            elif key == "name":
+                entities["name"] = value
+            elif key == "date":
+                try:
+                    normalized["date"] = date.fromisoformat(value).isoformat()
+                except ValueError:
+                    raise InvalidCorrection("date must be YYYY-MM-DD")
+                entities["date_phrase"] = value
+            elif key == "date_phrase":
+                entities["date_phrase"] = value
+                normalized["date"] = normalize_entities({"date_phrase": value}, ref_date=self.ref_date)["date"]
+                stages.append("normalize_date")
+            else:
+                entities["time_phrase"] = value
+                normalized["time"] = normalize_entities({"time_phrase": value}, ref_date=self.ref_date)["time"]
+                stages.append("normalize_time")
+        stages.append("score")
+
+        try:
+            handle_ambiguity(entities)
+            message = None if normalized.get("date") and normalized.get("time") else UNRESOLVED
+        except ValueError as e:
+            message = str(e)
+        session = replace(
+            self,
+            entities=entities,
+            normalized=normalized,
+            message=message,
+            entities_confidence=score_entities(entities, self.ocr_info.get("confidence", 1.0)),
+            normalization_confidence=score_normalization(entities, normalized),
+        )
+        return session, stages
+
+    @property
+    def appointment(self) -> Dict[str, Any]:
+        normalized = self.normalized
+        return {"department": self.entities.get("department"), "date": normalized.get("date"), "time": normalized.get("time"), "tz": normalized.get("tz")}
+
+    def pipeline(self) -> Dict[str, Any]:
+        """The `pipeline` object of an appointment response, from what the session holds."""
+        return {
+            "ocr": self.ocr_info,
+            "entities": {"entities": self.entities, "entities_confidence": self.entities_confidence},
+            "normalization": {"normalized": self.normalized, "normalization_confidence": self.normalization_confidence},
+        }
+
+
+class ClarificationSessions:
+    """Sessions for runs that ended in ``needs_clarification``, by short random id.
+
+    Bounded to ``max_entries`` (least recently used dropped first) and expired
+    ``ttl`` seconds after their last use. Sessions live in the worker process that
+    opened them, like background jobs.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self._sessions = LRUCache(
+            maxsize=settings.CLARIFY_MAX_SESSIONS if max_entries is None else max_entries,
+            ttl=settings.CLARIFY_SESSION_TTL if ttl is None else ttl,
+        )
+        self.opened = 0
+        self.resolved = 0
+
+    def open(
+        self,
+        ocr_info: Dict[str, Any],
+        entities: Dict[str, Any],
+        ref_date: date,
+        message: str,
+        book: bool = False,
+        idempotency_key: Optional[str] = None,
+    ) -> ClarificationSession:
+        normalized = normalize_entities(entities, ref_date=ref_date)
+        session = ClarificationSession(
+            id=secrets.token_urlsafe(12),
+            ocr_info=ocr_info,
+            entities=dict(entities),
+            normalized=normalized,
+            ref_date=ref_date,
+            book=book,
+            idempotency_key=idempotency_key,
+            message=message,
+            entities_confidence=score_entities(entities, ocr_info.get("confidence", 1.0)),
+            normalization_confidence=score_normalization(entities, normalized),
+        )
+        self._sessions.set(session.id, session)
+        self.opened += 1
+        return session
+
+    def get(self, session_id: str) -> Optional[ClarificationSession]:
+        return self._sessions.get(session_id)
+
+    def save(self, session: ClarificationSession) -> None:
+        self._sessions.set(session.id, session)
+
+    def close(self, session_id: str) -> None:
+        if self._sessions.pop(session_id) is not None:
+            self.resolved += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._sessions.stats(), "opened": self.opened, "resolved": self.resolved}
+
+    def clear(self) -> None:
+        self._sessions.clear()
+
+
+clarification_sessions = ClarificationSessions()
@@ -0,0 +1,97 @@
+from io import BytesIO
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from src.core.config import settings
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Formats that can hold several pages; each page is OCRed as its own job.
+DOCUMENT_TYPES = ("image/tiff", "application/pdf")
+
+_POINTS_PER_INCH = 72
+
+
+class DocumentError(Exception):
+    """A document that cannot be paged: unreadable, too many pages, or PDF support missing."""
+
+
+def _pdfium():
+    try:
+        import pypdfium2  # optional; only needed for PDF intake
+    except ImportError:
+        raise DocumentError("PDF support needs the pypdfium2 package")
+    return pypdfium2
+
+
+def _pdf_scale(width_pt: float, height_pt: float, max_side: Optional[int] = None) -> float:
+    """Render scale for a PDF page: DOCUMENT_PDF_DPI, shrunk so the long side fits ``max_side``."""
+    max_side = settings.OCR_MAX_SIDE if max_side is None else max_side
+    scale = settings.DOCUMENT_PDF_DPI / _POINTS_PER_INCH
+    if max_side:
+        scale = min(scale, max_side / max(width_pt, height_pt, 1))
+    return scale
+
+
+def inspect_document(data: bytes, mime: str, max_pixels: Optional[int] = None) -> Dict[str, Any]:
+    """Count the pages of a TIFF or PDF and check each page's size, without decoding pixels.
+
+    TIFF pages are checked from their directory entries; PDF pages by their
+    size once rendered. Returns ``{"pages", "width", "height"}`` (of the first page).
+    """
+    max_pixels = settings.IMAGE_MAX_PIXELS if max_pixels is None else max_pixels
+    sizes = []
+    if mime == "application/pdf":
+        pdfium = _pdfium()
+        try:
+            pdf = pdfium.PdfDocument(data)
+        except pdfium.PdfiumError:
+            raise DocumentError("Unreadable PDF")
+        try:
+            if len(pdf) > settings.DOCUMENT_MAX_PAGES:
+                raise DocumentError(f"Document has more than {settings.DOCUMENT_MAX_PAGES} pages")
+            for index in range(len(pdf)):
+                width_pt, height_pt = pdf.get_page_size(index)
+                scale = _pdf_scale(width_pt, height_pt)
+                sizes.append((round(width_pt * scale), round(height_pt * scale)))
+        finally:
+            pdf.close()
+    else:
+        from PIL import Image, UnidentifiedImageError  # only image requests need Pillow
+
+        try:
+            with Image.open(BytesIO(data)) as image:
+                for index in range(getattr(image, "n_frames", 1)):
+                    if index >= settings.DOCUMENT_MAX_PAGES:
+                        raise DocumentError(f"Document has more than {settings.DOCUMENT_MAX_PAGES} pages")
+                    # Seeking a TIFF reads the page's directory, not its strips
+                    image.seek(index)
+                    sizes.append(image.size)
+        except (UnidentifiedImageError, OSError, EOFError, Image.DecompressionBombError):
+            raise DocumentError("Unreadable image header")
+    if not sizes:
+        raise DocumentError("Document has no pages")
+    if any(width * height > max_pixels for width, height in sizes):
+        raise DocumentError(f"A page has more than {max_pixels} pixels")
+    return {"pages": len(sizes), "width": sizes[0][0], "height": sizes[0][1]}
+
+
+def open_page(data: bytes, mime: str, index: int) -> "Image.Image":
+    """Decode page ``index`` (0-based) of a TIFF or PDF, and nothing else.
+
+    PDF pages are rendered in grayscale straight at their OCR size.
+    """
+    if mime == "application/pdf":
+        pdf = _pdfium().PdfDocument(data)
+        try:
+            page = pdf[index]
+            scale = _pdf_scale(*page.get_size())
+            return page.render(scale=scale, grayscale=True).to_pil()
+        finally:
+            pdf.close()
+    from PIL import Image
+
+    image = Image.open(BytesIO(data))
+    image.seek(index)
+    image.load()
+    return image
@@ -0,0 +1,117 @@
+import binascii
+from io import BytesIO
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from src.core.config import settings
+from src.services.documents import DOCUMENT_TYPES, DocumentError, inspect_document
+
+# Leading bytes of the formats the OCR pipeline accepts.
+IMAGE_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": "image/png",
+    b"\xff\xd8\xff": "image/jpeg",
+    b"II*\x00": "image/tiff",
+    b"MM\x00*": "image/tiff",
+    b"%PDF-": "application/pdf",
+}
+
+
+class ImageRejected(Exception):
+    """Raised when an upload is too large, not a supported image, or too many pixels."""
+
+    def __init__(self, reason: str, too_large: bool = False):
+        super().__init__(reason)
+        self.reason = reason
+        self.too_large = too_large
+
+
+def sniff_image_type(data: bytes) -> Optional[str]:
+    """Return the MIME type implied by ``data``'s magic bytes, or None."""
+    for signature, mime in IMAGE_SIGNATURES.items():
+        if data[:len(signature)] == signature:
+            return mime
+    return None
+
+
+def inspect_image(data: bytes, max_pixels: Optional[int] = None) -> Dict[str, Any]:
+    """Check magic bytes and header dimensions without decoding pixel data.
+
+    ``Image.open`` only parses the header; the pixels are decoded later by the
+    OCR worker. Returns ``{"mime", "width", "height"}``, plus ``pages`` for
+    TIFF and PDF documents (every page is checked against ``max_pixels``).
+    """
+    mime = sniff_image_type(data)
+    if mime is None:
+        raise ImageRejected("Unsupported image type")
+    max_pixels = settings.IMAGE_MAX_PIXELS if max_pixels is None else max_pixels
+    if mime in DOCUMENT_TYPES:
+        try:
+            return {"mime": mime, **inspect_document(data, mime, max_pixels)}
+        except DocumentError as e:
+            raise ImageRejected(str(e))
+    from PIL import Image, UnidentifiedImageError  # only image requests need Pillow
+
+    try:
+        with Image.open(BytesIO(data)) as image:
+            width, height = image.size
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise ImageRejected("Unreadable image header")
+    if width * height > max_pixels:
+        raise ImageRejected(f"Image has more than {max_pixels} pixels")
+    return {"mime": mime, "width": width, "height": height}
+
+
+async def read_capped(chunks: AsyncIterator[bytes], limit: Optional[int] = None) -> bytes:
+    """Join ``chunks`` into bytes, raising ``ImageRejected`` once ``limit`` is passed.
+
+    Reading stops at the first chunk that crosses the limit, so an oversized
+    upload is never held in memory in full.
+    """
+    limit = settings.IMAGE_MAX_BYTES if limit is None else limit
+    parts: List[bytes] = []
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > limit:
+            raise ImageRejected(f"Image exceeds {limit} bytes", too_large=True)
+        parts.append(chunk)
+    return b"".join(parts)
+
+
+async def read_upload(upload, limit: Optional[int] = None, chunk_size: Optional[int] = None) -> bytes:
+    """Read a Starlette ``UploadFile`` in chunks with ``read_capped``.
+
+    By now the multipart parser has spooled the whole file, so this only keeps
+    the in-memory copy bounded; what the server accepts is bounded earlier, by
+    ``src.api.body_limit.MultipartBodyLimit``.
+    """
+    limit = settings.IMAGE_MAX_BYTES if limit is None else limit
+    chunk_size = chunk_size or settings.IMAGE_READ_CHUNK
+    # The multipart parser already knows the size of spooled files
+    if getattr(upload, "size", None) is not None and upload.size > limit:
+        raise ImageRejected(f"Image exceeds {limit} bytes", too_large=True)
+
+    async def chunks():
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    return await read_capped(chunks(), limit)
+
+
+def decode_base64_capped(data: Any, limit: Optional[int] = None) -> bytes:
+    """Decode base64 image data, rejecting it by its length before decoding."""
+    limit = settings.IMAGE_MAX_BYTES if limit is None else limit
+    if not isinstance(data, (str, bytes)):
+        raise ImageRejected("image_base64 must be a string")
+    # Every 4 base64 characters carry 3 bytes
+    if (len(data) // 4) * 3 - 2 > limit:
+        raise ImageRejected(f"Image exceeds {limit} bytes", too_large=True)
+    try:
+        if isinstance(data, str):
+            # Rebind so the str can be freed before the decoded copy is made
+            data = data.encode("ascii")
+        return binascii.a2b_base64(data)
+    except (binascii.Error, ValueError):
+        raise ImageRejected("Invalid base64 data")
@@ -0,0 +1,225 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+from src.core.config import settings
+
+# Job lifecycle: queued -> running -> completed | failed. A pipeline that ends in a
+# 4xx (e.g. needs_clarification) still completes; "failed" means the run crashed.
+QUEUED, RUNNING, COMPLETED, FAILED = "queued", "running", "completed", "failed"
+FINISHED = (COMPLETED, FAILED)
+
+
+class JobStoreFull(Exception):
+    """Too many jobs are waiting or running to accept another."""
+
+
+@dataclass
+class Job:
+    id: str
+    input_kind: str
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # HTTP status and body the synchronous endpoint would have returned
+    status_code: Optional[int] = None
+    result: Optional[Dict[str, Any]] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def to_dict(self) -> Dict[str, Any]:
+        body: Dict[str, Any] = {
+            "job_id": self.id,
+            "status": self.status,
+            "input": self.input_kind,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.finished:
+            body["status_code"] = self.status_code
+            body["result"] = self.result
+        return body
+
+
+class JobStore:
+    """Where background jobs and their results live.
+
+    ``create`` registers a queued job (raising ``JobStoreFull`` when too many
+    are pending), ``start`` and ``finish`` move it along, ``get`` returns it
+    until its result expires, and ``wait`` blocks until it finishes or the
+    timeout passes. Stores are created once per process through ``get_job_store``.
+    """
+
+    name = "base"
+
+    def create(self, input_kind: str) -> Job:
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[Job]:
+        raise NotImplementedError
+
+    def start(self, job_id: str) -> None:
+        raise NotImplementedError
+
+    def finish(self, job_id: str, status_code: int, result: Dict[str, Any], failed: bool = False) -> None:
+        raise NotImplementedError
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+
+class MemoryJobStore(JobStore):
+    """In-process job store, the local stand-in for a shared one.
+
+    Holds at most ``max_entries`` jobs and ``max_pending`` unfinished ones.
+    Finished jobs are dropped ``ttl`` seconds after they finish, or oldest first
+    when room is needed; unfinished jobs are never dropped, new ones are refused
+    instead. Jobs live in the worker process that accepted them, so with several
+    uvicorn workers the poller has to reach the same worker (or use a shared store).
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: Optional[int] = None, max_pending: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_entries = settings.JOBS_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_pending = settings.JOBS_MAX_PENDING if max_pending is None else max_pending
+        self.ttl = settings.JOBS_RESULT_TTL if ttl is None else ttl
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        # Finished job ids in the order they finished, which is also expiry order
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+        self._done_events: Dict[str, asyncio.Event] = {}
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.created = 0
+        self.rejected = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def _expired(self, job: Job, now: float) -> bool:
+        return bool(self.ttl) and job.finished and job.finished_at + self.ttl <= now
+
+    def _drop(self, job_id: str) -> None:
+        self._jobs.pop(job_id, None)
+        self._finished.pop(job_id, None)
+        self._done_events.pop(job_id, None)
+
+    def _make_room(self) -> None:
+        now = time.time()
+        while self._finished:
+            oldest = next(iter(self._finished))
+            if not self._expired(self._jobs[oldest], now):
+                break
+            self._drop(oldest)
+            self.expired += 1
+        while len(self._jobs) >= self.max_entries and self._finished:
+            self._drop(next(iter(self._finished)))
+            self.evicted += 1
+
+    def create(self, input_kind: str) -> Job:
+        with self._lock:
+            self._make_room()
+            if self._pending >= self.max_pending or len(self._jobs) >= self.max_entries:
+                self.rejected += 1
+                raise JobStoreFull("Too many jobs in progress")
+            job = Job(id=uuid4().hex, input_kind=input_kind)
+            self._jobs[job.id] = job
+            self._pending += 1
+            self.created += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and self._expired(job, time.time()):
+                self._drop(job_id)
+                self.expired += 1
+                return None
+            return job
+
+    def start(self, job_id: str) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == QUEUED:
+                job.status = RUNNING
+                job.started_at = time.time()
+                self._running += 1
+
+    def finish(self, job_id: str, status_code: int, result: Dict[str, Any], failed: bool = False) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return
+            if job.status == RUNNING:
+                self._running -= 1
+            job.status = FAILED if failed else COMPLETED
+            job.finished_at = time.time()
+            job.status_code = status_code
+            job.result = result
+            self._pending -= 1
+            self._finished[job_id] = None
+            event = self._done_events.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished or timeout <= 0:
+                event = None
+            else:
+                # Waiters and finish() run on the same event loop
+                event = self._done_events.setdefault(job_id, asyncio.Event())
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._jobs),
+                "max_entries": self.max_entries,
+                "queued": self._pending - self._running,
+                "running": self._running,
+                "finished": len(self._finished),
+                "created": self.created,
+                "rejected": self.rejected,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
+
+
+JOB_STORES = {
+    MemoryJobStore.name: MemoryJobStore,
+}
+
+_instances: Dict[str, JobStore] = {}
+_instances_lock = threading.Lock()
+
+
+def get_job_store(name: Optional[str] = None) -> JobStore:
+    """Return the process-wide instance of the named job store (default: ``JOB_STORE``)."""
+    name = (name or settings.JOB_STORE).lower()
+    if name not in JOB_STORES:
+        raise ValueError(f"Unknown job store: {name!r} (expected one of {sorted(JOB_STORES)})")
+    store = _instances.get(name)
+    if store is None:
+        with _instances_lock:
+            store = _instances.get(name)
+            if store is None:
+                store = _instances[name] = JOB_STORES[name]()
+    return store
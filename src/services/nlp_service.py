@@ -1,8 +1,14 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+import json
 import re
+from bisect import bisect_left
+from functools import lru_cache
 from datetime import datetime, date, timedelta
 from zoneinfo import ZoneInfo
 
+from src.core.config import settings
+from src.utils.fuzzy import DeletionIndex
+
 
 WEEKDAY_MAP = {
     'monday': 0,
@@ -30,6 +36,446 @@ DEPARTMENT_SYNONYMS = {
 }
 
 
+def load_department_synonyms(path: str) -> Dict[str, str]:
+    """Read a JSON object of ``{"synonym": "Canonical department"}`` from ``path``; synonyms are lower-cased."""
+    with open(path, encoding="utf-8") as f:
+        table = json.load(f)
+    if not isinstance(table, dict) or not all(isinstance(k, str) and isinstance(v, str) for k, v in table.items()):
+        raise ValueError(f"{path} must hold a JSON object mapping synonyms to department names")
+    return {synonym.lower(): canonical for synonym, canonical in table.items()}
+
+
+if settings.DEPARTMENT_SYNONYMS_PATH:
+    # Entries from the file come after the built-in ones (and replace them on the same key)
+    DEPARTMENT_SYNONYMS.update(load_department_synonyms(settings.DEPARTMENT_SYNONYMS_PATH))
+
+# Edit distance a misread department word may have, by the synonym's length:
+# shorter synonyms must match exactly ("dental" is one letter from "rental").
+_FUZZY_DISTANCE_BY_LENGTH = ((10, 2), (7, 1))
+# Department confidence lost per edit of a fuzzy match (see score_entities)
+_FUZZY_PENALTY = 0.15
+
+
+# Common OCR misreads, fixed as whole words (``@`` only between two words).
+OCR_NOISE_SUBS = {
+    "nxt": "next",
+    "tmr": "tomorrow",
+    "l0": "10",
+    "0r": "or",
+    "@": " at ",
+}
+
+_NOISE_RE = re.compile(r"\b(" + "|".join(re.escape(k) for k in OCR_NOISE_SUBS) + r")\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"\w+")
+# Where one appointment of a list ends (see TextScanner.extract_all)
+_SEPARATOR_RE = re.compile(r"[\n;,]")
+
+_WEEKDAYS = "monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+_MONTHS = "January|February|March|April|May|June|July|August|September|October|November|December"
+
+# Field patterns, exactly as the old per-field re.search calls used them.
+_NAME_RE = re.compile(r"with\s+([A-Z][A-Za-z .'-]+?)\s+(?:on|at|,|$)")
+_RELATIVE_DATE_RE = re.compile(rf"\b(next|this)\s+({_WEEKDAYS})\b", re.IGNORECASE)
+_DAY_WORD_RE = re.compile(r"\b(tomorrow|today)\b", re.IGNORECASE)
+_MONTH_DATE_RE = re.compile(rf"({_MONTHS})\s+\d{{1,2}}(?:st|nd|rd|th)?(?:\s*,?\s*\d{{4}})?", re.IGNORECASE)
+_TIME_MERIDIEM_RE = re.compile(r"(\d{1,2}(?::\d{2})?\s*(?:AM|PM|am|pm))")
+_TIME_AT_RE = re.compile(r"\bat\s+(\d{1,2}(?::\d{2})?)\b")
+_TIME_LOOSE_RE = re.compile(r"\b(\d{1,2}pm|\d{1,2}am)\b", re.IGNORECASE)
+
+_FIELD_PATTERNS = (
+    ("name", _NAME_RE),
+    ("relative_date", _RELATIVE_DATE_RE),
+    ("day_word", _DAY_WORD_RE),
+    ("month_date", _MONTH_DATE_RE),
+    ("time_meridiem", _TIME_MERIDIEM_RE),
+    ("time_at", _TIME_AT_RE),
+    ("time_meridiem_loose", _TIME_LOOSE_RE),
+)
+
+# What each field fills in an appointment candidate (see TextScanner.extract_all)
+_FIELD_SLOTS = {
+    "name": "name",
+    "relative_date": "date",
+    "day_word": "date",
+    "month_date": "date",
+    "time_meridiem": "time",
+    "time_at": "time",
+    "time_meridiem_loose": "time",
+    "department": "department",
+}
+
+_MONTH_NAMES = tuple(m.lower() for m in _MONTHS.split("|"))
+_MERIDIEM_ANCHORS = ("am", "pm", "AM", "PM")
+# Longest text a time can have before its am/pm: "12:30"
+_MAX_CLOCK_LEN = 5
+_DIGIT_RE = re.compile(r"\d")
+# Letters that IGNORECASE patterns match to ASCII but lower() leaves alone
+_FOLD_EXTRA = str.maketrans({"\u0131": "i", "\u017f": "s"})
+
+
+def _fold(text: str) -> str:
+    """Lower-cased ``text`` with the same offsets, for finding anchors of IGNORECASE patterns.
+
+    Characters that lower-case to more than one character are kept as they are.
+    """
+    low = text.lower()
+    if text.isascii():
+        return low
+    if len(low) != len(text):
+        low = "".join(ch if len(ch.lower()) != 1 else ch.lower() for ch in text)
+    return low.translate(_FOLD_EXTRA)
+
+_RELATIVE_MARKER_RE = re.compile(r"\b(next|this|tomorrow|today)\b", re.IGNORECASE)
+_MERIDIEM_RE = re.compile(r"[AaPp][Mm]")
+_AMBIGUOUS_DATE_RE = re.compile(r"next week|this weekend|next month", re.IGNORECASE)
+_AMBIGUOUS_TIME_RE = re.compile(r"morning|evening|afternoon|night", re.IGNORECASE)
+
+
+def _find_all(haystack: str, needle: str):
+    i = haystack.find(needle)
+    while i != -1:
+        yield i
+        i = haystack.find(needle, i + 1)
+
+
+def _first_match_at(pattern, text: str, positions):
+    """Return the first successful ``pattern.match`` at the given (sorted) positions."""
+    for pos in positions:
+        m = pattern.match(text, pos)
+        if m:
+            return m
+    return None
+
+
+def _alternation(words) -> str:
+    """Regex matching any of ``words``, factored by common prefix ("card(?:io|iology)").
+
+    A plain ``a|b|c`` alternation is tried word by word at every position; the
+    prefix tree lets the regex engine rule out most of a large table at the
+    first character.
+    """
+    tree: Dict[str, Any] = {}
+    for word in words:
+        node = tree
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def render(node: Dict[str, Any]) -> str:
+        branches = [re.escape(ch) + render(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            return f"(?:{body})?"
+        return body
+
+    return render(tree)
+
+
+def _fuzzy_allowance(term: str) -> int:
+    for min_length, distance in _FUZZY_DISTANCE_BY_LENGTH:
+        if len(term) >= min_length:
+            return distance
+    return 0
+
+
+class DepartmentMatcher:
+    """Finds the department named in lower-cased text, built once from the synonym table.
+
+    ``exact`` looks every word up in a dict (synonyms of several words or with
+    punctuation are searched for as phrases), so its cost does not grow with
+    the table. The first synonym in table order that is present wins.
+
+    ``fuzzy`` is for OCR misreads ("cardiolgy", "dermatol0gy"): each word is
+    looked up in a deletion index of the single-word synonyms and the closest
+    one within its allowed edit distance wins (ties by table order). Lookups
+    are cached per word, since OCR dumps repeat their words.
+    """
+
+    def __init__(self, synonyms: Dict[str, str], max_distance: int = 2):
+        self._canonical = []
+        self._by_token: Dict[str, str] = {}
+        self._word_rank: Dict[str, int] = {}
+        self._phrases = []
+        self._index: DeletionIndex[int] = DeletionIndex(max_distance)
+        for token, canonical in synonyms.items():
+            token = token.lower()
+            rank = len(self._canonical)
+            self._canonical.append(canonical)
+            self._by_token.setdefault(token, canonical)
+            if _WORD_RE.fullmatch(token):
+                self._word_rank.setdefault(token, rank)
+                if _fuzzy_allowance(token):
+                    self._index.add(token, rank, _fuzzy_allowance(token))
+            else:
+                self._phrases.append((rank, token, re.compile(rf"\b{re.escape(token)}\b")))
+        fuzzy_lengths = [len(token) for token in self._word_rank if _fuzzy_allowance(token)]
+        self._min_fuzzy_len = min(fuzzy_lengths, default=0) - max_distance
+        self._lookup = lru_cache(maxsize=8192)(self._index.lookup)
+
+    def canonical(self, token: str) -> Optional[str]:
+        """Canonical department for a synonym exactly as listed (any case), or None."""
+        return self._by_token.get(token.lower())
+
+    def exact(self, low: str) -> Optional[str]:
+        ranks = [self._word_rank[w] for w in _WORD_RE.findall(low) if w in self._word_rank]
+        ranks.extend(rank for rank, token, pattern in self._phrases if token in low and pattern.search(low))
+        return self._canonical[min(ranks)] if ranks else None
+
+    def closest(self, word: str) -> Optional[Tuple[str, int]]:
+        """``(canonical, distance)`` for the single-word synonym closest to ``word``, or None."""
+        found = self._lookup(word) if self._index.max_distance else None
+        return (self._canonical[found[1]], found[2]) if found is not None else None
+
+    def fuzzy(self, low: str) -> Optional[Tuple[str, int]]:
+        """``(canonical, distance)`` for the closest misspelt synonym in ``low``, or None."""
+        if not self._index.max_distance or not len(self._index):
+            return None
+        best = None  # (distance, rank)
+        for word in set(_WORD_RE.findall(low)):
+            if len(word) < self._min_fuzzy_len or word.isdigit():
+                continue
+            found = self._lookup(word)
+            if found is not None and (best is None or (found[2], found[1]) < best):
+                best = (found[2], found[1])
+        return (self._canonical[best[1]], best[0]) if best is not None else None
+
+    def misreads(self, text: str) -> Iterator[Tuple[int, int, str, int]]:
+        """``(start, end, canonical, distance)`` for every word of ``text`` that is a misspelt synonym."""
+        if not self._index.max_distance or not len(self._index):
+            return
+        for m in _WORD_RE.finditer(text):
+            word = m.group().lower()
+            if len(word) < self._min_fuzzy_len or word.isdigit() or word in self._word_rank:
+                continue
+            found = self.closest(word)
+            if found is not None:
+                yield m.start(), m.end(), found[0], found[1]
+
+    def find(self, low: str) -> Tuple[Optional[str], int]:
+        """``(canonical, distance)``: an exact synonym (distance 0), else the closest fuzzy one."""
+        canonical = self.exact(low)
+        if canonical is not None:
+            return canonical, 0
+        return self.fuzzy(low) or (None, 0)
+
+
+class TextScanner:
+    """Entity extraction compiled once from the field patterns and synonym table.
+
+    ``extract`` gives the same entities as the old one-``re.search``-per-field
+    code and still searches field by field, but does not run every pattern over
+    the whole text: a C-level substring search finds each field's literal
+    anchors ("next", "with", month names, am/pm) in an offset-preserving
+    lower-cased copy (``_fold``), and the precompiled pattern is only tried at
+    those positions. Departments come from a ``DepartmentMatcher``.
+
+    ``events`` is a single regex pass that yields ``(field, start, match)`` for
+    every position where any field pattern matches, in text order. Each pattern
+    sits in its own zero-width lookahead so one match never hides another
+    (e.g. "at 3" must not swallow the "3 PM" that the am/pm pattern wants).
+    ``extract_all`` needs every mention, not the first of each field, so it
+    uses this pass; for ``extract`` it is several times slower than the anchors.
+    """
+
+    def __init__(self, synonyms: Dict[str, str]):
+        self.synonyms = dict(synonyms)
+        self.departments = DepartmentMatcher(self.synonyms, settings.DEPARTMENT_FUZZY_MAX_DISTANCE)
+
+        patterns = [(field, pattern.pattern, pattern.flags & re.IGNORECASE) for field, pattern in _FIELD_PATTERNS]
+        if self.synonyms:
+            tokens = _alternation({t.lower() for t in self.synonyms})
+            patterns.append(("department", rf"\b({tokens})\b", re.IGNORECASE))
+        self._event_regex = re.compile("|".join(
+            f"(?=(?P<_{field}>{'(?i:' + pattern + ')' if ignorecase else pattern}))"
+            for field, pattern, ignorecase in patterns
+        ))
+        self._event_fields = {f"_{field}": field for field, _, _ in patterns}
+        self._event_groups = {field: re.compile(pattern, re.IGNORECASE if ignorecase else 0) for field, pattern, ignorecase in patterns}
+
+    def events(self, text: str):
+        """Yield ``(field, start, match)`` for every field match, in text order.
+
+        ``match`` is the field's own pattern matched at ``start``, so its groups
+        are the same as the per-field pattern's.
+        """
+        fields = self._event_fields
+        groups = self._event_groups
+        for m in self._event_regex.finditer(text):
+            field = fields[m.lastgroup]
+            yield field, m.start(), groups[field].match(text, m.start())
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        """The first mention of each field in ``text``, one anchor search per field (not an ``events`` pass)."""
+        entities: Dict[str, Any] = {
+            "name": None,
+            "date_phrase": None,
+            "time_phrase": None,
+            "department": None,
+        }
+        low = _fold(text)
+
+        # Name: look for 'with NAME on' or 'with NAME,'
+        if "with" in text:
+            m = _first_match_at(_NAME_RE, text, _find_all(text, "with"))
+            if m:
+                entities["name"] = m.group(1).strip()
+
+        # Relative date phrases (next Friday, tomorrow, today, this Friday)
+        m = None
+        if "next" in low or "this" in low:
+            m = _first_match_at(_RELATIVE_DATE_RE, text, sorted([*_find_all(low, "next"), *_find_all(low, "this")]))
+        if m:
+            entities["date_phrase"] = f"{m.group(1).lower()} {m.group(2).lower()}"
+        elif "today" in low or "tomorrow" in low:
+            m = _first_match_at(_DAY_WORD_RE, text, sorted([*_find_all(low, "today"), *_find_all(low, "tomorrow")]))
+            if m:
+                entities["date_phrase"] = m.group(1).lower()
+
+        # Date phrase: month name + day (with optional year)
+        if not entities["date_phrase"]:
+            positions = sorted(pos for month in _MONTH_NAMES if month in low for pos in _find_all(low, month))
+            m = _first_match_at(_MONTH_DATE_RE, text, positions)
+            if m:
+                entities["date_phrase"] = m.group(0)
+
+        # Time phrase: prefer explicit AM/PM patterns, then 'at 3', then '3Pm'-style
+        entities["time_phrase"] = self._extract_time(text, low)
+
+        # Department: first synonym (in table order) present as a whole word, else the closest misspelling
+        self._set_department(entities, low)
+        return entities
+
+    def _set_department(self, entities: Dict[str, Any], low: str) -> None:
+        department, distance = self.departments.find(low)
+        entities["department"] = department
+        if distance:
+            # Only fuzzy matches carry this; score_entities discounts them
+            entities["department_distance"] = distance
+
+    @staticmethod
+    def _extract_time(text: str, low: str) -> Optional[str]:
+        if not _DIGIT_RE.search(text):
+            return None
+
+        # An am/pm match ends at an "am"/"pm" anchor and starts at most
+        # _MAX_CLOCK_LEN characters before the whitespace preceding it, so the
+        # pattern only needs to run over that small window. Anchors are visited
+        # left to right, which keeps re.search's leftmost-match result.
+        anchors = sorted(pos for a in _MERIDIEM_ANCHORS if a in text for pos in _find_all(text, a))
+        for q in anchors:
+            j = q
+            while j > 0 and text[j - 1].isspace():
+                j -= 1
+            m = _TIME_MERIDIEM_RE.search(text, max(0, j - _MAX_CLOCK_LEN), q + 2)
+            if m:
+                return m.group(1)
+
+        if "at" in text:
+            m = _first_match_at(_TIME_AT_RE, text, _find_all(text, "at"))
+            if m:
+                return m.group(1)
+
+        anchors = sorted([*_find_all(low, "am"), *_find_all(low, "pm")])
+        for q in anchors:
+            # one extra character past the anchor so the trailing \b sees what follows
+            m = _TIME_LOOSE_RE.search(text, max(0, q - 2), q + 3)
+            if m:
+                return m.group(1)
+        return None
+
+    def extract_all(self, text: str) -> List[Tuple[int, int, Dict[str, Any]]]:
+        """Every appointment candidate in ``text`` as ``(start, end, entities)``, in text order.
+
+        One ``events`` pass (plus misspelt departments) gives every mention in
+        text order; a mention starts a new candidate when the current one already
+        has its kind of field (date, time, department or name) from an earlier,
+        non-overlapping mention. So "cardiology next monday 10am, dermatology
+        march 3rd 4:30pm" is two candidates. A candidate that already has a date
+        or time is also closed at a line break, ";" or ",": a field the patterns
+        missed is left missing (and the candidate flagged by the guardrails)
+        rather than taken from the next visit. Within a candidate the fields are
+        picked as ``extract`` picks them, except that the department is the first
+        one mentioned. Candidates with neither a date nor a time are dropped.
+        """
+        separators = [m.start() for m in _SEPARATOR_RE.finditer(text)]
+        mentions = [
+            (start, field, m.end(), (self.departments.canonical(m.group(1)), 0) if field == "department" else m)
+            for field, start, m in self.events(text)
+        ]
+        misreads = [(start, "department", end, (canonical, distance)) for start, end, canonical, distance in self.departments.misreads(text)]
+        if misreads:
+            # Stable: events at the same position keep their order
+            mentions = sorted(mentions + misreads, key=lambda mention: mention[0])
+
+        groups = []
+        for start, field, end, value in mentions:
+            slot = _FIELD_SLOTS[field]
+            if (
+                not groups
+                or start >= groups[-1]["ends"].get(slot, start + 1)
+                or (
+                    ("date" in groups[-1]["ends"] or "time" in groups[-1]["ends"])
+                    and bisect_left(separators, groups[-1]["end"]) < bisect_left(separators, start)
+                )
+            ):
+                groups.append({"start": start, "end": end, "ends": {}, "first": {}})
+            group = groups[-1]
+            group["ends"][slot] = max(group["ends"].get(slot, end), end)
+            group["end"] = max(group["end"], end)
+            group["first"].setdefault(field, value)
+
+        candidates = []
+        for group in groups:
+            entities = self._phrases(group["first"])
+            if "department" in group["first"]:
+                department, distance = group["first"]["department"]
+                entities["department"] = department
+                if distance:
+                    entities["department_distance"] = distance
+            if entities["date_phrase"] or entities["time_phrase"]:
+                candidates.append((group["start"], group["end"], entities))
+        return candidates
+
+    @staticmethod
+    def _phrases(first: Dict[str, Any]) -> Dict[str, Any]:
+        """Entities (department left unset) from the first match of each field."""
+        entities: Dict[str, Any] = {
+            "name": None,
+            "date_phrase": None,
+            "time_phrase": None,
+            "department": None,
+        }
+        if "name" in first:
+            entities["name"] = first["name"].group(1).strip()
+
+        if "relative_date" in first:
+            m = first["relative_date"]
+            entities["date_phrase"] = f"{m.group(1).lower()} {m.group(2).lower()}"
+        elif "day_word" in first:
+            entities["date_phrase"] = first["day_word"].group(1).lower()
+        elif "month_date" in first:
+            entities["date_phrase"] = first["month_date"].group(0)
+
+        for field in ("time_meridiem", "time_at", "time_meridiem_loose"):
+            if field in first:
+                entities["time_phrase"] = first[field].group(1)
+                break
+        return entities
+
+
+_SCANNER = TextScanner(DEPARTMENT_SYNONYMS)
+
+
+def normalize_ocr_lines(text: str) -> str:
+    """``normalize_ocr_noise`` line by line, keeping the (non-empty) line breaks."""
+    if not text:
+        return text
+    return "\n".join(line for line in map(normalize_ocr_noise, text.splitlines()) if line)
+
+
 def normalize_ocr_noise(text: str) -> str:
     """Apply lightweight OCR noise normalization and cleaning rules.
 
@@ -39,20 +485,19 @@ def normalize_ocr_noise(text: str) -> str:
     """
     if not text:
         return text
-    s = text.lower()
-    # common substitutions
-    subs = {
-        "nxt": "next",
-        "tmr": "tomorrow",
-        "l0": "10",
-        "0r": "or",
-        "@": " at ",
-    }
-    for k, v in subs.items():
-        s = re.sub(rf"\b{k}\b", v, s)
+    s = _NOISE_RE.sub(lambda m: OCR_NOISE_SUBS[m.group(1)], text.lower())
     # collapse whitespace
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    return _WHITESPACE_RE.sub(" ", s).strip()
+
+
+def canonical_department(name: str) -> Optional[str]:
+    """Canonical department for a synonym or canonical name (any case, small misspellings allowed), or None."""
+    low = name.strip().lower()
+    exact = _SCANNER.departments.canonical(low)
+    if exact is not None:
+        return exact
+    closest = _SCANNER.departments.closest(low)
+    return closest[0] if closest is not None else None
 
 
 def extract_entities(text: str) -> Dict[str, Any]:
@@ -60,54 +505,140 @@ def extract_entities(text: str) -> Dict[str, Any]:
 
     This is intentionally simple for tests/demo purposes.
     """
-    entities: Dict[str, Any] = {
-        "name": None,
-        "date_phrase": None,
-        "time_phrase": None,
-        "department": None,
-    }
+    return _SCANNER.extract(text)
 
-    # Name: look for 'with NAME on' or 'with NAME,'
-    m = re.search(r"with\s+([A-Z][A-Za-z .'-]+?)\s+(?:on|at|,|$)", text)
-    if m:
-        entities["name"] = m.group(1).strip()
-
-    # Relative date phrases (next Friday, tomorrow, today, this Friday)
-    m = re.search(r"\b(next|this)\s+(monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b", text, re.IGNORECASE)
-    if m:
-        entities["date_phrase"] = f"{m.group(1).lower()} {m.group(2).lower()}"
-    else:
-        m2 = re.search(r"\b(tomorrow|today)\b", text, re.IGNORECASE)
-        if m2:
-            entities["date_phrase"] = m2.group(1).lower()
-
-    # Date phrase: month name + day (with optional year)
-    if not entities["date_phrase"]:
-        m = re.search(r"(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2}(?:st|nd|rd|th)?(?:\s*,?\s*\d{4})?", text, re.IGNORECASE)
-        if m:
-            entities["date_phrase"] = m.group(0)
-
-    # Time phrase: prefer explicit AM/PM patterns
-    m = re.search(r"(\d{1,2}(?::\d{2})?\s*(?:AM|PM|am|pm))", text)
-    if m:
-        entities["time_phrase"] = m.group(1)
-    else:
-        # fallback: look for 'at 3' style or '3pm' without space
-        m = re.search(r"\bat\s+(\d{1,2}(?::\d{2})?)\b", text)
-        if m:
-            entities["time_phrase"] = m.group(1)
+
+def extract_appointments(text: str, ocr_confidence: float = 1.0, ref_date: Optional[date] = None) -> List[Dict[str, Any]]:
+    """Every appointment mentioned in ``text`` (cleaned by ``normalize_ocr_lines``), in text order.
+
+    The text is scanned once and its mentions grouped by position (see
+    ``TextScanner.extract_all``). Each candidate goes through the guardrails,
+    ``normalize_entities`` and ``score_entities`` on its own and comes back as
+    ``{"text", "span", "entities", "entities_confidence", "clarification",
+    "normalized", "normalization_confidence"}``; ``span`` is the candidate's
+    ``[start, end)`` in ``text``. A candidate the guardrails flag has its
+    ``clarification`` set and is not normalized.
+    """
+    appointments = []
+    for start, end, entities in _SCANNER.extract_all(text):
+        candidate: Dict[str, Any] = {
+            "text": text[start:end],
+            "span": [start, end],
+            "entities": entities,
+            "entities_confidence": score_entities(entities, ocr_confidence),
+            "clarification": None,
+            "normalized": None,
+            "normalization_confidence": None,
+        }
+        try:
+            handle_ambiguity(entities)
+        except ValueError as e:
+            candidate["clarification"] = str(e)
         else:
-            m2 = re.search(r"\b(\d{1,2}pm|\d{1,2}am)\b", text, re.IGNORECASE)
-            if m2:
-                entities["time_phrase"] = m2.group(1)
+            candidate["normalized"] = normalize_entities(entities, ref_date=ref_date)
+            candidate["normalization_confidence"] = score_normalization(entities, candidate["normalized"])
+        appointments.append(candidate)
+    return appointments
+
+
+def analyze_text(text: str, ocr_confidence: float = 1.0) -> Dict[str, Any]:
+    """Clean ``text``, extract entities and score them in one call.
+
+    Equivalent to ``normalize_ocr_noise`` -> ``extract_entities`` ->
+    ``score_entities``, using the precompiled scanner.
+    """
+    cleaned = normalize_ocr_noise(text)
+    entities = _SCANNER.extract(cleaned)
+    return {
+        "cleaned": cleaned,
+        "entities": entities,
+        "entities_confidence": score_entities(entities, ocr_confidence),
+    }
+
+
+try:
+    _KOLKATA: Optional[ZoneInfo] = ZoneInfo("Asia/Kolkata")
+except Exception:
+    # tzdata may not be installed in some environments (Windows CI); fall back to naive local time
+    _KOLKATA = None
+
+MONTH_MAP = {name.lower(): i for i, name in enumerate(_MONTHS.split("|"), start=1)}
+# Feb 29 is accepted here; whether it exists is checked against the year
+_DAYS_IN_MONTH = (31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+# "HH:MM" for every minute of the day, indexed by hour * 60 + minute
+_CLOCK_LABELS = tuple(f"{h:02d}:{m:02d}" for h in range(24) for m in range(60))
+
+_MONTH_DAY_RE = re.compile(r"([a-z]+)\s+(\d{1,2})(?:st|nd|rd|th)?(?:\s*,?\s*(\d{4}))?", re.IGNORECASE)
+_CLOCK_RE = re.compile(r"(\d{1,2})(?::(\d{2}))?\s*([AaPp][Mm])?")
+
+
+def reference_date() -> date:
+    """Today's date in Asia/Kolkata, the reference for relative phrases like "tomorrow"."""
+    return datetime.now(_KOLKATA).date()
+
+
+@lru_cache(maxsize=16)
+def _relative_table(ref_date: date) -> Dict[str, date]:
+    """Every phrase ``resolve_relative_date`` understands, resolved against ``ref_date``.
+
+    Keyed by date, so a new table is built when the reference date rolls over.
+    """
+    table = {"today": ref_date, "tomorrow": ref_date + timedelta(days=1)}
+    current = ref_date.weekday()
+    for weekday, target in WEEKDAY_MAP.items():
+        days_ahead = (target - current) % 7
+        table[f"this {weekday}"] = ref_date + timedelta(days=days_ahead)
+        table[f"next {weekday}"] = ref_date + timedelta(days=days_ahead or 7)
+    return table
+
 
-    # Department: look for synonyms
-    for token, canonical in DEPARTMENT_SYNONYMS.items():
-        if re.search(rf"\b{re.escape(token)}\b", text, re.IGNORECASE):
-            entities["department"] = canonical
-            break
+def _parse_month_day(phrase: str, ref_date: date) -> Optional[date]:
+    """Parse "March 10th", "march 3 2024" or "March 10, 2024".
 
-    return entities
+    Without a year, the next occurrence on or after ``ref_date`` is used.
+    """
+    m = _MONTH_DAY_RE.fullmatch(phrase.strip())
+    if not m:
+        return None
+    month = MONTH_MAP.get(m.group(1).lower())
+    day = int(m.group(2))
+    if month is None or not 1 <= day <= _DAYS_IN_MONTH[month - 1]:
+        return None
+
+    if m.group(3):
+        try:
+            return date(int(m.group(3)), month, day)
+        except ValueError:
+            return None
+
+    # Feb 29 can be up to eight years away (2096 -> 2104)
+    for year in range(ref_date.year, ref_date.year + 9):
+        try:
+            candidate = date(year, month, day)
+        except ValueError:
+            continue
+        if candidate >= ref_date:
+            return candidate
+    return None
+
+
+def _parse_clock(phrase: str) -> Optional[str]:
+    """Parse "3pm", "3:30 PM" or "15:00" into "HH:MM" (24h); None if out of range."""
+    m = _CLOCK_RE.match(phrase.strip())
+    if not m:
+        return None
+    hour = int(m.group(1))
+    minute = int(m.group(2)) if m.group(2) else 0
+    ampm = m.group(3)
+    if minute > 59:
+        return None
+    if ampm:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if ampm[0] in "Pp" else 0)
+    elif hour > 23:
+        return None
+    return _CLOCK_LABELS[hour * 60 + minute]
 
 
 def resolve_relative_date(phrase: str, ref_date: Optional[date] = None) -> Optional[date]:
@@ -115,81 +646,40 @@ def resolve_relative_date(phrase: str, ref_date: Optional[date] = None) -> Optio
 
     If ref_date is None, uses today's date in Asia/Kolkata.
     """
-    if ref_date is None:
-        try:
-            tz = ZoneInfo("Asia/Kolkata")
-            now = datetime.now(tz)
-        except Exception:
-            # tzdata may not be installed in some environments (Windows CI); fall back to naive local time
-            now = datetime.now()
-        ref_date = now.date()
-
     phrase = (phrase or "").strip().lower()
     if not phrase:
         return None
 
-    if phrase == "today":
-        return ref_date
-    if phrase == "tomorrow":
-        return ref_date + timedelta(days=1)
-
-    m = re.match(r"(next|this)\s+(monday|tuesday|wednesday|thursday|friday|saturday|sunday)", phrase)
-    if m:
-        modifier = m.group(1)
-        weekday = m.group(2)
-        target = WEEKDAY_MAP[weekday]
-        current = ref_date.weekday()
-        if modifier == "next":
-            days_ahead = (target - current + 7) % 7
-            if days_ahead == 0:
-                days_ahead = 7
-        else:  # this
-            days_ahead = (target - current) % 7
-        return ref_date + timedelta(days=days_ahead)
-
-    return None
+    table = _relative_table(ref_date or reference_date())
+    resolved = table.get(phrase)
+    if resolved is None:
+        # Longer phrases ("next  friday", "this friday 3pm") resolve by their leading words
+        parts = phrase.split(None, 1)
+        if len(parts) == 2 and parts[0] in ("next", "this"):
+            for weekday in WEEKDAY_MAP:
+                if parts[1].startswith(weekday):
+                    return table[f"{parts[0]} {weekday}"]
+    return resolved
 
 
 def normalize_entities(entities: Dict[str, Any], ref_date: Optional[date] = None) -> Dict[str, Any]:
     """Normalize date_phrase -> YYYY-MM-DD and time_phrase -> HH:MM (24h).
 
-    Uses Asia/Kolkata as the timezone. Accepts optional ref_date for deterministic tests.
+    Uses Asia/Kolkata as the timezone. Accepts optional ref_date for deterministic tests;
+    month/day phrases without a year resolve to their next occurrence on or after it.
     """
     normalized: Dict[str, Any] = {"date": None, "time": None, "tz": "Asia/Kolkata"}
 
     date_phrase = entities.get("date_phrase")
     if date_phrase:
-        # Handle relative phrases
-        rel = resolve_relative_date(date_phrase, ref_date)
-        if rel:
-            normalized["date"] = rel.strftime("%Y-%m-%d")
-        else:
-            # Remove ordinal suffixes
-            d = re.sub(r"(st|nd|rd|th)", "", date_phrase)
-            # Append year if missing (keep previous default behavior)
-            if not re.search(r"\d{4}", d):
-                d = f"{d}, 2023"
-            try:
-                dt = datetime.strptime(d.strip(), "%B %d, %Y")
-                normalized["date"] = dt.strftime("%Y-%m-%d")
-            except Exception:
-                normalized["date"] = None
+        ref_date = ref_date or reference_date()
+        resolved = resolve_relative_date(date_phrase, ref_date) or _parse_month_day(date_phrase, ref_date)
+        if resolved:
+            normalized["date"] = resolved.isoformat()
 
     time_phrase = entities.get("time_phrase")
     if time_phrase:
-        t = time_phrase.strip()
-        # Normalize am/pm
-        m = re.match(r"(\d{1,2})(?::(\d{2}))?\s*([AaPp][Mm])?", t)
-        if m:
-            hour = int(m.group(1))
-            minute = int(m.group(2)) if m.group(2) else 0
-            ampm = m.group(3)
-            if ampm:
-                if ampm.lower().startswith("p") and hour != 12:
-                    hour += 12
-                if ampm.lower().startswith("a") and hour == 12:
-                    hour = 0
-            normalized["time"] = f"{hour:02d}:{minute:02d}"
+        normalized["time"] = _parse_clock(time_phrase)
 
     # Department is expected to be already canonicalized by extract_entities
     return normalized
@@ -199,11 +689,11 @@ def handle_ambiguity(entities: Dict[str, Any]) -> None:
     """Raise ValueError on ambiguous or missing critical fields per guardrails."""
     # Ambiguous date phrases
     date_phrase = entities.get("date_phrase")
-    if not date_phrase or re.search(r"next week|this weekend|next month", str(date_phrase), re.IGNORECASE):
+    if not date_phrase or _AMBIGUOUS_DATE_RE.search(str(date_phrase)):
         raise ValueError("Ambiguous date provided.")
 
     time_phrase = entities.get("time_phrase")
-    if not time_phrase or re.search(r"morning|evening|afternoon|night", str(time_phrase), re.IGNORECASE):
+    if not time_phrase or _AMBIGUOUS_TIME_RE.search(str(time_phrase)):
         raise ValueError("Ambiguous time provided.")
 
     # Department is optional for pipeline success in existing tests
@@ -226,7 +716,7 @@ def score_entities(entities: Dict[str, Any], ocr_confidence: float = 1.0) -> flo
     # Date scoring
     date_score = 0.0
     if date_phrase:
-        if re.search(r"\b(next|this|tomorrow|today)\b", str(date_phrase), re.IGNORECASE):
+        if _RELATIVE_MARKER_RE.search(str(date_phrase)):
             date_score = 0.85
         else:
             date_score = 0.95
@@ -234,15 +724,15 @@ def score_entities(entities: Dict[str, Any], ocr_confidence: float = 1.0) -> flo
     # Time scoring
     time_score = 0.0
     if time_phrase:
-        if re.search(r"[AaPp][Mm]", str(time_phrase)):
+        if _MERIDIEM_RE.search(str(time_phrase)):
             time_score = 0.95
         else:
             time_score = 0.80
 
-    # Department scoring
+    # Department scoring; a fuzzy match loses a little per edit
     dept_score = 0.0
     if department:
-        dept_score = 0.90
+        dept_score = 0.90 - _FUZZY_PENALTY * entities.get("department_distance", 0)
 
     # Weighted average: date 45%, time 45%, dept 10%
     entities_conf = (0.45 * date_score) + (0.45 * time_score) + (0.10 * dept_score)
@@ -264,7 +754,7 @@ def score_normalization(entities: Dict[str, Any], normalized: Dict[str, Any]) ->
     if date_ok and time_ok:
         # If both normalized and date was explicit, bump confidence
         date_phrase = entities.get("date_phrase") or ""
-        if re.search(r"\b(next|this|tomorrow|today)\b", date_phrase, re.IGNORECASE):
+        if _RELATIVE_MARKER_RE.search(date_phrase):
             return 0.85
         return 0.95
 
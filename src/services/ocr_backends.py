@@ -0,0 +1,156 @@
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from src.core.config import settings
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+class OCRBackend:
+    """Interface every OCR engine implements.
+
+    ``recognize`` runs a single OCR pass and returns ``{"raw_text", "confidence"}``
+    with confidence in 0..1. ``psm`` asks for a tesseract page segmentation mode
+    (engines without one ignore it); with ``lines=True`` the result also holds
+    ``lines``, a list of ``{"text", "box": [left, top, right, bottom]}``. Backends
+    are created once per process through ``get_backend`` so anything expensive
+    (models, handles) stays resident.
+    """
+
+    name = "base"
+
+    def recognize(self, image: "Image.Image", psm: Optional[int] = None, lines: bool = False) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def warm_up(self) -> None:
+        """Load models ahead of the first request. Optional."""
+
+
+class TesseractBackend(OCRBackend):
+    """pytesseract backend that gets text and word confidences from one tesseract run.
+
+    Every call still starts a ``tesseract`` subprocess; text is rebuilt from
+    ``image_to_data`` instead of running ``image_to_string`` a second time.
+    """
+
+    name = "tesseract"
+
+    def __init__(self, lang: Optional[str] = None, config: str = ""):
+        self.lang = lang or settings.OCR_LANG
+        self.config = config
+
+    def warm_up(self) -> None:
+        import pytesseract
+
+        # Fails early when the tesseract binary is missing, and pages it in
+        pytesseract.get_tesseract_version()
+
+    def recognize(self, image: "Image.Image", psm: Optional[int] = None, lines: bool = False) -> Dict[str, Any]:
+        import pytesseract  # deferred so the text path starts without it
+
+        config = f"{self.config} --psm {psm}".strip() if psm is not None else self.config
+        data = pytesseract.image_to_data(image, lang=self.lang, config=config, output_type=pytesseract.Output.DICT)
+        words: Dict[Tuple[int, int, int], List[str]] = {}
+        boxes: Dict[Tuple[int, int, int], List[int]] = {}
+        confs: List[float] = []
+        keys = zip(data.get("block_num", []), data.get("par_num", []), data.get("line_num", []))
+        for i, (key, t, c) in enumerate(zip(keys, data.get("text", []), data.get("conf", []))):
+            if not t or not t.strip():
+                continue
+            words.setdefault(key, []).append(t)
+            if lines:
+                left, top = data["left"][i], data["top"][i]
+                right, bottom = left + data["width"][i], top + data["height"][i]
+                box = boxes.setdefault(key, [left, top, right, bottom])
+                box[:] = [min(box[0], left), min(box[1], top), max(box[2], right), max(box[3], bottom)]
+            try:
+                conf = float(c)
+            except (TypeError, ValueError):
+                continue
+            if conf >= 0:
+                confs.append(conf)
+        raw_text = "\n".join(" ".join(line) for line in words.values())
+        confidence = (sum(confs) / len(confs) / 100.0) if confs else 0.0
+        result = {"raw_text": raw_text, "confidence": round(confidence, 2)}
+        if lines:
+            result["lines"] = [{"text": " ".join(line), "box": boxes[key]} for key, line in words.items()]
+        return result
+
+
+class EasyOCRBackend(OCRBackend):
+    """Resident EasyOCR backend: the detection/recognition models load once per process."""
+
+    name = "easyocr"
+
+    def __init__(self, langs: Optional[List[str]] = None, gpu: Optional[bool] = None):
+        self.langs = langs or [l.strip() for l in settings.OCR_EASYOCR_LANGS.split(",") if l.strip()]
+        self.gpu = settings.OCR_EASYOCR_GPU if gpu is None else gpu
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _load_reader(self):
+        import easyocr  # heavy (torch); only imported when this backend is selected
+
+        return easyocr.Reader(self.langs, gpu=self.gpu, verbose=False)
+
+    @property
+    def reader(self):
+        if self._reader is None:
+            with self._lock:
+                if self._reader is None:
+                    self._reader = self._load_reader()
+        return self._reader
+
+    def warm_up(self) -> None:
+        _ = self.reader
+
+    def recognize(self, image: "Image.Image", psm: Optional[int] = None, lines: bool = False) -> Dict[str, Any]:
+        import numpy as np
+
+        # EasyOCR finds text regions itself; psm does not apply
+        results = self.reader.readtext(np.asarray(image), detail=1, paragraph=False)
+        # Sort detections top-to-bottom, then left-to-right, using each box's top-left corner
+        results = sorted(results, key=lambda r: (round(r[0][0][1] / 10), r[0][0][0]))
+        results = [r for r in results if r[1] and r[1].strip()]
+        texts = [text for _, text, _ in results]
+        confs = [float(conf) for _, _, conf in results]
+        confidence = (sum(confs) / len(confs)) if confs else 0.0
+        result = {"raw_text": " ".join(texts), "confidence": round(confidence, 2)}
+        if lines:
+            result["lines"] = [
+                {
+                    "text": text,
+                    "box": [
+                        int(min(x for x, _ in corners)),
+                        int(min(y for _, y in corners)),
+                        int(max(x for x, _ in corners)),
+                        int(max(y for _, y in corners)),
+                    ],
+                }
+                for corners, text, _ in results
+            ]
+        return result
+
+
+BACKENDS = {
+    TesseractBackend.name: TesseractBackend,
+    EasyOCRBackend.name: EasyOCRBackend,
+}
+
+_instances: Dict[str, OCRBackend] = {}
+_instances_lock = threading.Lock()
+
+
+def get_backend(name: Optional[str] = None) -> OCRBackend:
+    """Return the process-wide instance of the named backend (default: ``OCR_BACKEND``)."""
+    name = (name or settings.OCR_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown OCR backend: {name!r} (expected one of {sorted(BACKENDS)})")
+    backend = _instances.get(name)
+    if backend is None:
+        with _instances_lock:
+            backend = _instances.get(name)
+            if backend is None:
+                backend = _instances[name] = BACKENDS[name]()
+    return backend
@@ -0,0 +1,201 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from src.core.config import settings
+from src.utils.cache import LRUCache
+
+# Bump when the shape of cached OCR results changes so stale rows are ignored.
+CACHE_VERSION = 2
+
+# Settings that change what OCR returns for the same image; they are part of the key.
+OCR_SETTINGS_KEYS = (
+    "OCR_BACKEND",
+    "OCR_LANG",
+    "OCR_EASYOCR_LANGS",
+    "OCR_PREPROCESS",
+    "OCR_TARGET_LINE_HEIGHT",
+    "OCR_MAX_SIDE",
+    "OCR_CASCADE",
+    "OCR_CASCADE_MIN_CONFIDENCE",
+    "OCR_CASCADE_FAST_MAX_SIDE",
+    "OCR_CASCADE_FAST_LINE_HEIGHT",
+    "OCR_TILE_WORKERS",
+    "OCR_TILE_MIN_PIXELS",
+    "DOCUMENT_PDF_DPI",
+)
+
+
+def ocr_settings_fingerprint() -> str:
+    return json.dumps([CACHE_VERSION] + [getattr(settings, k) for k in OCR_SETTINGS_KEYS])
+
+
+def cache_key(image_bytes: bytes, fingerprint: Optional[str] = None, page: Optional[int] = None, multiple: bool = False) -> str:
+    """Content address for an OCR result: sha256 of the OCR settings + image bytes (+ page of a document).
+
+    ``multiple`` results are kept apart: their cascade may stop at another tier.
+    """
+    h = hashlib.sha256()
+    h.update((fingerprint if fingerprint is not None else ocr_settings_fingerprint()).encode("utf-8"))
+    if multiple:
+        h.update(b"\0multiple")
+    h.update(b"\0" if page is None else f"\0page={page}\0".encode("ascii"))
+    h.update(image_bytes)
+    return h.hexdigest()
+
+
+class SQLiteOCRStore:
+    """On-disk cache tier shared by every worker on the host.
+
+    SQLite in WAL mode lets several uvicorn workers read concurrently while one
+    writes, and rows survive restarts. Every ``prune_every`` rows this process
+    adds (default 1% of ``max_entries``), the table is trimmed back to
+    ``max_entries``, least recently used first; in between it may run over by
+    up to that many rows per worker.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000, ttl: Optional[float] = None, prune_every: Optional[int] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.prune_every = max(1, max_entries // 100) if prune_every is None else prune_every
+        self.evictions = 0
+        self._inserts = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, so reconnect in child processes.
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache ("
+                " key TEXT PRIMARY KEY, result TEXT NOT NULL,"
+                " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ocr_cache_accessed ON ocr_cache (accessed_at)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT result, created_at FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl and row[1] + self.ttl <= now:
+                conn.execute("DELETE FROM ocr_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE ocr_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO ocr_cache (key, result, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(result), now, now),
+            )
+            self._inserts += 1
+            if self._inserts < self.prune_every:
+                return
+            self._inserts = 0
+            (count,) = conn.execute("SELECT COUNT(*) FROM ocr_cache").fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM ocr_cache WHERE key IN"
+                    " (SELECT key FROM ocr_cache ORDER BY accessed_at LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class OCRCache:
+    """Two-tier OCR result cache: in-memory LRU in front of a shared SQLite file.
+
+    Memory hits cost a dict lookup; disk hits are promoted into memory. Disk
+    access runs in a thread so the event loop never waits on SQLite.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+        path: Optional[str] = None,
+        disk_max_entries: Optional[int] = None,
+        disk_ttl: Optional[float] = None,
+    ):
+        self.memory = LRUCache(
+            maxsize=settings.OCR_CACHE_MAX_ENTRIES if max_entries is None else max_entries,
+            ttl=settings.OCR_CACHE_TTL if ttl is None else ttl,
+        )
+        path = settings.OCR_CACHE_PATH if path is None else path
+        self.disk: Optional[SQLiteOCRStore] = None
+        if path:
+            self.disk = SQLiteOCRStore(
+                path,
+                max_entries=settings.OCR_CACHE_DISK_MAX_ENTRIES if disk_max_entries is None else disk_max_entries,
+                ttl=settings.OCR_CACHE_DISK_TTL if disk_ttl is None else disk_ttl,
+            )
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "bypassed": 0}
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        result = self.memory.get(key)
+        if result is not None:
+            self._counters["memory_hits"] += 1
+            return dict(result)
+        if self.disk is not None:
+            result = await asyncio.to_thread(self.disk.get, key)
+            if result is not None:
+                self._counters["disk_hits"] += 1
+                self.memory.set(key, result)
+                return dict(result)
+        self._counters["misses"] += 1
+        return None
+
+    async def set(self, key: str, result: Dict[str, Any]) -> None:
+        self.memory.set(key, dict(result))
+        self._counters["stores"] += 1
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, result)
+
+    def record_bypass(self) -> None:
+        self._counters["bypassed"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+        lookups = hits + self._counters["misses"]
+        return {
+            **self._counters,
+            "hits": hits,
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            "memory": self.memory.stats(),
+            "disk_evictions": self.disk.evictions if self.disk is not None else 0,
+            "disk_enabled": self.disk is not None,
+        }
+
+    def clear(self) -> None:
+        self.memory.clear()
+
+
+ocr_cache = OCRCache()
@@ -0,0 +1,89 @@
+import re
+from statistics import median
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from src.services.nlp_service import analyze_text, extract_appointments, handle_ambiguity, normalize_ocr_lines
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Tiers that can be listed in OCR_CASCADE, from cheapest to most thorough:
+# - fast: single-block recognition of a reduced image
+# - full: the OCR_PREPROCESS image with the backend's own page segmentation
+# - sparse: the same image read as scattered text (labels, stamps, columns)
+# - crop: the lines of the best attempt so far that look like a date or time,
+#   cut out and enlarged
+CASCADE_TIERS = ("fast", "full", "sparse", "crop")
+
+# Tesseract page segmentation mode per tier (None: the backend's default, 3).
+# 6 treats the image as one block of text and skips page layout analysis.
+TIER_PSM: Dict[str, Optional[int]] = {"fast": 6, "full": None, "sparse": 11, "crop": 6}
+
+# Words and marks that make a line worth a closer look for the date or time.
+_DATE_TIME_HINT_RE = re.compile(
+    r"\d|\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec|mon|tue|wed|thu|fri|sat|sun|"
+    r"today|tomorrow|tmr|next|this|am|pm)",
+    re.IGNORECASE,
+)
+# Crops are enlarged so their text lines are about this tall, by at most _CROP_MAX_ZOOM.
+_CROP_LINE_HEIGHT = 64
+_CROP_MAX_ZOOM = 3.0
+# A crop covering more of the image than this would only repeat the pass it came from.
+_CROP_MAX_AREA = 0.5
+
+
+def parse_tiers(spec: str) -> Tuple[str, ...]:
+    """Parse a comma separated OCR_CASCADE value into tier names; empty means ``full``."""
+    tiers = tuple(t.strip().lower() for t in spec.split(",") if t.strip())
+    unknown = [t for t in tiers if t not in CASCADE_TIERS]
+    if unknown:
+        raise ValueError(f"Unknown OCR cascade tier(s) {unknown} (expected some of {list(CASCADE_TIERS)})")
+    if tiers and tiers[0] == "crop":
+        raise ValueError("The crop tier needs an earlier tier to crop from")
+    return tiers or ("full",)
+
+
+def assess(result: Dict[str, Any], multiple: bool = False) -> Tuple[bool, float]:
+    """``(passes_guardrails, entities_confidence)`` for an OCR result, as the pipeline would score it.
+
+    With ``multiple``, as a multi-appointment run would: it passes when at least
+    one appointment is found and all of them pass, and scores as the weakest.
+    A score of 0 means nothing appointment-like was read.
+    """
+    if multiple:
+        found = extract_appointments(normalize_ocr_lines(result.get("raw_text", "")), result.get("confidence", 1.0))
+        if not found:
+            return False, 0.0
+        return all(a["clarification"] is None for a in found), min(a["entities_confidence"] for a in found)
+    analysis = analyze_text(result.get("raw_text", ""), result.get("confidence", 1.0))
+    try:
+        handle_ambiguity(analysis["entities"])
+    except ValueError:
+        return False, analysis["entities_confidence"]
+    return True, analysis["entities_confidence"]
+
+
+def date_time_crop(image: "Image.Image", lines: Optional[List[Dict[str, Any]]]) -> Optional["Image.Image"]:
+    """Cut out and enlarge the lines of ``image`` that look like a date or time.
+
+    ``lines`` are the backend's line boxes for ``image``. Returns None when no
+    line qualifies or the region would cover most of the image anyway.
+    """
+    boxes = [line["box"] for line in lines or () if _DATE_TIME_HINT_RE.search(line["text"])]
+    if not boxes:
+        return None
+    line_height = median(bottom - top for _, top, _, bottom in boxes) or 1
+    pad = line_height // 2 + 1
+    left = max(0, min(b[0] for b in boxes) - pad)
+    top = max(0, min(b[1] for b in boxes) - pad)
+    right = min(image.width, max(b[2] for b in boxes) + pad)
+    bottom = min(image.height, max(b[3] for b in boxes) + pad)
+    if right <= left or bottom <= top or (right - left) * (bottom - top) > _CROP_MAX_AREA * image.width * image.height:
+        return None
+    crop = image.crop((left, top, right, bottom))
+    zoom = min(_CROP_MAX_ZOOM, _CROP_LINE_HEIGHT / line_height)
+    if zoom <= 1.05:
+        return crop
+    from PIL import Image
+
+    return crop.resize((round(crop.width * zoom), round(crop.height * zoom)), Image.Resampling.LANCZOS)
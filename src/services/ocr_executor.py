@@ -0,0 +1,299 @@
+import asyncio
+import contextvars
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from src.core.config import settings
+from src.utils.single_flight import SingleFlight
+
+if TYPE_CHECKING:
+    from src.services.ocr_service import OCRService
+
+
+class OCRQueueFull(Exception):
+    """Raised when the OCR queue is at capacity and a job cannot be accepted."""
+
+
+class OCRTimeout(Exception):
+    """Raised when an OCR job does not finish within the configured timeout."""
+
+
+class OCRClientDisconnected(Exception):
+    """Raised when the client went away while its OCR job was pending."""
+
+
+class OCRWorkerError(RuntimeError):
+    """Raised for a worker exception that cannot be sent back to the server as is."""
+
+
+# Weight of the newest job in the moving average of worker time per job.
+_SERVICE_TIME_ALPHA = 0.2
+
+# OCRServices of a worker process (or of the interpreter in thread mode), by ``multiple``.
+_worker_services: Dict[bool, "OCRService"] = {}
+
+
+# Worker-side step timings of the last job awaited by ``OCRExecutor.run`` in this task.
+_job_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("ocr_job_timings", default=None)
+
+
+def job_timings() -> Dict[str, float]:
+    """Step timings (ms) of the OCR job most recently awaited in the current task."""
+    return dict(_job_timings.get() or {})
+
+
+def _service(multiple: bool = False) -> "OCRService":
+    if multiple not in _worker_services:
+        # Imported here so NumPy, Pillow and the OCR engine load in OCR workers, not at server startup
+        from src.services.ocr_service import OCRService
+
+        # The backend is resident per process, so a second service shares it
+        _worker_services[multiple] = OCRService(multiple=multiple)
+    return _worker_services[multiple]
+
+
+def _ocr_job(
+    image_bytes: bytes, page: Optional[Tuple[str, int]] = None, multiple: bool = False
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """Run OCR for one image, or for one ``(mime, index)`` page of a document. Executed inside a pool worker.
+
+    ``multiple`` judges the cascade tiers as a multi-appointment run would.
+    Returns the OCR result and the worker's step timings.
+    """
+    from src.services.ocr_service import last_timings
+
+    service = _service(multiple)
+    last_timings()
+    if page is None:
+        result = service.extract_text_from_bytes(image_bytes)
+    else:
+        result = service.extract_text_from_page(image_bytes, *page)
+    return result, last_timings()
+
+
+def _warm_up_job() -> Dict[str, Any]:
+    """Load the OCR engine in this worker and read the built-in warm-up image. Executed inside a pool worker."""
+    return _service().warm_up()
+
+
+def _portable(job, *args):
+    """Run ``job`` in a process worker, re-raising its exception as ``OCRWorkerError`` if it cannot be pickled.
+
+    A process worker whose exception cannot be unpickled (e.g. pytesseract's
+    TesseractNotFoundError) breaks the whole pool, failing every later job.
+    """
+    try:
+        return job(*args)
+    except Exception as e:
+        try:
+            pickle.loads(pickle.dumps(e))
+        except Exception:
+            raise OCRWorkerError(f"{type(e).__name__}: {e}") from None
+        raise
+
+
+class OCRExecutor:
+    """Bounded pool that runs OCR jobs off the event loop.
+
+    At most ``workers`` jobs run at once and at most ``max_queue`` more may wait
+    for a worker; anything beyond that is rejected with ``OCRQueueFull`` so a
+    burst of images cannot grow memory without bound. Each job is awaited for at
+    most ``timeout`` seconds, and jobs whose client disconnects are cancelled
+    while still queued.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        timeout: Optional[float] = None,
+        kind: Optional[str] = None,
+    ):
+        self.kind = kind or settings.OCR_EXECUTOR
+        if self.kind not in ("process", "thread"):
+            raise ValueError(f"Unknown OCR executor kind: {self.kind!r}")
+        self.workers = workers or settings.OCR_WORKERS or os.cpu_count() or 1
+        self.max_queue = settings.OCR_MAX_QUEUE if max_queue is None else max_queue
+        self.timeout = settings.OCR_TASK_TIMEOUT if timeout is None else timeout
+        self.poll_interval = settings.OCR_DISCONNECT_POLL_INTERVAL
+        # Moving average of worker time per job (seconds), seeded until jobs have run
+        self.service_time = settings.OCR_SERVICE_TIME_ESTIMATE
+
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counters = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "timed_out": 0,
+            "cancelled": 0,
+        }
+        # "cold" until warm_up runs, then "warming", "ready" or "failed"
+        self.warm_state = "cold"
+        self.warm_up_ms: Optional[float] = None
+        self.warm_up_error: Optional[str] = None
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                # spawn keeps workers independent of the server's threads and matches Windows
+                ctx = multiprocessing.get_context("spawn")
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ocr")
+        return self._pool
+
+    def _submit(self, job, *args) -> Future:
+        # Thread workers hand exceptions back as they are; process workers must pickle them
+        if self.kind == "process":
+            return self._get_pool().submit(_portable, job, *args)
+        return self._get_pool().submit(job, *args)
+
+    def _on_done(self, future: Future) -> None:
+        # Runs on the pool's management thread; a job only leaves the pool here,
+        # even if the awaiting request has already given up on it.
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled():
+                self._counters["cancelled"] += 1
+            elif future.exception() is not None:
+                self._counters["failed"] += 1
+            else:
+                self._counters["completed"] += 1
+
+    def submit(self, image_bytes: bytes, page: Optional[Tuple[str, int]] = None, multiple: bool = False) -> Future:
+        """Queue an OCR job, raising ``OCRQueueFull`` when the pool is saturated.
+
+        ``page`` is ``(mime, index)`` to OCR a single page of a TIFF or PDF;
+        ``multiple`` is for multi-appointment runs (see ``_ocr_job``).
+        """
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self._counters["rejected"] += 1
+                raise OCRQueueFull("OCR queue is full")
+            self._in_flight += 1
+            self._counters["submitted"] += 1
+        try:
+            future = self._submit(_ocr_job, image_bytes, page, multiple)
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    async def run(
+        self, image_bytes: bytes, request=None, page: Optional[Tuple[str, int]] = None, multiple: bool = False
+    ) -> Dict[str, Any]:
+        """Submit an OCR job and await its result.
+
+        When ``request`` (a Starlette request) is given, the client connection is
+        polled while waiting and the job is cancelled if the client disconnects.
+        A job that is still queued is also cancelled when the awaiting task is.
+        The worker's step timings are then available from ``job_timings()``.
+        """
+        future = self.submit(image_bytes, page, multiple)
+        waiter = asyncio.wrap_future(future)
+        watcher = asyncio.ensure_future(self._watch_disconnect(request)) if request is not None else None
+        pending = {waiter} if watcher is None else {waiter, watcher}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.timeout, return_when=asyncio.FIRST_COMPLETED)
+            if waiter in done:
+                result, timings = waiter.result()
+                _job_timings.set(timings)
+                self._observe_service_time(sum(timings.values()) / 1000)
+                return result
+            future.cancel()
+            if watcher is not None and watcher in done:
+                raise OCRClientDisconnected("Client disconnected before OCR finished")
+            with self._lock:
+                self._counters["timed_out"] += 1
+            raise OCRTimeout(f"OCR did not finish within {self.timeout} seconds")
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            if not waiter.done():
+                # stop awaiting, and drop the pool job if no worker has picked it up yet
+                waiter.cancel()
+                future.cancel()
+
+    async def warm_up(self) -> bool:
+        """Load the OCR engine in every worker and read a small built-in image.
+
+        Process workers each load their own engine, so one job per worker is
+        submitted at once; threads share one. Warm-up jobs bypass the queue
+        limit and counters. Returns whether the workers are ready; the outcome
+        is also kept in ``warm_state`` for readiness checks.
+        """
+        self.warm_state = "warming"
+        t0 = time.perf_counter()
+        jobs = self.workers if self.kind == "process" else 1
+        try:
+            await asyncio.gather(*(asyncio.wrap_future(self._submit(_warm_up_job)) for _ in range(jobs)))
+        except Exception as e:
+            self.warm_state, self.warm_up_error = "failed", f"{type(e).__name__}: {e}"
+            return False
+        finally:
+            self.warm_up_ms = round((time.perf_counter() - t0) * 1000, 1)
+        self.warm_state, self.warm_up_error = "ready", None
+        return True
+
+    def _observe_service_time(self, seconds: float) -> None:
+        if seconds > 0:
+            self.service_time += _SERVICE_TIME_ALPHA * (seconds - self.service_time)
+
+    def estimated_wait(self, extra_jobs: int = 0) -> float:
+        """Seconds a job submitted now would wait for a worker.
+
+        ``extra_jobs`` are jobs known to be coming ahead of it (e.g. requests
+        waiting for admission). Uses the moving average of worker time per job.
+        """
+        with self._lock:
+            ahead = self._in_flight + extra_jobs
+        return max(0, ahead - self.workers + 1) * self.service_time / self.workers
+
+    async def _watch_disconnect(self, request) -> None:
+        while not await request.is_disconnected():
+            await asyncio.sleep(self.poll_interval)
+
+    async def raise_on_disconnect(self, request) -> None:
+        """Wait until ``request``'s client goes away, then raise ``OCRClientDisconnected``."""
+        await self._watch_disconnect(request)
+        raise OCRClientDisconnected("Client disconnected before OCR finished")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, worker utilisation and lifetime counters."""
+        with self._lock:
+            in_flight = self._in_flight
+            counters = dict(self._counters)
+        running = min(in_flight, self.workers)
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": in_flight,
+            "running": running,
+            "queued": in_flight - running,
+            "utilization": round(running / self.workers, 2),
+            "service_time_ms": round(self.service_time * 1000, 1),
+            "warm_state": self.warm_state,
+            "warm_up_ms": self.warm_up_ms,
+            **counters,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+
+ocr_executor = OCRExecutor()
+# Identical images being OCRed at the same time share one executor job
+ocr_flights = SingleFlight()
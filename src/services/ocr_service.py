@@ -1,40 +1,165 @@
-from typing import List, Dict
-import pytesseract
-from PIL import Image
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import numpy as np
-from io import BytesIO
+from PIL import Image, ImageDraw
+from src.core.config import settings
+from src.services.documents import open_page
+from src.services.ocr_backends import OCRBackend, get_backend
+from src.services.ocr_cascade import TIER_PSM, assess, date_time_crop, parse_tiers
+from src.services.preprocess import ImagePreprocessor, find_text_blocks
+
+# Text blocks are recognized as single uniform blocks unless a tier asks for another mode.
+_BLOCK_PSM = 6
+# Blocks per tile thread; more, smaller blocks only add engine start-ups.
+_BLOCKS_PER_TILE_WORKER = 2
+
+# Step timings (ms) of the last extract_text_from_bytes call on this thread.
+_step_timings = threading.local()
+
+# What the warm-up image says; any text the engine returns is accepted.
+_WARM_UP_TEXT = "Dentist 10 March 3 PM"
+
+
+def tile_worker_count(ocr_workers: Optional[int] = None) -> int:
+    """Tile threads per OCR worker: ``OCR_TILE_WORKERS``, or the cores left per worker.
+
+    ``ocr_workers`` is the number of OCR workers sharing the host (default
+    ``OCR_WORKERS``, one per core), so the workers' tile threads together stay
+    within the cores.
+    """
+    if settings.OCR_TILE_WORKERS:
+        return settings.OCR_TILE_WORKERS
+    cores = os.cpu_count() or 1
+    return max(1, cores // (ocr_workers or settings.OCR_WORKERS or cores))
+
+
+def _add_timings(total: Dict[str, float], part: Dict[str, float]) -> None:
+    # Tiers repeat steps; their times add up
+    for step, ms in part.items():
+        total[step] = round(total.get(step, 0.0) + ms, 3)
+
+
+def last_timings() -> Dict[str, float]:
+    """Return and clear the step timings recorded by this thread's last OCR call."""
+    timings = getattr(_step_timings, "value", None) or {}
+    _step_timings.value = {}
+    return timings
+
 
 class OCRService:
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        backend: Optional[OCRBackend] = None,
+        preprocessor: Optional[ImagePreprocessor] = None,
+        cascade: Optional[Iterable[str]] = None,
+        min_confidence: Optional[float] = None,
+        tile_workers: Optional[int] = None,
+        tile_min_pixels: Optional[int] = None,
+        multiple: bool = False,
+    ):
+        # Backends are resident per process; the default comes from settings.OCR_BACKEND
+        self.backend = backend or get_backend()
+        # Preprocessing steps come from settings.OCR_PREPROCESS
+        self.preprocessor = preprocessor or ImagePreprocessor()
+        # Cascade tiers come from settings.OCR_CASCADE
+        self.cascade = parse_tiers(settings.OCR_CASCADE if cascade is None else ",".join(cascade))
+        self.min_confidence = settings.OCR_CASCADE_MIN_CONFIDENCE if min_confidence is None else min_confidence
+        # Tier results are judged as multi-appointment runs would judge them
+        self.multiple = multiple
+        # The fast tier runs the same steps on a smaller image; it reuses the decode
+        self.fast_preprocessor = ImagePreprocessor(
+            steps=[step for step in self.preprocessor.steps if step != "draft"],
+            target_line_height=settings.OCR_CASCADE_FAST_LINE_HEIGHT,
+            max_side=settings.OCR_CASCADE_FAST_MAX_SIDE,
+        )
+        # Large images are split into text blocks recognized on this many threads
+        self.tile_workers = tile_worker_count() if tile_workers is None else tile_workers
+        self.tile_min_pixels = settings.OCR_TILE_MIN_PIXELS if tile_min_pixels is None else tile_min_pixels
+        self._tile_pool: Optional[ThreadPoolExecutor] = None
+        self._tile_pool_lock = threading.Lock()
 
     def extract_text(self, image: Image.Image) -> str:
-        """Extract text from an image using pytesseract."""
-        return pytesseract.image_to_string(image)
-
-    def extract_text_with_confidence(self, image: Image.Image) -> Dict[str, any]:
-        """Extract text and compute a simple confidence score using pytesseract's image_to_data."""
-        data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
-        texts = []
-        confs = []
-        for t, c in zip(data.get('text', []), data.get('conf', [])):
-            if t and t.strip():
-                texts.append(t)
-                try:
-                    confs.append(int(c))
-                except Exception:
-                    pass
-        raw_text = " ".join(texts)
-        confidence = (sum(confs) / len(confs) / 100.0) if confs else 0.0
-        return {"raw_text": raw_text, "confidence": round(confidence, 2)}
-
-    def normalize_noise(self, image: Image.Image) -> Image.Image:
-        """Normalize noise in the image for better OCR results."""
-        # Convert image to grayscale
-        gray_image = image.convert('L')
-        # Apply thresholding or other noise reduction techniques if necessary
-        # For simplicity, we will return the grayscale image
-        return gray_image
+        """Extract text from an image using the configured OCR backend."""
+        return self.backend.recognize(image)["raw_text"]
+
+    def extract_text_with_confidence(self, image: Image.Image, psm: Optional[int] = None, lines: bool = False) -> Dict[str, any]:
+        """Extract text and a 0..1 confidence score in a single OCR pass.
+
+        ``psm`` and ``lines`` are passed to the backend (see ``OCRBackend``).
+        """
+        return self.backend.recognize(image, psm=psm, lines=lines)
+
+    def normalize_noise(self, image: Image.Image, timings: Optional[Dict[str, float]] = None) -> Image.Image:
+        """Normalize noise in the image for better OCR results.
+
+        Runs the configured preprocessing chain (grayscale, downscale, contrast,
+        binarize, deskew); per-step times go into ``timings`` when given.
+        """
+        return self.preprocessor.process(image, timings)
+
+    def _tiles(self) -> ThreadPoolExecutor:
+        if self._tile_pool is None:
+            with self._tile_pool_lock:
+                if self._tile_pool is None:
+                    self._tile_pool = ThreadPoolExecutor(max_workers=self.tile_workers, thread_name_prefix="ocr-tile")
+        return self._tile_pool
+
+    def _recognize(self, image: Image.Image, psm: Optional[int], lines: bool, steps: Dict[str, float]) -> Dict[str, Any]:
+        """One recognition pass over ``image``, tiled into text blocks when it is large.
+
+        Tesseract runs as a subprocess, so blocks recognized on separate threads
+        use separate cores. Finding the blocks is timed as ``tile_layout``.
+        """
+        blocks: List[Tuple[int, int, int, int]] = []
+        if self.tile_workers > 1 and image.width * image.height >= self.tile_min_pixels:
+            t0 = time.perf_counter()
+            blocks = find_text_blocks(np.asarray(image), max_blocks=self.tile_workers * _BLOCKS_PER_TILE_WORKER)
+            steps["tile_layout"] = (time.perf_counter() - t0) * 1000
+        t1 = time.perf_counter()
+        if len(blocks) > 1:
+            result = self._recognize_blocks(image, blocks, psm, lines)
+        elif psm is None and not lines:
+            # Plain pass: no options
+            result = self.extract_text_with_confidence(image)
+        else:
+            result = self.extract_text_with_confidence(image, psm=psm, lines=lines)
+        steps[f"ocr_{self.backend.name}"] = (time.perf_counter() - t1) * 1000
+        return result
+
+    def _recognize_blocks(self, image: Image.Image, blocks, psm: Optional[int], lines: bool) -> Dict[str, Any]:
+        """Recognize each block as its own crop in parallel and join the text in block order.
+
+        Confidence is the word-weighted mean of the blocks' confidences, which
+        equals the per-word mean a single pass reports. Line boxes are moved back
+        into ``image`` coordinates.
+        """
+        block_psm = _BLOCK_PSM if psm is None else psm
+
+        def recognize(box):
+            return self.extract_text_with_confidence(image.crop(box), psm=block_psm, lines=lines)
+
+        texts: List[str] = []
+        line_boxes: List[Dict[str, Any]] = []
+        weighted, words = 0.0, 0
+        for (left, top, _, _), result in zip(blocks, self._tiles().map(recognize, blocks)):
+            text = result.get("raw_text", "").strip()
+            if not text:
+                continue
+            texts.append(text)
+            count = len(text.split())
+            weighted += result.get("confidence", 0.0) * count
+            words += count
+            for line in result.get("lines") or ():
+                l, t, r, b = line["box"]
+                line_boxes.append({"text": line["text"], "box": [l + left, t + top, r + left, b + top]})
+        merged: Dict[str, Any] = {"raw_text": "\n".join(texts), "confidence": round(weighted / words, 2) if words else 0.0, "tiles": len(blocks)}
+        if lines:
+            merged["lines"] = line_boxes
+        return merged
 
     def process_image(self, image_path: str) -> str:
         """Process the image to extract text."""
@@ -44,16 +169,91 @@ class OCRService:
         return extracted_text
 
     def extract_text_from_bytes(self, image_bytes: bytes) -> Dict[str, any]:
-        """Open image from bytes and return extracted text and confidence."""
-        image = Image.open(BytesIO(image_bytes)).convert("RGB")
-        normalized_image = self.normalize_noise(image)
-        # Try to get text with confidence
-        try:
-            result = self.extract_text_with_confidence(normalized_image)
-            if result["raw_text"].strip():
-                return result
-        except Exception:
-            pass
-        # Fallback to plain extraction
-        text = self.extract_text(normalized_image)
-        return {"raw_text": text, "confidence": 0.0}
\ No newline at end of file
+        """Open image from bytes and return extracted text, confidence and the cascade tier used.
+
+        Tiers from ``cascade`` run in order and the first whose text passes the
+        guardrails with an entity score of at least ``min_confidence`` answers.
+        When none does, the best attempt answers: guardrail-passing first, then
+        by score, later tiers winning ties. Nothing appointment-like read by the
+        end of the ``full`` tier ends the cascade there. ``tiers_tried`` lists
+        the tiers run.
+        Decode, preprocessing step, recognition and per-tier times (summed over
+        tiers) are kept for ``last_timings``.
+        """
+        t0 = time.perf_counter()
+        image = self.preprocessor.decode(image_bytes)
+        timings = {"image_decode": round((time.perf_counter() - t0) * 1000, 3)}
+        return self._run_cascade(image, timings)
+
+    def extract_text_from_page(self, document_bytes: bytes, mime: str, page: int) -> Dict[str, any]:
+        """Like ``extract_text_from_bytes`` for one page (0-based) of a TIFF or PDF.
+
+        Only that page is decoded; its decode time is reported as ``page_decode``.
+        """
+        t0 = time.perf_counter()
+        image = open_page(document_bytes, mime, page)
+        timings = {"page_decode": round((time.perf_counter() - t0) * 1000, 3)}
+        return self._run_cascade(image, timings)
+
+    def warm_up(self) -> Dict[str, Any]:
+        """Load the OCR engine and run a small built-in image through the whole pipeline.
+
+        Done once per worker at startup so the first request does not pay for
+        model loading, imports and cold caches. Errors are raised to the caller.
+        """
+        t0 = time.perf_counter()
+        self.backend.warm_up()
+        image = Image.new("L", (240, 40), 255)
+        ImageDraw.Draw(image).text((8, 12), _WARM_UP_TEXT, fill=0)
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        result = self.extract_text_from_bytes(buffer.getvalue())
+        return {"backend": self.backend.name, "text": result["raw_text"], "ms": round((time.perf_counter() - t0) * 1000, 1)}
+
+    def _run_cascade(self, image: Image.Image, timings: Dict[str, float]) -> Dict[str, any]:
+        single = len(self.cascade) == 1
+        full_image = None
+        best = None  # (passes, score, tier, result, image)
+        tried = []
+        for tier in self.cascade:
+            started = time.perf_counter()
+            steps: Dict[str, float] = {}
+            if tier == "fast":
+                tier_image = self.fast_preprocessor.process(image, steps)
+            elif tier == "crop":
+                tier_image = date_time_crop(best[4], best[3].get("lines")) if best is not None else None
+                if tier_image is None:
+                    continue
+            else:
+                if full_image is None:
+                    full_image = self.normalize_noise(image, steps)
+                tier_image = full_image
+            # A single tier never needs line boxes
+            result = self._recognize(tier_image, TIER_PSM[tier], not single and tier != "crop", steps)
+            if tier == "crop":
+                # The enlarged date/time lines go first so the extractor prefers them
+                result = {
+                    "raw_text": f"{result['raw_text']}\n{best[3]['raw_text']}",
+                    "confidence": result["confidence"],
+                    "lines": best[3].get("lines"),
+                }
+            _add_timings(timings, steps)
+            timings[f"ocr_tier_{tier}"] = round((time.perf_counter() - started) * 1000, 3)
+            tried.append(tier)
+
+            passes, score = (True, 1.0) if single else assess(result, self.multiple)
+            if best is None or (passes, score) >= best[:2]:
+                best = (passes, score, tier, result, tier_image)
+            if passes and score >= self.min_confidence:
+                break
+            if tier == "full" and best[1] == 0.0:
+                # A blank or unrelated image: more passes would not find an appointment
+                break
+
+        _step_timings.value = timings
+        _, _, tier, result, _ = best
+        answer: Dict[str, Any] = {k: v for k, v in result.items() if k != "lines"}
+        answer["tier"] = tier
+        if not single:
+            answer["tiers_tried"] = tried
+        return answer
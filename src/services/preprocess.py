@@ -0,0 +1,281 @@
+import time
+from io import BytesIO
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from src.core.config import settings
+
+# Steps that can be switched on through OCR_PREPROCESS, in the order they run.
+# Grayscale conversion is not optional: every backend is fed an "L" image.
+PREPROCESS_STEPS = ("draft", "downscale", "deskew", "contrast", "binarize")
+
+# Modes that convert straight to grayscale; anything else (e.g. CMYK JPEGs) goes through RGB first.
+_GRAYSCALE_READY_MODES = ("1", "L", "LA", "P", "RGB", "RGBA")
+
+# Deskew searches this many degrees either side of level, coarse then fine.
+_DESKEW_MAX_ANGLE = 10.0
+_DESKEW_COARSE_STEP = 1.0
+_DESKEW_FINE_STEP = 0.1
+# Layout analysis (skew, line height) looks at a strided view no larger than
+# this on its long side, and at most this many of its ink pixels; more only adds time.
+_LAYOUT_MAX_SIDE = 1000
+_LAYOUT_SAMPLE = 40_000
+# Rotations smaller than this are not worth resampling the image for.
+_DESKEW_MIN_ANGLE = 0.3
+# Text blocks: a row or column is blank when less than this share of it is ink.
+_BLOCK_BLANK_SHARE = 0.002
+# Bands further apart than this many lines never share a column section.
+_SECTION_MAX_GAP = 4
+
+
+def parse_steps(spec: str) -> Tuple[str, ...]:
+    """Parse a comma separated OCR_PREPROCESS value into known step names."""
+    steps = tuple(s.strip().lower() for s in spec.split(",") if s.strip())
+    unknown = [s for s in steps if s not in PREPROCESS_STEPS]
+    if unknown:
+        raise ValueError(f"Unknown preprocessing step(s) {unknown} (expected some of {list(PREPROCESS_STEPS)})")
+    return steps
+
+
+def ink_threshold(hist: np.ndarray) -> int:
+    """Gray level separating ink from paper in a 256-bin histogram.
+
+    Halfway between the paper level (the most common value) and the ink level
+    (the darkest 0.2% of pixels). Otsu's method is the usual choice, but when
+    ink covers ~1% of a card it splits the paper's own noise instead.
+    """
+    total = hist.sum()
+    if total == 0:
+        return 127
+    paper = int(np.argmax(hist))
+    ink = int(np.searchsorted(np.cumsum(hist), total * 0.002))
+    return (paper + ink) // 2
+
+
+def _histogram(arr: np.ndarray) -> np.ndarray:
+    return np.bincount(arr.ravel(), minlength=256)
+
+
+def _ink_points(arr: np.ndarray) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Coordinates of ink pixels in a strided view of ``arr``, and the stride."""
+    stride = max(1, -(-max(arr.shape) // _LAYOUT_MAX_SIDE))
+    view = arr[::stride, ::stride]
+    ys, xs = np.nonzero(view < ink_threshold(_histogram(view)))
+    if len(ys) > _LAYOUT_SAMPLE:
+        pick = np.random.default_rng(0).choice(len(ys), _LAYOUT_SAMPLE, replace=False)
+        ys, xs = ys[pick], xs[pick]
+    return ys.astype(np.float64), xs.astype(np.float64), stride
+
+
+def _profiles(ys: np.ndarray, xs: np.ndarray, angles: np.ndarray) -> np.ndarray:
+    """Row histograms of the ink points projected at each angle, shape ``(len(angles), rows)``.
+
+    All angles are counted in a single ``bincount`` by offsetting each angle's rows.
+    """
+    rad = np.deg2rad(angles)[:, None]
+    rows = np.rint(ys * np.cos(rad) + xs * np.sin(rad)).astype(np.int64)
+    rows -= rows.min()
+    span = int(rows.max()) + 1
+    counts = np.bincount((rows + np.arange(len(angles))[:, None] * span).ravel(), minlength=span * len(angles))
+    return counts.reshape(len(angles), span)
+
+
+def analyze_layout(arr: np.ndarray, max_angle: float = _DESKEW_MAX_ANGLE) -> Tuple[float, Optional[float]]:
+    """Skew (degrees, counter-clockwise positive) and text line height (pixels) of a grayscale array.
+
+    Ink pixels are projected onto the vertical axis at each candidate angle; at
+    the text's own angle every line collapses into a few rows and the sum of
+    squared row counts peaks. The runs of inked rows in that best profile are
+    the text lines, and their median length is the line height. Line height is
+    None when fewer than two lines are found (photos, blank scans).
+    """
+    ys, xs, stride = _ink_points(arr)
+    if len(ys) < 50:
+        return 0.0, None
+
+    def best(angles: np.ndarray) -> Tuple[float, np.ndarray]:
+        profiles = _profiles(ys, xs, angles)
+        i = int(np.argmax((profiles.astype(np.float64) ** 2).sum(axis=1)))
+        return float(angles[i]), profiles[i]
+
+    coarse, _ = best(np.arange(-max_angle, max_angle + 1e-9, _DESKEW_COARSE_STEP))
+    angle, profile = best(np.arange(coarse - _DESKEW_COARSE_STEP, coarse + _DESKEW_COARSE_STEP + 1e-9, _DESKEW_FINE_STEP))
+
+    inked = profile > profile.max() * 0.05
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], inked, [False])).astype(np.int8)))
+    runs = edges[1::2] - edges[::2]
+    # Dots, dashes and stray descenders leave short runs of their own
+    runs = runs[runs >= max(runs.max() * 0.35, 3 / stride)] if len(runs) else runs
+    line_height = float(np.median(runs)) * stride if len(runs) >= 2 else None
+    return angle, line_height
+
+
+def _ink_runs(profile: np.ndarray, min_gap: int) -> List[Tuple[int, int]]:
+    """``[start, end)`` runs of inked entries in ``profile``, bridging blank gaps shorter than ``min_gap``."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], profile, [False])).astype(np.int8)))
+    runs: List[Tuple[int, int]] = []
+    for start, end in zip(edges[::2].tolist(), edges[1::2].tolist()):
+        if runs and start - runs[-1][1] < min_gap:
+            runs[-1] = (runs[-1][0], end)
+        else:
+            runs.append((start, end))
+    return runs
+
+
+def find_text_blocks(arr: np.ndarray, max_blocks: int = 16) -> List[Tuple[int, int, int, int]]:
+    """Text blocks of a grayscale array as ``(left, top, right, bottom)`` boxes, in reading order.
+
+    Works on the ink mask of a strided view. Rows with no ink split the page
+    into bands wherever the blank gap is at least a text line tall. Consecutive
+    bands that keep a common column gutter (a blank strip wider than two lines)
+    and are at most a few lines apart form a section, which is read column by
+    column, each column split into blocks at blank rows again. Sections go top
+    to bottom. Boxes are padded by
+    a quarter line. When there are more than ``max_blocks``, the neighbouring
+    pair (in reading order) with the smallest combined box is merged.
+    """
+    stride = max(1, -(-max(arr.shape) // _LAYOUT_MAX_SIDE))
+    view = arr[::stride, ::stride]
+    ink = view < ink_threshold(_histogram(view))
+    _, line_height = analyze_layout(arr)
+    # Without measurable lines (blank or photo-like input) assume ~50 lines per page
+    line = max(2, round((line_height or arr.shape[0] / 50) / stride))
+
+    def inked(mask: np.ndarray, axis: int) -> np.ndarray:
+        return mask.sum(axis=axis) > mask.shape[axis] * _BLOCK_BLANK_SHARE
+
+    # Sections: (top, bottom, inked-column profile)
+    sections: List[Tuple[int, int, np.ndarray]] = []
+    for top, bottom in _ink_runs(inked(ink, 1), line):
+        cols = inked(ink[top:bottom], 0)
+        if sections:
+            s_top, s_bottom, s_cols = sections[-1]
+            merged = s_cols | cols
+            # A band far below (e.g. a footer) starts a new section even if it fits a column
+            near = top - s_bottom < _SECTION_MAX_GAP * line
+            if near and len(_ink_runs(s_cols, 2 * line)) > 1 and len(_ink_runs(merged, 2 * line)) > 1:
+                sections[-1] = (s_top, bottom, merged)
+                continue
+        sections.append((top, bottom, cols))
+
+    blocks: List[Tuple[int, int, int, int]] = []
+    for top, bottom, cols in sections:
+        for left, right in _ink_runs(cols, 2 * line):
+            for b_top, b_bottom in _ink_runs(inked(ink[top:bottom, left:right], 1), line):
+                blocks.append((left, top + b_top, right, top + b_bottom))
+
+    def union(a, b):
+        return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+    while len(blocks) > max_blocks:
+        def merged_area(k: int) -> int:
+            l, t, r, b = union(blocks[k], blocks[k + 1])
+            return (r - l) * (b - t)
+
+        i = min(range(len(blocks) - 1), key=merged_area)
+        blocks[i:i + 2] = [union(blocks[i], blocks[i + 1])]
+
+    pad = max(1, line * stride // 4)
+    height, width = arr.shape
+    return [
+        (max(0, l * stride - pad), max(0, t * stride - pad), min(width, r * stride + pad), min(height, b * stride + pad))
+        for l, t, r, b in blocks
+    ]
+
+
+class ImagePreprocessor:
+    """Decode image bytes and prepare them for OCR, timing every step.
+
+    ``steps`` picks the optional steps from ``PREPROCESS_STEPS``:
+
+    - ``draft``: let the JPEG decoder produce grayscale at 1/2, 1/4 or 1/8 scale
+      when the image is larger than ``max_side`` anyway.
+    - ``downscale``: shrink so text lines are about ``target_line_height`` pixels
+      tall and the long side is at most ``max_side``. Never upscales.
+    - ``deskew``: rotate text lines back to horizontal (up to +-10 degrees).
+    - ``contrast``: stretch gray levels so ink is black and paper is white.
+    - ``binarize``: threshold to black and white at ``ink_threshold``.
+    """
+
+    def __init__(
+        self,
+        steps: Optional[Iterable[str]] = None,
+        target_line_height: Optional[int] = None,
+        max_side: Optional[int] = None,
+    ):
+        self.steps = parse_steps(settings.OCR_PREPROCESS) if steps is None else parse_steps(",".join(steps))
+        self.target_line_height = settings.OCR_TARGET_LINE_HEIGHT if target_line_height is None else target_line_height
+        self.max_side = settings.OCR_MAX_SIDE if max_side is None else max_side
+
+    def decode(self, image_bytes: bytes) -> Image.Image:
+        """Decode to an image, at reduced scale and in grayscale when ``draft`` allows it."""
+        image = Image.open(BytesIO(image_bytes))
+        if "draft" in self.steps and self.max_side:
+            scale = min(1.0, self.max_side / max(image.size))
+            # Only JPEG supports draft; the decoder picks the smallest scale that stays >= the request
+            image.draft("L", (int(image.width * scale), int(image.height * scale)))
+        image.load()
+        return image
+
+    def grayscale(self, image: Image.Image) -> Image.Image:
+        if image.mode == "L":
+            return image
+        if image.mode not in _GRAYSCALE_READY_MODES:
+            image = image.convert("RGB")
+        return image.convert("L")
+
+    def downscale(self, image: Image.Image) -> Image.Image:
+        scale = 1.0
+        if self.max_side:
+            scale = min(scale, self.max_side / max(image.size))
+        if self.target_line_height:
+            _, line_height = analyze_layout(np.asarray(image))
+            if line_height:
+                scale = min(scale, self.target_line_height / line_height)
+        if scale >= 0.95:
+            return image
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        return image.resize(size, Image.Resampling.BOX, reducing_gap=2.0)
+
+    def contrast(self, image: Image.Image) -> Image.Image:
+        arr = np.asarray(image)
+        hist = _histogram(arr)
+        threshold = ink_threshold(hist)
+        # Paper level: the most common value; ink level: the mean below the threshold
+        paper = int(np.argmax(hist))
+        ink_hist = hist[:threshold + 1]
+        ink = float((ink_hist * np.arange(threshold + 1)).sum() / max(ink_hist.sum(), 1))
+        if paper - ink < 16 or (ink <= 8 and paper >= 247):
+            return image
+        lut = np.clip((np.arange(256) - ink) * (255.0 / (paper - ink)), 0, 255).astype(np.uint8)
+        return Image.fromarray(lut[arr])
+
+    def binarize(self, image: Image.Image) -> Image.Image:
+        arr = np.asarray(image)
+        threshold = ink_threshold(_histogram(arr))
+        return Image.fromarray(np.where(arr > threshold, 255, 0).astype(np.uint8))
+
+    def deskew(self, image: Image.Image) -> Image.Image:
+        arr = np.asarray(image)
+        angle, _ = analyze_layout(arr)
+        if abs(angle) < _DESKEW_MIN_ANGLE:
+            return image
+        # Fill the exposed corners with the paper colour (the most common level) so
+        # later thresholds do not see them as ink
+        background = int(np.argmax(_histogram(arr)))
+        return image.rotate(-angle, resample=Image.Resampling.BILINEAR, expand=True, fillcolor=background)
+
+    def process(self, image: Image.Image, timings: Optional[Dict[str, float]] = None) -> Image.Image:
+        """Run grayscale and then the enabled steps, in ``PREPROCESS_STEPS`` order.
+
+        Each step's time (ms) goes into ``timings`` as ``preprocess_<step>``.
+        """
+        chain = ["grayscale"] + [s for s in PREPROCESS_STEPS if s in self.steps and s != "draft"]
+        for step in chain:
+            t0 = time.perf_counter()
+            image = getattr(self, step)(image)
+            if timings is not None:
+                timings[f"preprocess_{step}"] = round((time.perf_counter() - t0) * 1000, 3)
+        return image
@@ -0,0 +1,82 @@
+from typing import Dict, Generic, List, Optional, Set, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """``word`` and every string made by deleting up to ``max_distance`` characters from it."""
+    found = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier if len(w) > 1 for i in range(len(w))} - found
+        found |= frontier
+    return found
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (insertions, deletions, substitutions and
+    transpositions of neighbours), or ``limit + 1`` once it is known to exceed ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+class DeletionIndex(Generic[V]):
+    """Bounded edit-distance lookup over a fixed vocabulary (the SymSpell idea).
+
+    Every term is stored under each string obtained by deleting up to its
+    allowed distance of characters. Two words within distance d of each other
+    share such a delete, so a lookup only generates the deletes of the query
+    (a few dozen for a word) and checks the handful of terms stored under them:
+    the cost depends on the query's length, not on the vocabulary's size.
+
+    Each term has its own allowed distance (``add(..., max_distance=)``, capped
+    at the index's ``max_distance``), so short terms can require exact matches.
+    Ties on distance go to the term added first.
+    """
+
+    def __init__(self, max_distance: int = 2):
+        self.max_distance = max_distance
+        self._terms: List[Tuple[str, int, V]] = []
+        self._by_delete: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def add(self, term: str, value: V, max_distance: Optional[int] = None) -> None:
+        allowed = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        index = len(self._terms)
+        self._terms.append((term, allowed, value))
+        for delete in _deletes(term, allowed):
+            self._by_delete.setdefault(delete, []).append(index)
+
+    def lookup(self, word: str) -> Optional[Tuple[str, V, int]]:
+        """``(term, value, distance)`` of the closest term within its allowed distance, or None."""
+        best: Optional[Tuple[int, int]] = None  # (distance, index)
+        seen: Set[int] = set()
+        by_delete = self._by_delete
+        for delete in _deletes(word, self.max_distance):
+            for index in by_delete.get(delete, ()):
+                if index in seen:
+                    continue
+                seen.add(index)
+                term, allowed, _ = self._terms[index]
+                distance = edit_distance(word, term, allowed)
+                if distance <= allowed and (best is None or (distance, index) < best):
+                    best = (distance, index)
+        if best is None:
+            return None
+        term, _, value = self._terms[best[1]]
+        return term, value, best[0]
@@ -0,0 +1,98 @@
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Hashable, Iterator, List, Optional, Tuple
+
+Interval = Tuple[int, int, str]
+
+
+class _Day:
+    __slots__ = ("starts", "ends", "ids")
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.ids: List[str] = []
+
+
+class IntervalIndex:
+    """Non-overlapping half-open intervals ``[start, end)`` kept sorted per key.
+
+    Intervals under one key never overlap (``add`` is only called once
+    ``overlapping`` came back empty), so sorting by start also sorts by end and
+    an overlap check is two binary searches. With ``max_keys`` the least
+    recently used keys are dropped once there are more, for callers that can
+    ``load`` them again from elsewhere. Not thread-safe; callers hold their own lock.
+    """
+
+    def __init__(self, max_keys: Optional[int] = None):
+        self.max_keys = max_keys
+        self._days: "OrderedDict[Hashable, _Day]" = OrderedDict()
+        self.size = 0
+        self.dropped = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._days
+
+    def __len__(self) -> int:
+        return self.size
+
+    def load(self, key: Hashable, intervals: List[Interval]) -> None:
+        """Replace everything under ``key`` with ``intervals`` (in any order)."""
+        self.discard(key)
+        day = self._new_day(key)
+        for start, end, interval_id in sorted(intervals):
+            day.starts.append(start)
+            day.ends.append(end)
+            day.ids.append(interval_id)
+        self.size += len(day.ids)
+
+    def _new_day(self, key: Hashable) -> _Day:
+        day = self._days[key] = _Day()
+        while self.max_keys and len(self._days) > self.max_keys:
+            _, oldest = self._days.popitem(last=False)
+            self.size -= len(oldest.ids)
+            self.dropped += 1
+        return day
+
+    def discard(self, key: Hashable) -> None:
+        day = self._days.pop(key, None)
+        if day is not None:
+            self.size -= len(day.ids)
+
+    def overlapping(self, key: Hashable, start: int, end: int) -> List[Interval]:
+        """Intervals under ``key`` that overlap ``[start, end)``, in order."""
+        day = self._days.get(key)
+        if day is None:
+            return []
+        self._days.move_to_end(key)
+        # First interval that ends after ``start``, up to the first that starts at or after ``end``
+        lo = bisect_right(day.ends, start)
+        hi = bisect_left(day.starts, end, lo)
+        return [(day.starts[i], day.ends[i], day.ids[i]) for i in range(lo, hi)]
+
+    def add(self, key: Hashable, start: int, end: int, interval_id: str) -> None:
+        day = self._days.get(key)
+        if day is None:
+            day = self._new_day(key)
+        i = bisect_right(day.starts, start)
+        day.starts.insert(i, start)
+        day.ends.insert(i, end)
+        day.ids.insert(i, interval_id)
+        self.size += 1
+
+    def intervals(self, key: Hashable) -> Iterator[Interval]:
+        day = self._days.get(key)
+        if day is not None:
+            yield from zip(day.starts, day.ends, day.ids)
+
+    def gaps(self, key: Hashable, start: int, end: int, min_length: int = 1) -> List[Tuple[int, int]]:
+        """Free stretches of at least ``min_length`` inside ``[start, end)``."""
+        free: List[Tuple[int, int]] = []
+        cursor = start
+        for busy_start, busy_end, _ in self.overlapping(key, start, end):
+            if busy_start - cursor >= min_length:
+                free.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+        if end - cursor >= min_length:
+            free.append((cursor, end))
+        return free
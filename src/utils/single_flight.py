@@ -0,0 +1,84 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Flight:
+    __slots__ = ("loop", "task", "waiters")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, task: asyncio.Task):
+        self.loop = loop
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Share one in-flight computation between concurrent callers with the same key.
+
+    The first caller for a key starts ``factory()`` as a task; callers that
+    arrive while it runs wait on the same task and get the same result (or
+    exception). Callers never own the task: cancelling one of them, or its
+    ``until`` firing, only stops that caller waiting. The task is cancelled
+    once no caller is left. Keys are forgotten as soon as the work finishes,
+    so nothing is cached here.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def run(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[Any]],
+        until: Optional[Awaitable[Any]] = None,
+    ) -> Tuple[Any, bool]:
+        """Return ``(result, coalesced)``; ``coalesced`` is True when another caller's work was reused.
+
+        ``until`` is an optional awaitable for this caller alone (e.g. a
+        disconnect watch). If it finishes first, whatever it raised is raised
+        here; if it returns, the caller is treated as cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get(key)
+        # A flight from another (closed) event loop can never finish for us
+        coalesced = flight is not None and flight.loop is loop and not flight.task.done()
+        if coalesced:
+            self.coalesced += 1
+        else:
+            flight = _Flight(loop, loop.create_task(factory()))
+            self._flights[key] = flight
+            self.leaders += 1
+            flight.task.add_done_callback(lambda _, key=key, flight=flight: self._forget(key, flight))
+
+        flight.waiters += 1
+        watcher = asyncio.ensure_future(until) if until is not None else None
+        try:
+            if watcher is None:
+                return await asyncio.shield(flight.task), coalesced
+            # asyncio.wait leaves both tasks running when this caller is cancelled
+            done, _ = await asyncio.wait({flight.task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if flight.task in done:
+                return flight.task.result(), coalesced
+            watcher.result()
+            raise asyncio.CancelledError()
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                self.abandoned += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+        }
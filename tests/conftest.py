@@ -0,0 +1,33 @@
+import os
+
+# Run OCR jobs on an in-process thread pool during tests so monkeypatched
+# OCRService methods are visible to the executor.
+os.environ.setdefault("OCR_EXECUTOR", "thread")
+# Keep the OCR cache in memory only; tests must not leave a SQLite file behind.
+os.environ.setdefault("OCR_CACHE_PATH", "")
+# Book appointments in memory, emptied before every test (see below).
+os.environ.setdefault("APPOINTMENT_STORE", "memory")
+# No OCR warm-up when a TestClient runs the lifespan; tests warm up explicitly.
+os.environ.setdefault("OCR_WARM_UP", "false")
+
+import pytest
+from io import BytesIO
+from PIL import Image
+
+from src.services.appointment_store import get_appointment_store
+
+
+@pytest.fixture(autouse=True)
+def empty_appointment_store():
+    """Tests book the same slots over and over; start each one with no bookings."""
+    get_appointment_store().clear()
+
+
+@pytest.fixture
+def make_png():
+    """Build a small valid PNG; different colors give different bytes (and cache keys)."""
+    def _make(color="white", size=(40, 20)):
+        buf = BytesIO()
+        Image.new("RGB", size, color).save(buf, format="PNG")
+        return buf.getvalue()
+    return _make
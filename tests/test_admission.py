@@ -0,0 +1,137 @@
+import base64
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from src.main import app
+from src.services.admission import IMAGE, IMAGE_BASE64, TEXT, AdmissionRejected, Lane, admission
+from src.services.ocr_cache import ocr_cache
+from src.services.ocr_service import OCRService
+
+
+def test_lane_hands_slots_over_in_order_and_times_out():
+    lane = Lane("image", limit=1, max_queue=2)
+
+    async def main():
+        order = []
+        await lane.acquire(1, 1)
+
+        async def waiter(name):
+            await lane.acquire(1, 1)
+            order.append(name)
+
+        tasks = [asyncio.ensure_future(waiter(n)) for n in ("a", "b")]
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as full:
+            await lane.acquire(1, 1)
+        assert full.value.status_code == 429
+
+        lane.release()
+        await asyncio.sleep(0.01)
+        assert order == ["a"]
+        lane.release()
+        await asyncio.gather(*tasks)
+        assert order == ["a", "b"]
+
+        with pytest.raises(AdmissionRejected) as late:
+            await lane.acquire(0.01, 2.2)
+        assert (late.value.status_code, late.value.retry_after) == (503, 3)
+        lane.release()
+
+    asyncio.run(main())
+    assert (lane.active, lane.waiting) == (0, 0)
+    assert lane.counters == {"admitted": 3, "queue_full": 1, "deadline": 1, "shed": 0}
+
+
+def test_text_stays_fast_while_image_lane_is_saturated(monkeypatch, make_png):
+    release = threading.Event()
+    # Each request books its own slot
+    texts = {make_png("red"): "book dentist tomorrow at 3 PM", make_png("blue"): "book dentist tomorrow at 4 PM"}
+
+    def slow_extract(self, b):
+        release.wait(5)
+        return {"raw_text": texts[b], "confidence": 0.9}
+
+    monkeypatch.setattr(OCRService, "extract_text_from_bytes", slow_extract)
+    monkeypatch.setitem(admission.lanes, IMAGE, Lane(IMAGE, limit=1, max_queue=1))
+    ocr_cache.clear()
+    headers = {"Content-Type": "image/png", "Cache-Control": "no-cache"}
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            images = [
+                asyncio.ensure_future(client.post("/appointments/image", content=make_png(color), headers=headers))
+                for color in ("red", "blue")
+            ]
+            await asyncio.sleep(0.1)
+            # One running, one waiting: the lane is full
+            full = await client.post("/appointments/image", content=make_png("green"), headers=headers)
+
+            started = time.perf_counter()
+            text = await client.post("/appointments", json={"text": "Book dentist tomorrow at 5pm"})
+            text_seconds = time.perf_counter() - started
+
+            release.set()
+            return full, text, text_seconds, await asyncio.gather(*images)
+
+    full, text, text_seconds, images = asyncio.run(main())
+    assert full.status_code == 429
+    assert full.headers["retry-after"] == "1"
+    assert text.status_code == 200
+    assert text_seconds < 1
+    assert [r.status_code for r in images] == [200, 200]
+    assert admission.lanes[IMAGE].counters["queue_full"] == 1
+
+
+def test_small_base64_image_gives_up_its_text_slot_before_ocr(monkeypatch, make_png):
+    held = {}
+
+    def extract(self, b):
+        held["text"] = admission.lanes[TEXT].active
+        held["image_base64"] = admission.lanes[IMAGE_BASE64].active
+        return {"raw_text": "book dentist tomorrow at 3 PM", "confidence": 0.9}
+
+    monkeypatch.setattr(OCRService, "extract_text_from_bytes", extract)
+    monkeypatch.setitem(admission.lanes, TEXT, Lane(TEXT, limit=1, max_queue=0))
+    ocr_cache.clear()
+    body = {"image_base64": base64.b64encode(make_png("teal")).decode()}
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/appointments", json=body, headers={"Cache-Control": "no-cache"})
+
+    response = asyncio.run(main())
+    assert response.status_code == 200
+    # Admitted as text (a small JSON body), but OCRed in the base64 lane
+    assert held == {"text": 0, "image_base64": 1}
+    assert admission.lanes[TEXT].counters["admitted"] == 1
+    assert (admission.lanes[TEXT].active, admission.lanes[IMAGE_BASE64].active) == (0, 0)
+
+
+def test_image_is_shed_when_estimated_wait_exceeds_deadline(monkeypatch, make_png):
+    monkeypatch.setattr(OCRService, "extract_text_from_bytes", lambda self, b: {"raw_text": "book dentist tomorrow at 3 PM"})
+    monkeypatch.setattr(admission.executor, "estimated_wait", lambda extra_jobs=0: 2.5)
+    ocr_cache.clear()
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            png = make_png("navy")
+            shed = await client.post("/appointments", files={"image": ("a.png", png, "image/png")}, headers={"X-Request-Deadline-Ms": "1000"})
+            ok = await client.post("/appointments", files={"image": ("a.png", png, "image/png")}, headers={"X-Request-Deadline-Ms": "5000"})
+            text = await client.post("/appointments", json={"text": "Book dentist tomorrow at 4pm"}, headers={"X-Request-Deadline-Ms": "1"})
+            metrics = await client.get("/metrics")
+            return shed, ok, text, metrics
+
+    shed, ok, text, metrics = asyncio.run(main())
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == "3"
+    assert ok.status_code == 200
+    # Text never waits on OCR, whatever its deadline
+    assert text.status_code == 200
+    assert 'admission_rejected_total{lane="image",reason="shed"}' in metrics.text
@@ -1,20 +1,24 @@
 import base64
+from datetime import date
 from fastapi.testclient import TestClient
 from src.main import app
+from src.api import appointments as appointments_api
 from src.services.ocr_service import OCRService
 
 
 client = TestClient(app)
 
 
-def test_image_base64_path_monkeypatched(monkeypatch):
+def test_image_base64_path_monkeypatched(monkeypatch, make_png):
     # Monkeypatch OCRService to avoid depending on pytesseract during tests
     def fake_extract(self, b):
         return {"raw_text": "book dentist March 10th at 3 PM", "confidence": 0.9}
 
     monkeypatch.setattr(OCRService, "extract_text_from_bytes", fake_extract)
+    # "March 10th" has no year; pin today so it resolves to 2023-03-10
+    monkeypatch.setattr(appointments_api, "_reference_date", lambda: date(2023, 1, 5))
 
-    payload = {"image_base64": base64.b64encode(b"dummy").decode("utf-8")}
+    payload = {"image_base64": base64.b64encode(make_png()).decode("utf-8")}
     response = client.post("/appointments", json=payload)
     assert response.status_code == 200
     data = response.json()
@@ -0,0 +1,108 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.services.appointment_store import AppointmentConflict, MemoryAppointmentStore, SQLiteAppointmentStore, get_appointment_store
+from src.utils.intervals import IntervalIndex
+
+client = TestClient(app)
+
+
+def _slot(time, department="Dentistry", date="2026-03-10"):
+    return {"department": department, "date": date, "time": time, "tz": "Asia/Kolkata"}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryAppointmentStore(slot_minutes=30)
+    else:
+        store = SQLiteAppointmentStore(path=str(tmp_path / "appointments.sqlite3"), slot_minutes=30)
+        yield store
+        store.close()
+
+
+def test_interval_index_finds_overlaps_and_gaps():
+    index = IntervalIndex()
+    for start, end, i in [(600, 630, "b"), (540, 570, "a"), (700, 730, "c")]:
+        index.add("day", start, end, i)
+    assert index.overlapping("day", 560, 610) == [(540, 570, "a"), (600, 630, "b")]
+    # Half-open: touching intervals do not overlap
+    assert index.overlapping("day", 570, 600) == []
+    assert index.gaps("day", 540, 780, 30) == [(570, 600), (630, 700), (730, 780)]
+    assert index.overlapping("other", 0, 1440) == []
+
+
+def test_conflicts_are_refused_per_department(store):
+    first = store.add(_slot("10:00"), source="a")
+    assert store.get(first.id).to_dict()["end_time"] == "10:30"
+
+    with pytest.raises(AppointmentConflict) as clash:
+        store.add(_slot("10:15"), source="b")
+    assert clash.value.conflicts == [{"appointment_id": first.id, "time": "10:00", "end_time": "10:30"}]
+
+    # Back to back, another department, another day, or no department at all
+    store.add(_slot("10:30"))
+    store.add(_slot("10:00", department="Cardiology"))
+    store.add(_slot("10:00", date="2026-03-11"))
+    store.add({"date": "2026-03-10", "time": "10:00"})
+    # The same input submitted again gets its booking back
+    assert store.add(_slot("10:00"), source="a").id == first.id
+    assert store.stats()["conflicts"] == 1 and store.stats()["replayed"] == 1
+
+    day = store.availability("Dentistry", "2026-03-10")
+    assert [b["time"] for b in day["booked"]] == ["10:00", "10:30"]
+    assert day["free"] == [{"start": "09:00", "end": "10:00"}, {"start": "11:00", "end": "17:00"}]
+
+
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "appointments.sqlite3")
+    one, two = SQLiteAppointmentStore(path=path, slot_minutes=30), SQLiteAppointmentStore(path=path, slot_minutes=30)
+    # The second worker has the day indexed before the first books it
+    assert two.availability("Dentistry", "2026-03-10")["booked"] == []
+    booked = one.add(_slot("09:00"))
+    with pytest.raises(AppointmentConflict):
+        two.add(_slot("09:00"))
+    assert [b["appointment_id"] for b in two.availability("Dentistry", "2026-03-10")["booked"]] == [booked.id]
+
+    stored, clashed = two.add_many([_slot("11:00"), _slot("11:10"), _slot("12:00")])
+    assert (len(stored), clashed) == (2, 1)
+    one.close()
+    two.close()
+    # Bookings survive a restart
+    again = SQLiteAppointmentStore(path=path, slot_minutes=30)
+    assert again.stats()["size"] == 3
+    assert again.get(booked.id).time == "09:00"
+    again.close()
+
+
+def test_api_books_appointments_and_reports_availability():
+    text = {"text": "Book dentist on March 10th at 3 PM"}
+    # Extraction alone stores nothing
+    assert client.post("/appointments", json=text).status_code == 200
+    assert get_appointment_store().stats()["size"] == 0
+
+    first = client.post("/appointments?book=true", json=text, headers={"Idempotency-Key": "patient-1"})
+    assert first.status_code == 200
+    appointment_id = first.json()["appointment_id"]
+    retry = client.post("/appointments?book=true", json=text, headers={"Idempotency-Key": "patient-1"})
+    assert retry.json()["appointment_id"] == appointment_id
+
+    # The same message from someone else is a different booking, and the slot is taken
+    other = client.post("/appointments?book=true", json=text, headers={"Idempotency-Key": "patient-2"})
+    assert other.status_code == 409
+    clash = client.post("/appointments?book=true", json={"text": "Dental checkup on March 10th at 3 PM please"})
+    assert clash.status_code == 409
+    body = clash.json()
+    assert body["status"] == "conflict"
+    assert body["conflicts"][0]["appointment_id"] == appointment_id
+
+    date = first.json()["appointment"]["date"]
+    day = client.get("/appointments/availability", params={"department": "dentist", "date": date})
+    assert day.status_code == 200
+    assert day.json()["department"] == "Dentistry"
+    assert [b["appointment_id"] for b in day.json()["booked"]] == [appointment_id]
+    assert {"start": "15:30", "end": "17:00"} in day.json()["free"]
+
+    assert client.get("/appointments/availability", params={"department": "astrology", "date": date}).status_code == 400
+    assert client.get("/appointments/availability", params={"department": "dentist", "date": "March 10"}).status_code == 400
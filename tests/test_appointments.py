@@ -1,4 +1,6 @@
+import pytest
 from fastapi.testclient import TestClient
+from src.api.responses import get_dumps
 from src.main import app
 
 client = TestClient(app)
@@ -27,4 +29,53 @@ def test_create_appointment_ambiguous_date():
 def test_create_appointment_no_text():
     response = client.post("/appointments", json={})
     assert response.status_code == 422
-    assert response.json()["detail"][0]["msg"] == "Field required."
\ No newline at end of file
+    assert response.json()["detail"][0]["msg"] == "Field required."
+
+def test_lean_view_drops_the_pipeline():
+    text = {"text": "Book dentist on March 11th at 4 PM"}
+    full = client.post("/appointments", json=text)
+    lean = client.post("/appointments?view=lean", json={"text": "Book dentist on March 11th at 5 PM"})
+    assert lean.status_code == 200
+    body = lean.json()
+    assert "pipeline" not in body
+    assert body["appointment"]["time"] == "17:00"
+    assert body["status"] == "ok" and body["appointment_id"]
+    assert body["confidence"] == {
+        "ocr": 1.0,
+        "entities": full.json()["pipeline"]["entities"]["entities_confidence"],
+        "normalization": full.json()["pipeline"]["normalization"]["normalization_confidence"],
+    }
+    assert len(lean.content) < len(full.content)
+
+    prefer = client.post("/appointments", json={"text": "Let's meet next week."}, headers={"Prefer": "return=minimal"})
+    assert prefer.status_code == 400
+    assert prefer.headers["preference-applied"] == "return=minimal"
+    assert "pipeline" not in prefer.json() and prefer.json()["session_id"]
+
+
+def test_serializers_agree():
+    pytest.importorskip("orjson")
+    content = {"status": "ok", "text": "Zahnarzt — 3 Uhr", "n": [1, 2.5, None, True]}
+    assert get_dumps("orjson")(content) == get_dumps("json")(content)
+
+
+def test_multiple_appointments_from_one_text():
+    text = {"text": "Follow-up sheet: Cardiology March 16th 10am, Dermatolgy March 18th 4:30pm, ortho tomorrow"}
+    assert "appointment_id" not in client.post("/appointments?multiple=true", json=text).json()["appointments"][0]
+    key = {"Idempotency-Key": "sheet-7"}
+    response = client.post("/appointments?multiple=true&book=true", json=text, headers=key)
+    assert response.status_code == 200
+    items = response.json()["appointments"]
+    assert [item["status"] for item in items] == ["ok", "ok", "needs_clarification"]
+    assert [item["appointment"]["department"] for item in items[:2]] == ["Cardiology", "Dermatology"]
+    assert items[1]["appointment"]["time"] == "16:30"
+    assert items[1]["entities"]["department_distance"] == 1
+    assert items[0]["appointment_id"] != items[1]["appointment_id"]
+
+    # The same sheet again, under the same key, gets the same bookings back
+    again = client.post("/appointments?multiple=true&book=true", json=text, headers=key).json()["appointments"]
+    assert [item.get("appointment_id") for item in again] == [item.get("appointment_id") for item in items]
+
+    nothing = client.post("/appointments?multiple=true", json={"text": "Fees once paid are non refundable"})
+    assert nothing.status_code == 400
+    assert nothing.json()["detail"] == "No appointments found"
@@ -0,0 +1,59 @@
+import base64
+import json
+from fastapi.testclient import TestClient
+from src.main import app
+from src.services.ocr_cache import ocr_cache
+from src.services.ocr_service import OCRService
+
+
+client = TestClient(app)
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines() if line.strip()]
+
+
+def test_batch_streams_one_line_per_item(monkeypatch, make_png):
+    broken = make_png("black")
+
+    def fake_extract(self, b):
+        if b == broken:
+            raise OSError("cannot identify image file")
+        return {"raw_text": "book dentist March 10th at 3 PM", "confidence": 0.9}
+
+    monkeypatch.setattr(OCRService, "extract_text_from_bytes", fake_extract)
+    ocr_cache.clear()
+    items = [
+        {"id": "a", "text": "Book cardiology appointment tomorrow at 10 am"},
+        {"id": "b", "image_base64": base64.b64encode(make_png("olive")).decode("utf-8")},
+        {"id": "c", "text": ""},
+        {"id": "d", "text": "Let's meet next week."},
+        {"id": "e", "image_base64": base64.b64encode(broken).decode("utf-8")},
+        {"id": "f", "text": "x", "image_base64": "eA=="},
+    ]
+    response = client.post("/appointments/batch", json={"items": items})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    by_id = {line["id"]: line for line in _lines(response)}
+    assert sorted(by_id) == ["a", "b", "c", "d", "e", "f"]
+    assert [by_id[k]["index"] for k in "abcdef"] == [0, 1, 2, 3, 4, 5]
+
+    assert by_id["a"]["status_code"] == 200
+    assert by_id["a"]["appointment"]["department"] == "Cardiology"
+    assert "appointment_id" in by_id["a"]
+
+    assert by_id["b"]["status_code"] == 200
+    assert by_id["b"]["pipeline"]["ocr"]["confidence"] == 0.9
+    assert by_id["b"]["appointment"]["department"] == "Dentistry"
+
+    assert by_id["c"]["status_code"] == 422
+    assert by_id["d"]["status"] == "needs_clarification"
+    assert by_id["e"]["status_code"] == 500
+    assert by_id["f"]["status_code"] == 400
+
+
+def test_batch_requires_items():
+    response = client.post("/appointments/batch", json={})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "items"]
@@ -0,0 +1,50 @@
+import argparse
+import asyncio
+from io import BytesIO
+
+from PIL import Image
+
+from benchmarks.corpus import card_variants, text_messages
+from benchmarks.loadtest import Workload, _unique_jpeg, label, run_once
+from benchmarks.suite import compare, measure, summarize
+
+
+def test_corpus_is_reproducible():
+    assert text_messages(20) == text_messages(20)
+    assert text_messages(20) != text_messages(20, seed=8)
+    one, two = (card_variants(widths=(400,), noises=(0.0, 12.0), angles=(0.0, 3.0)) for _ in range(2))
+    assert len(one) == 4
+    assert [v["image"] for v in one] == [v["image"] for v in two]
+    assert [(v["noise"], v["angle"]) for v in one] == [(0.0, 0.0), (0.0, 3.0), (12.0, 0.0), (12.0, 3.0)]
+
+
+def test_summary_and_regressions_against_a_baseline():
+    calls = []
+    times = measure(calls.append, ["a", "b"], number=5, warmup=1)
+    assert len(times) == 5 and calls == ["a", "b", "a", "b", "a", "b"]
+
+    stats = summarize([0.001 * i for i in range(1, 101)])
+    assert (stats["n"], stats["p50_ms"], stats["p95_ms"], stats["p99_ms"]) == (100, 50.0, 95.0, 99.0)
+
+    baseline = {"results": {"fast": {"p50_ms": 1.0, "p95_ms": 2.0}, "gone": {"p50_ms": 1.0, "p95_ms": 1.0}}}
+    current = {"results": {"fast": {"p50_ms": 1.1, "p95_ms": 3.0}, "new": {"p50_ms": 9.0, "p95_ms": 9.0}}}
+    assert compare(current, baseline, tolerance=0.25) == [
+        {"case": "fast", "metric": "p95_ms", "baseline": 2.0, "current": 3.0, "ratio": 1.5},
+    ]
+
+
+def test_load_test_mix_and_report():
+    card = card_variants(widths=(400,), noises=(0.0,), angles=(0.0,))[0]["image"]
+    unique = _unique_jpeg(card, 1)
+    assert unique != card and Image.open(BytesIO(unique)).tobytes() == Image.open(BytesIO(card)).tobytes()
+    assert [label(None, None), label(409, {"status": "conflict"}), label(503, {}), label(500, None)] == ["failed", "conflict", "rejected", "error"]
+
+    workload = Workload(0.5, 0.5, repeat_images=False)
+    kinds = {workload.next()[0] for _ in range(50)}
+    assert kinds == {"text", "image", "image_base64"}
+
+    args = argparse.Namespace(mode="closed", duration=0.3, window=0.1, timeout=10.0, seed=7, base64_share=0.5, repeat_images=False, rate=0.0)
+    result = asyncio.run(run_once(args, None, concurrency=2, image_share=0.0))
+    assert result["requests"] > 0 and set(result["by_kind"]) == {"text"}
+    assert result["rates"]["error"] == 0 and result["rates"]["failed"] == 0
+    assert result["timeline"] and result["loop_lag_max_ms"] is not None
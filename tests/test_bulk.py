@@ -0,0 +1,108 @@
+import base64
+import json
+
+from src.bulk import Checkpoint, run_bulk
+from src.core.config import settings
+from src.services.ocr_service import OCRService
+
+
+def _lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_bulk_jsonl_resumes_from_checkpoint(tmp_path):
+    source, output = tmp_path / "messages.jsonl", tmp_path / "results.jsonl"
+    texts = ["Book dentist on March 10th at 3 PM", "Cardio tomorrow in the evening", "derm next friday at 11am"]
+    with open(source, "w") as f:
+        for i, text in enumerate(texts * 3):
+            f.write(json.dumps({"id": f"m{i}", "text": text}) + "\n")
+        f.write("\nnot json\n")
+
+    stats = run_bulk(str(source), str(output), chunk_size=4, progress=0)
+    assert stats["items"] == 10
+    full = _lines(output)
+    assert [r["id"] for r in full[:3]] == ["m0", "m1", "m2"]
+    assert [r["status_code"] for r in full[:3]] == [200, 400, 200]
+    assert full[0]["result"]["appointment"]["time"] == "15:00"
+    assert full[1]["result"]["status"] == "needs_clarification"
+    assert full[-1] == {"id": "11", "status_code": 422, "result": {"status": "error", "message": "Line is not valid JSON"}}
+
+    # Interrupted after the first chunk, with half a chunk written past the checkpoint
+    checkpoint = Checkpoint(str(output), str(source))
+    with open(output, "rb") as f:
+        first_chunk = b"".join(f.readlines()[:4])
+    checkpoint.items, checkpoint.bytes = 4, len(first_chunk)
+    checkpoint.save()
+    with open(output, "wb") as f:
+        f.write(first_chunk + b'{"id": "m4", "sta')
+
+    stats = run_bulk(str(source), str(output), chunk_size=4, resume=True, progress=0)
+    assert stats["processed"] == 6 and stats["items"] == 10
+    assert _lines(output) == full
+
+
+def test_bulk_image_directory(tmp_path, monkeypatch, make_png, capsys):
+    seen = []
+
+    def extract(self, image_bytes):
+        seen.append(image_bytes)
+        return {"raw_text": "Neurology OPD\nAugust 5th at 11 am", "confidence": 0.9, "tier": "full"}
+
+    monkeypatch.setattr(OCRService, "extract_text_from_bytes", extract)
+    (tmp_path / "scans" / "b").mkdir(parents=True)
+    (tmp_path / "scans" / "b" / "card.png").write_bytes(make_png("red"))
+    (tmp_path / "scans" / "a.png").write_bytes(make_png("blue"))
+    (tmp_path / "scans" / "notes.txt").write_text("not an image")
+    # Not a format ingest accepts: skipped, not a 400
+    (tmp_path / "scans" / "photo.bmp").write_bytes(b"BM")
+    (tmp_path / "scans" / "bad.jpg").write_bytes(b"not a jpeg")
+
+    output = tmp_path / "results.jsonl"
+    run_bulk(str(tmp_path / "scans"), str(output), lean=True, progress=0)
+    results = _lines(output)
+    assert [r["id"] for r in results] == ["a.png", "bad.jpg", "b/card.png"]
+    assert [r["status_code"] for r in results] == [200, 400, 200]
+    assert results[0]["result"]["appointment"]["department"] == "Neurology"
+    assert "pipeline" not in results[0]["result"]
+    assert len(seen) == 2
+    assert "3 items" in capsys.readouterr().err
+
+
+def test_bulk_multiple_reads_every_page(tmp_path, monkeypatch):
+    from PIL import Image
+
+    texts = ["Cardiology March 16th at 10 AM", "Dermatology March 18th at 4 PM"]
+    monkeypatch.setattr(OCRService, "extract_text_from_page", lambda self, data, mime, page: {"raw_text": texts[page], "confidence": 0.9})
+    (tmp_path / "scans").mkdir()
+    frames = [Image.new("L", (40, 20), 255) for _ in texts]
+    frames[0].save(tmp_path / "scans" / "sheet.tif", format="TIFF", save_all=True, append_images=frames[1:])
+
+    output = tmp_path / "results.jsonl"
+    run_bulk(str(tmp_path / "scans"), str(output), multiple=True, progress=0)
+    [result] = _lines(output)
+    assert result["status_code"] == 200
+    assert [item["appointment"]["department"] for item in result["result"]["appointments"]] == ["Cardiology", "Dermatology"]
+
+
+def test_bulk_lines_are_checked_like_api_bodies(tmp_path, monkeypatch, make_png):
+    monkeypatch.setattr(OCRService, "extract_text_from_bytes", lambda self, b: {"raw_text": "Neurology August 5th at 11 am", "confidence": 0.9})
+    monkeypatch.setattr(settings, "IMAGE_MAX_BYTES", 1000)
+    encoded = base64.b64encode(make_png("red")).decode()
+    lines = [
+        # Line-wrapped base64, as the API accepts it
+        {"id": "wrapped", "image_base64": "\n".join(encoded[i:i + 76] for i in range(0, len(encoded), 76))},
+        {"id": "both", "text": "Neurology August 5th at 11 am", "image_base64": encoded},
+        {"id": "large", "image_base64": "A" * 2000},
+        {"id": "none"},
+    ]
+    source, output = tmp_path / "lines.jsonl", tmp_path / "results.jsonl"
+    source.write_text("".join(json.dumps(line) + "\n" for line in lines))
+
+    run_bulk(str(source), str(output), progress=0)
+    results = {r["id"]: r for r in _lines(output)}
+    assert results["wrapped"]["status_code"] == 200
+    assert results["both"] == {"id": "both", "status_code": 400, "result": {"status": "error", "message": "Invalid input format"}}
+    assert results["large"]["status_code"] == 400
+    assert results["large"]["result"]["reason"] == "Image exceeds 1000 bytes"
+    assert results["none"]["status_code"] == 422
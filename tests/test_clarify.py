@@ -1,19 +1,70 @@
 from fastapi.testclient import TestClient
 from src.main import app
+from src.services.ocr_cache import ocr_cache
+from src.services.ocr_service import OCRService
 
 
 client = TestClient(app)
 
 
-def test_clarify_merge():
-    pipeline = {"ocr": {"raw_text": "Book dentist next Friday at 3pm", "confidence": 0.9}}
-    appointment = {"department": None, "date": None, "time": None, "tz": "Asia/Kolkata"}
-    payload = {"pipeline": pipeline, "appointment": appointment, "corrections": {"department": "Dentistry", "date": "2025-09-26", "time": "15:00"}}
+def test_clarify_corrects_a_session():
+    first = client.post("/appointments?book=true", json={"text": "Book dentist next week at 3pm"})
+    assert first.status_code == 400
+    session_id = first.json()["session_id"]
 
-    resp = client.post("/appointments/clarify", json=payload)
+    resp = client.post("/appointments/clarify", json={"session_id": session_id, "corrections": {"date_phrase": "March 10th"}})
     assert resp.status_code == 200
     data = resp.json()
     assert data["status"] == "ok"
     assert data["appointment"]["department"] == "Dentistry"
-    assert data["appointment"]["date"] == "2025-09-26"
+    assert data["appointment"]["date"].endswith("-03-10")
+    # The time kept its earlier normalization; only the date ran again
     assert data["appointment"]["time"] == "15:00"
+    assert data["stages_rerun"] == ["guardrails", "normalize_date", "score"]
+    assert data["pipeline"]["normalization"]["normalization_confidence"] == 0.95
+    assert data["appointment_id"]
+
+    # The session ends once the appointment is booked
+    again = client.post("/appointments/clarify", json={"session_id": session_id, "corrections": {"time": "16:00"}})
+    assert again.status_code == 404
+
+
+def test_clarify_never_reruns_ocr(monkeypatch, make_png):
+    calls = []
+
+    def extract(self, image_bytes):
+        calls.append(image_bytes)
+        return {"raw_text": "Cardio tomorrow in the evening", "confidence": 0.9}
+
+    monkeypatch.setattr(OCRService, "extract_text_from_bytes", extract)
+    ocr_cache.clear()
+    first = client.post("/appointments", files={"image": ("card.png", make_png("teal"), "image/png")})
+    assert first.status_code == 400
+    assert first.json()["message"] == "Ambiguous time provided."
+    session_id = first.json()["session_id"]
+
+    # Still ambiguous: the same session stays open
+    vague = client.post("/appointments/clarify", json={"session_id": session_id, "corrections": {"time_phrase": "evening"}})
+    assert vague.status_code == 400
+    assert (vague.json()["status"], vague.json()["session_id"]) == ("needs_clarification", session_id)
+
+    assert client.post("/appointments/clarify", json={"session_id": session_id, "corrections": {"room": "4"}}).status_code == 422
+    assert client.post("/appointments/clarify", json={"session_id": session_id, "corrections": {"department": "astrology"}}).status_code == 422
+
+    done = client.post("/appointments/clarify", json={"session_id": session_id, "corrections": {"time_phrase": "6:30 pm", "department": "derm"}})
+    assert done.status_code == 200
+    assert done.json()["appointment"]["time"] == "18:30"
+    assert done.json()["appointment"]["department"] == "Dermatology"
+    assert done.json()["pipeline"]["ocr"]["raw_text"] == "Cardio tomorrow in the evening"
+    # The upload did not ask to book
+    assert "appointment_id" not in done.json()
+    assert len(calls) == 1
+
+
+def test_clarify_needs_a_session():
+    pipeline = {"ocr": {"raw_text": "Book dentist next Friday at 3pm", "confidence": 0.9}}
+    appointment = {"department": None, "date": None, "time": None, "tz": "Asia/Kolkata"}
+    legacy = client.post("/appointments/clarify", json={"pipeline": pipeline, "appointment": appointment, "corrections": {"time": "15:00"}})
+    assert legacy.status_code == 422
+    unknown = client.post("/appointments/clarify", json={"session_id": "nope", "corrections": {"time": "15:00"}})
+    assert unknown.status_code == 404
@@ -0,0 +1,89 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+import tests.legacy_nlp as legacy
+from src.services import nlp_service
+from src.services.nlp_service import normalize_entities, resolve_relative_date
+
+
+# Months whose names survive the old ordinal-stripping regex ("August" loses its "st")
+LEGACY_SAFE_MONTHS = [m for m in nlp_service.MONTH_MAP if not any(s in m for s in ("st", "nd", "rd", "th"))]
+WEEKDAYS = list(nlp_service.WEEKDAY_MAP)
+
+
+def _random_dates(rng, n):
+    start = date(2020, 1, 1)
+    return [start + timedelta(days=rng.randrange(3650)) for _ in range(n)]
+
+
+def _random_case(rng, s):
+    return "".join(c.upper() if rng.random() < 0.3 else c for c in s)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_relative_phrases_match_legacy(seed):
+    rng = random.Random(seed)
+    for ref in _random_dates(rng, 200):
+        phrase = rng.choice([
+            "today",
+            "tomorrow",
+            f"{rng.choice(['next', 'this'])}{rng.choice([' ', '  ', chr(9)])}{rng.choice(WEEKDAYS)}",
+            f"next {rng.choice(WEEKDAYS)} at 3pm",
+        ])
+        phrase = rng.choice(["", " "]) + _random_case(rng, phrase)
+        assert resolve_relative_date(phrase, ref) == legacy.resolve_relative_date(phrase, ref), phrase
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_explicit_dates_and_times_match_legacy(seed):
+    rng = random.Random(100 + seed)
+    for ref in _random_dates(rng, 200):
+        month = rng.choice(LEGACY_SAFE_MONTHS)
+        year = rng.randrange(2000, 2100)
+        first = date(year, nlp_service.MONTH_MAP[month], 1)
+        day = rng.randrange(1, 28) if first.month == 2 else rng.randrange(1, 31)
+        suffix = rng.choice(["", "st", "nd", "rd", "th"])
+        date_phrase = f"{_random_case(rng, month)} {day}{suffix}, {year}"
+
+        if rng.random() < 0.5:
+            hour, ampm = rng.randrange(1, 13), rng.choice(["am", "pm", "AM", "PM"])
+        else:
+            hour, ampm = rng.randrange(0, 24), ""
+        minute = rng.choice([None, rng.randrange(60)])
+        time_phrase = f"{hour}{'' if minute is None else f':{minute:02d}'}{rng.choice(['', ' '])}{ampm}"
+
+        entities = {"date_phrase": date_phrase, "time_phrase": time_phrase}
+        assert normalize_entities(entities, ref) == legacy.normalize_entities(entities, ref), entities
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_missing_year_is_next_occurrence(seed):
+    rng = random.Random(200 + seed)
+    for ref in _random_dates(rng, 200):
+        month = rng.choice(list(nlp_service.MONTH_MAP))
+        day = rng.randrange(1, 29)
+        normalized = normalize_entities({"date_phrase": f"{month.title()} {day}th"}, ref)
+        resolved = date.fromisoformat(normalized["date"])
+        assert (resolved.month, resolved.day) == (nlp_service.MONTH_MAP[month], day)
+        assert ref <= resolved
+        assert resolved.replace(year=resolved.year - 1) < ref
+
+
+def test_phrases_the_old_parser_got_wrong():
+    ref = date(2025, 3, 1)
+    assert normalize_entities({"date_phrase": "August 5th"}, ref)["date"] == "2025-08-05"
+    assert normalize_entities({"date_phrase": "March 10 2026"}, ref)["date"] == "2026-03-10"
+    assert normalize_entities({"date_phrase": "February 29"}, ref)["date"] == "2028-02-29"
+    assert normalize_entities({"date_phrase": "January 2"}, ref)["date"] == "2026-01-02"
+    assert normalize_entities({"date_phrase": "April 31"}, ref)["date"] is None
+    assert normalize_entities({"time_phrase": "13 pm"}, ref)["time"] is None
+    assert normalize_entities({"time_phrase": "3:75"}, ref)["time"] is None
+    assert normalize_entities({"time_phrase": "12 am"}, ref)["time"] == "00:00"
+
+
+def test_relative_table_follows_reference_date():
+    assert resolve_relative_date("tomorrow", date(2025, 12, 31)) == date(2026, 1, 1)
+    assert resolve_relative_date("tomorrow", date(2026, 1, 1)) == date(2026, 1, 2)
+    assert resolve_relative_date("next week", date(2026, 1, 1)) is None
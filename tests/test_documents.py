@@ -0,0 +1,135 @@
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from src.main import app
+from src.services.documents import open_page
+from src.services.image_ingest import inspect_image
+from src.services.ocr_backends import OCRBackend
+from src.services.ocr_cache import ocr_cache
+from src.services.ocr_executor import ocr_executor
+from src.services.ocr_service import OCRService
+
+client = TestClient(app)
+
+
+def _tiff(*sizes):
+    frames = [Image.new("L", size, 255) for size in sizes]
+    buf = BytesIO()
+    frames[0].save(buf, format="TIFF", save_all=True, append_images=frames[1:])
+    return buf.getvalue()
+
+
+def _fake_pages(monkeypatch, texts, delay=0.0):
+    calls = []
+    lock = threading.Lock()
+
+    def extract_page(self, data, mime, page):
+        with lock:
+            calls.append(page)
+        time.sleep(delay)
+        return {"raw_text": texts[page], "confidence": 0.8, "tier": "full"}
+
+    monkeypatch.setattr(OCRService, "extract_text_from_page", extract_page)
+    ocr_cache.clear()
+    return calls
+
+
+def test_tiff_pages_are_counted_and_decoded_one_at_a_time():
+    data = _tiff((30, 20), (40, 50), (60, 10))
+    assert inspect_image(data) == {"mime": "image/tiff", "pages": 3, "width": 30, "height": 20}
+    assert open_page(data, "image/tiff", 1).size == (40, 50)
+
+    seen = []
+
+    class FakeBackend(OCRBackend):
+        name = "fake"
+
+        def recognize(self, image, psm=None, lines=False):
+            seen.append(image.size)
+            return {"raw_text": "page", "confidence": 0.5}
+
+    result = OCRService(backend=FakeBackend(), cascade=["full"]).extract_text_from_page(data, "image/tiff", 2)
+    assert result["raw_text"] == "page"
+    assert seen == [(60, 10)]
+
+
+def test_document_stops_after_the_page_with_an_appointment(monkeypatch):
+    calls = _fake_pages(monkeypatch, ["Referral letter for Asha", "Dentist tomorrow at 3 PM", "Billing details"])
+    monkeypatch.setattr(ocr_executor, "workers", 1)
+    data = _tiff((40, 20), (40, 20), (40, 20))
+
+    response = client.post("/appointments/image", content=data, headers={"Content-Type": "image/tiff"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["appointment"]["department"] == "Dentistry"
+    ocr = body["pipeline"]["ocr"]
+    assert ocr["page_count"] == 3
+    assert [p["page"] for p in ocr["pages"]] == [1, 2]
+    assert ocr["pages"][1] == {"page": 2, "raw_text": "Dentist tomorrow at 3 PM", "confidence": 0.8, "tier": "full"}
+    assert ocr["raw_text"] == "Referral letter for Asha\nDentist tomorrow at 3 PM"
+    # The third page was never decoded
+    assert calls == [0, 1]
+
+    # Pages are cached one by one
+    again = client.post("/appointments/image", content=data, headers={"Content-Type": "image/tiff"})
+    assert again.status_code == 200
+    assert calls == [0, 1]
+
+
+def test_document_pages_run_in_parallel(monkeypatch):
+    calls = _fake_pages(monkeypatch, ["Dentist", "tomorrow", "at noon"], delay=0.2)
+    pool = ThreadPoolExecutor(max_workers=3)
+    monkeypatch.setattr(ocr_executor, "workers", 3)
+    monkeypatch.setattr(ocr_executor, "_pool", pool)
+    data = _tiff((40, 20), (40, 20), (40, 20))
+
+    started = time.perf_counter()
+    response = client.post("/appointments", files={"image": ("fax.tiff", data, "image/tiff")})
+    elapsed = time.perf_counter() - started
+    pool.shutdown()
+    # No page holds a full appointment, so all are read and the result asks for clarification
+    assert response.status_code == 400
+    assert [p["page"] for p in response.json()["pipeline"]["ocr"]["pages"]] == [1, 2, 3]
+    assert sorted(calls) == [0, 1, 2]
+    assert elapsed < 0.5
+
+
+def test_document_limits(monkeypatch):
+    monkeypatch.setattr("src.core.config.settings.DOCUMENT_MAX_PAGES", 2)
+    response = client.post("/appointments/image", content=_tiff((4, 4), (4, 4), (4, 4)), headers={"Content-Type": "image/tiff"})
+    assert response.status_code == 400
+    assert response.json()["reason"] == "Document has more than 2 pages"
+
+    # Every page is checked, not just the first
+    monkeypatch.setattr("src.core.config.settings.IMAGE_MAX_PIXELS", 1000)
+    response = client.post("/appointments/image", content=_tiff((10, 10), (100, 100)), headers={"Content-Type": "image/tiff"})
+    assert response.status_code == 400
+    assert response.json()["reason"] == "A page has more than 1000 pixels"
+
+
+def test_pdf_needs_pypdfium2(monkeypatch):
+    buf = BytesIO()
+    Image.new("RGB", (40, 20), "white").save(buf, format="PDF")
+    # A None entry makes the import fail as if the package were not installed
+    monkeypatch.setitem(sys.modules, "pypdfium2", None)
+    response = client.post("/appointments/image", content=buf.getvalue(), headers={"Content-Type": "application/pdf"})
+    assert response.status_code == 400
+    assert response.json()["reason"] == "PDF support needs the pypdfium2 package"
+
+
+def test_multiple_mode_reads_every_page(monkeypatch):
+    calls = _fake_pages(monkeypatch, ["Cardiology March 16th at 10 AM", "Dermatology March 18th at 4 PM", "Neuro March 20th at 11 AM"])
+    data = _tiff((40, 20), (40, 20), (40, 20))
+
+    response = client.post("/appointments/image?multiple=true", content=data, headers={"Content-Type": "image/tiff"})
+    assert response.status_code == 200
+    body = response.json()
+    assert [p["page"] for p in body["pipeline"]["ocr"]["pages"]] == [1, 2, 3]
+    assert [item["appointment"]["department"] for item in body["appointments"]] == ["Cardiology", "Dermatology", "Neurology"]
+    assert sorted(calls) == [0, 1, 2]
@@ -0,0 +1,77 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+from src.pipelines.engine import PipelineContext, PipelineEngine, PipelineError, Stage
+from src.pipelines.stages import DEFAULT_STAGES, appointment_engine
+from src.services.ocr_cache import ocr_cache
+from src.services.ocr_service import OCRService
+
+
+def _statuses(ctx):
+    return {r.stage: r.status for r in ctx.trace}
+
+
+def test_text_input_skips_ocr_and_records_every_stage():
+    ctx = appointment_engine.run(PipelineContext(text="Book dentist next Friday at 3pm", ref_date=date(2025, 9, 19)))
+    assert [r.stage for r in ctx.trace] == [s.name for s in DEFAULT_STAGES]
+    assert _statuses(ctx)["ocr"] == "skipped"
+    assert all(status == "ok" for stage, status in _statuses(ctx).items() if stage != "ocr")
+    assert set(ctx.timings()) == {"ingest", "clean", "extract", "guardrails", "normalize", "score"}
+    assert ctx.normalized["date"] == "2025-09-26"
+    assert ctx.trace[-1].output == {"entities": ctx.entities_confidence, "normalization": 0.85}
+
+
+def test_guardrail_failure_skips_normalization_but_scores():
+    ctx = appointment_engine.run(PipelineContext(text="Let's meet next week."))
+    assert ctx.clarification == "Ambiguous date provided."
+    assert _statuses(ctx)["normalize"] == "skipped"
+    assert ctx.normalized is None
+    assert ctx.entities_confidence is not None
+
+
+def test_pipeline_error_stops_the_run():
+    ctx = appointment_engine.run(PipelineContext(text="   "))
+    assert ctx.error.status_code == 422
+    assert _statuses(ctx)["ingest"] == "error"
+    assert all(r.status == "skipped" for r in ctx.trace[1:])
+
+
+def test_image_input_runs_ocr_stage(monkeypatch, make_png):
+    def fake_extract(self, b):
+        return {"raw_text": "book dentist March 10th at 3 PM", "confidence": 0.9}
+
+    monkeypatch.setattr(OCRService, "extract_text_from_bytes", fake_extract)
+    ocr_cache.clear()
+    card = make_png("navy")
+    ctx = PipelineContext(image_bytes=card, ref_date=date(2023, 1, 5))
+    with pytest.raises(RuntimeError):
+        appointment_engine.run(ctx)
+
+    ctx = asyncio.run(appointment_engine.run_async(PipelineContext(image_bytes=card, ref_date=date(2023, 1, 5))))
+    assert _statuses(ctx)["ocr"] == "ok"
+    assert ctx.trace[1].output == {"cached": False, "coalesced": False, "tier": None, "confidence": 0.9}
+    assert ctx.normalized["date"] == "2023-03-10"
+
+
+def test_custom_stage_can_be_inserted():
+    class Shout(Stage):
+        name = "shout"
+
+        def run(self, ctx):
+            ctx.source_text = ctx.source_text.upper()
+            return ctx.source_text
+
+    engine = PipelineEngine((DEFAULT_STAGES[0], Shout(), *DEFAULT_STAGES[2:4]))
+    ctx = engine.run(PipelineContext(text="dentist tomorrow"))
+    assert ctx.trace[1].output == "DENTIST TOMORROW"
+    assert ctx.entities["department"] == "Dentistry"
+
+    with pytest.raises(ValueError):
+        PipelineEngine((Shout(), Shout()))
+
+
+def test_pipeline_error_default_content():
+    err = PipelineError(504, "OCR timed out")
+    assert err.content == {"status": "error", "message": "OCR timed out"}
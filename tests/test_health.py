@@ -0,0 +1,44 @@
+import asyncio
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+from src.core.config import settings
+from src.main import app
+from src.services.ocr_executor import ocr_executor
+from src.services.ocr_service import OCRService
+
+client = TestClient(app)
+
+
+def test_text_path_starts_without_ocr_dependencies():
+    code = "import sys, src.main; print(','.join(m for m in ('numpy', 'PIL', 'pytesseract', 'easyocr') if m in sys.modules))"
+    loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.strip()
+    assert loaded == ""
+
+
+def test_readyz_waits_for_ocr_warm_up(monkeypatch):
+    monkeypatch.setattr(settings, "OCR_WARM_UP", True)
+    for attr in ("warm_state", "warm_up_ms", "warm_up_error"):
+        monkeypatch.setattr(ocr_executor, attr, getattr(ocr_executor, attr))
+    assert client.get("/healthz").json() == {"status": "ok"}
+    assert client.get("/readyz").status_code == 503
+
+    def broken(self):
+        raise RuntimeError("tesseract is not installed")
+
+    monkeypatch.setattr(OCRService, "warm_up", broken)
+    assert asyncio.run(ocr_executor.warm_up()) is False
+    failed = client.get("/readyz")
+    assert failed.status_code == 503
+    assert failed.json()["ocr"] == "failed" and "tesseract" in failed.json()["error"]
+
+    warmed = []
+    monkeypatch.setattr(OCRService, "warm_up", lambda self: warmed.append(self) or {})
+    assert asyncio.run(ocr_executor.warm_up()) is True
+    ready = client.get("/readyz")
+    assert ready.status_code == 200
+    assert ready.json()["status"] == "ready" and len(warmed) == 1
+    # The text path never needed it
+    assert client.post("/appointments", json={"text": "Book dentist on March 10th at 3 PM"}).status_code == 200
@@ -0,0 +1,136 @@
+import asyncio
+import base64
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.services.image_ingest import (
+    ImageRejected,
+    decode_base64_capped,
+    inspect_image,
+    read_capped,
+    sniff_image_type,
+)
+from src.services.ocr_cache import ocr_cache
+from src.services.ocr_service import OCRService
+
+
+client = TestClient(app)
+
+
+def _fake_ocr(monkeypatch):
+    def fake_extract(self, b):
+        return {"raw_text": "book dentist tomorrow at 3 PM", "confidence": 0.9}
+
+    monkeypatch.setattr(OCRService, "extract_text_from_bytes", fake_extract)
+    ocr_cache.clear()
+
+
+def test_sniff_and_inspect(make_png):
+    png = make_png(size=(30, 10))
+    assert sniff_image_type(png) == "image/png"
+    assert sniff_image_type(b"\xff\xd8\xff\xe0rest") == "image/jpeg"
+    assert sniff_image_type(b"GIF89a") is None
+    assert inspect_image(png) == {"mime": "image/png", "width": 30, "height": 10}
+
+    with pytest.raises(ImageRejected):
+        inspect_image(b"not an image")
+    with pytest.raises(ImageRejected):
+        inspect_image(png[:12])  # magic bytes but no header
+    with pytest.raises(ImageRejected):
+        inspect_image(png, max_pixels=299)
+
+
+def test_read_capped_stops_at_the_limit():
+    consumed = []
+
+    async def chunks():
+        for i in range(100):
+            consumed.append(i)
+            yield b"x" * 10
+
+    with pytest.raises(ImageRejected) as exc_info:
+        asyncio.run(read_capped(chunks(), limit=25))
+    assert exc_info.value.too_large
+    assert len(consumed) == 3
+    assert asyncio.run(read_capped(chunks(), limit=1000)) == b"x" * 1000
+
+
+def test_decode_base64_rejects_by_length_before_decoding():
+    assert decode_base64_capped(base64.b64encode(b"abc" * 10), limit=30) == b"abc" * 10
+    with pytest.raises(ImageRejected):
+        decode_base64_capped(base64.b64encode(b"abc" * 11), limit=30)
+    with pytest.raises(ImageRejected):
+        decode_base64_capped(None)
+
+
+def test_raw_image_route(monkeypatch, make_png):
+    _fake_ocr(monkeypatch)
+    response = client.post("/appointments/image", content=make_png("maroon"), headers={"Content-Type": "image/png"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ok"
+    assert data["pipeline"]["ocr"]["confidence"] == 0.9
+    assert data["appointment"]["department"] == "Dentistry"
+
+    response = client.post("/appointments/image", content=make_png("maroon"), headers={"Content-Type": "application/octet-stream"})
+    assert response.status_code == 200
+
+
+def test_raw_image_route_rejections(monkeypatch, make_png):
+    _fake_ocr(monkeypatch)
+    response = client.post("/appointments/image", content=make_png(), headers={"Content-Type": "text/plain"})
+    assert response.status_code == 415
+
+    response = client.post("/appointments/image", content=b"plain text, not a PNG", headers={"Content-Type": "image/png"})
+    assert response.status_code == 400
+    assert response.json()["reason"] == "Unsupported image type"
+
+    monkeypatch.setattr("src.core.config.settings.IMAGE_MAX_BYTES", 100)
+    response = client.post("/appointments/image", content=make_png(size=(400, 400)), headers={"Content-Type": "image/png"})
+    assert response.status_code == 413
+
+
+def test_oversized_uploads_are_rejected_on_legacy_routes(monkeypatch, make_png):
+    _fake_ocr(monkeypatch)
+    monkeypatch.setattr("src.core.config.settings.IMAGE_MAX_BYTES", 100)
+    big = make_png(size=(400, 400))
+
+    response = client.post("/appointments", files={"image": ("card.png", big, "image/png")})
+    assert response.status_code == 400
+    assert response.json()["reason"].startswith("Image exceeds")
+
+    response = client.post("/appointments", json={"image_base64": base64.b64encode(big).decode("utf-8")})
+    assert response.status_code == 400
+    assert response.json()["reason"].startswith("Image exceeds")
+
+
+def test_oversized_multipart_bodies_are_refused_before_parsing(monkeypatch):
+    _fake_ocr(monkeypatch)
+    monkeypatch.setattr("src.core.config.settings.IMAGE_MAX_BYTES", 1000)
+    monkeypatch.setattr("src.core.config.settings.IMAGE_FORM_OVERHEAD", 500)
+
+    response = client.post("/appointments", files={"image": ("card.png", b"\x89PNG" + b"\0" * 4000, "image/png")})
+    assert response.status_code == 413
+    assert response.json()["message"] == "Request body exceeds 1500 bytes"
+
+    # No Content-Length: counted while it streams in
+    boundary = "limit"
+    head = f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="a.png"\r\nContent-Type: image/png\r\n\r\n'.encode()
+
+    async def body():
+        yield head
+        for _ in range(10):
+            yield b"\0" * 400
+        yield f"\r\n--{boundary}--\r\n".encode()
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            return await c.post("/appointments", content=body(), headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+
+    streamed = asyncio.run(main())
+    assert streamed.status_code == 413
+    assert streamed.json()["message"] == "Request body exceeds 1500 bytes"
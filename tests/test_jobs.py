@@ -0,0 +1,115 @@
+import asyncio
+import base64
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.services.job_store import JobStoreFull, MemoryJobStore
+from src.services.ocr_cache import ocr_cache
+from src.services.ocr_service import OCRService
+
+
+def test_text_job_completes_with_the_usual_result():
+    with TestClient(app) as client:
+        response = client.post("/appointments/jobs", json={"text": "Book dentist tomorrow at 3pm"})
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status"] == "queued"
+        assert response.headers["location"].endswith(f"/appointments/jobs/{job['job_id']}")
+
+        done = client.get(f"/appointments/jobs/{job['job_id']}?wait=5").json()
+        assert done["status"] == "completed"
+        assert done["status_code"] == 200
+        assert done["result"]["appointment"]["department"] == "Dentistry"
+        assert "pipeline" in done["result"]
+        assert 'appointment_jobs{status="finished"}' in client.get("/metrics").text
+
+
+def test_image_job_runs_in_background_and_long_poll_waits(monkeypatch, make_png):
+    release = threading.Event()
+
+    def slow_extract(self, b):
+        release.wait(5)
+        return {"raw_text": "book dentist tomorrow at 3 PM", "confidence": 0.9}
+
+    monkeypatch.setattr(OCRService, "extract_text_from_bytes", slow_extract)
+    ocr_cache.clear()
+    payload = {"image_base64": base64.b64encode(make_png("coral")).decode("utf-8")}
+    with TestClient(app) as client:
+        started = time.perf_counter()
+        job_id = client.post("/appointments/jobs", json=payload).json()["job_id"]
+        assert time.perf_counter() - started < 2
+
+        pending = client.get(f"/appointments/jobs/{job_id}?wait=0.05").json()
+        assert pending["status"] in ("queued", "running")
+        assert "result" not in pending
+
+        threading.Timer(0.1, release.set).start()
+        done = client.get(f"/appointments/jobs/{job_id}?wait=5").json()
+        assert done["status"] == "completed"
+        assert done["result"]["pipeline"]["ocr"]["confidence"] == 0.9
+
+
+def test_job_input_errors_are_immediate_and_unknown_jobs_404():
+    with TestClient(app) as client:
+        assert client.post("/appointments/jobs", json={}).status_code == 422
+        assert client.post("/appointments/jobs", json={"text": "x", "image_base64": "eA=="}).status_code == 400
+        response = client.get("/appointments/jobs/nope")
+        assert response.status_code == 404
+        assert response.json()["status"] == "error"
+
+
+def test_failed_job_reports_500(monkeypatch, make_png):
+    def broken_extract(self, b):
+        raise RuntimeError("engine crashed")
+
+    monkeypatch.setattr(OCRService, "extract_text_from_bytes", broken_extract)
+    ocr_cache.clear()
+    payload = {"image_base64": base64.b64encode(make_png("plum")).decode("utf-8")}
+    with TestClient(app) as client:
+        job_id = client.post("/appointments/jobs", json=payload).json()["job_id"]
+        done = client.get(f"/appointments/jobs/{job_id}?wait=5").json()
+    assert done["status"] == "failed"
+    assert done["status_code"] == 500
+
+
+def test_memory_store_bounds_pending_and_evicts_finished_first():
+    store = MemoryJobStore(max_entries=3, max_pending=2, ttl=None)
+    a = store.create("text")
+    store.create("text")
+    with pytest.raises(JobStoreFull):
+        store.create("text")
+
+    store.start(a.id)
+    store.finish(a.id, 200, {"status": "ok"})
+    c = store.create("text")
+    assert store.stats()["finished"] == 1
+    # Full: the finished job makes way, the two unfinished ones stay
+    store.finish(c.id, 200, {"status": "ok"})
+    store.create("text")
+    assert store.get(a.id) is None
+    assert store.stats()["evicted"] == 1
+    assert store.stats()["rejected"] == 1
+
+
+def test_memory_store_expires_results_and_wakes_waiters():
+    store = MemoryJobStore(max_entries=10, max_pending=10, ttl=0.05)
+    job = store.create("image")
+
+    async def finish_later():
+        await asyncio.sleep(0.05)
+        store.finish(job.id, 400, {"status": "needs_clarification"})
+
+    async def main():
+        asyncio.ensure_future(finish_later())
+        return await store.wait(job.id, timeout=5)
+
+    done = asyncio.run(main())
+    assert done.status == "completed"
+    assert done.to_dict()["status_code"] == 400
+    time.sleep(0.06)
+    assert store.get(job.id) is None
+    assert store.stats()["expired"] == 1
@@ -0,0 +1,79 @@
+import base64
+from io import BytesIO
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from src.main import app
+from src.services.metrics import Counter, Histogram, metrics
+from src.services.ocr_cache import ocr_cache
+from src.services.ocr_service import OCRService
+
+
+client = TestClient(app)
+
+
+def test_histogram_buckets_are_cumulative():
+    hist = Histogram("demo_seconds", "Demo.", ("stage",), buckets=(0.01, 0.1))
+    hist.observe(0.005, "ocr")
+    hist.observe(0.05, "ocr")
+    hist.observe(3.0, "ocr")
+    samples = hist.samples()
+    assert 'demo_seconds_bucket{stage="ocr",le="0.01"} 1' in samples
+    assert 'demo_seconds_bucket{stage="ocr",le="0.1"} 2' in samples
+    assert 'demo_seconds_bucket{stage="ocr",le="+Inf"} 3' in samples
+    assert 'demo_seconds_count{stage="ocr"} 3' in samples
+    assert hist.count("ocr") == 3
+
+
+def test_counter_escapes_label_values():
+    counter = Counter("demo_total", "Demo.", ("input",))
+    counter.inc('a"b')
+    counter.inc('a"b', amount=2)
+    assert counter.samples() == ['demo_total{input="a\\"b"} 3']
+
+
+def test_text_request_counts_and_timings():
+    before = metrics.requests.value("single", "text", "ok")
+    response = client.post("/appointments?timings=true", json={"text": "Book dentist tomorrow at 3pm"})
+    assert response.status_code == 200
+    timings = response.json()["timings"]
+    for stage in ("body_parse", "ingest", "clean", "extract", "guardrails", "normalize", "score", "total"):
+        assert timings[stage] >= 0
+    assert "ocr" not in timings
+    assert metrics.requests.value("single", "text", "ok") == before + 1
+
+    before = metrics.requests.value("single", "text", "needs_clarification")
+    response = client.post("/appointments", json={"text": "Let's meet next week."})
+    assert "timings" not in response.json()
+    assert metrics.requests.value("single", "text", "needs_clarification") == before + 1
+
+
+def test_image_request_reports_worker_steps(monkeypatch):
+    def fake_recognize(self, image, **options):
+        return {"raw_text": "book dentist tomorrow at 3 PM", "confidence": 0.9}
+
+    monkeypatch.setattr(OCRService, "extract_text_with_confidence", fake_recognize)
+    ocr_cache.clear()
+    buf = BytesIO()
+    Image.new("RGB", (40, 20), "white").save(buf, format="PNG")
+    payload = {"image_base64": base64.b64encode(buf.getvalue()).decode("utf-8")}
+    response = client.post("/appointments?timings=1", json=payload, headers={"Cache-Control": "no-store"})
+    assert response.status_code == 200
+    timings = response.json()["timings"]
+    for step in ("base64_decode", "image_decode", "preprocess_grayscale", "ocr_tier_fast", "ocr"):
+        assert step in timings
+    assert any(step.startswith("ocr_") for step in timings)
+
+
+def test_metrics_endpoint_exposes_prometheus_text():
+    client.post("/appointments", json={"text": "Book dentist tomorrow at 3pm"})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert "# TYPE appointment_stage_duration_seconds histogram" in body
+    assert 'appointment_stage_duration_seconds_count{stage="extract"}' in body
+    assert 'appointment_requests_total{route="single",input="text",status="ok"}' in body
+    assert "# TYPE ocr_in_flight gauge" in body
+    assert 'ocr_jobs_total{outcome="rejected"}' in body
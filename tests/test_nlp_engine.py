@@ -0,0 +1,169 @@
+import json
+from datetime import date
+
+import pytest
+
+import tests.legacy_nlp as legacy
+from benchmarks.bench_nlp_engine import long_dump
+from src.services import nlp_service
+from src.services.nlp_service import TextScanner, DEPARTMENT_SYNONYMS, analyze_text
+
+
+SAMPLES = [
+    "",
+    "Book dentist next Friday at 3pm",
+    "book dentist nxt friday @ 3pm",
+    "Appointment with Dr. Rao on March 3rd, 2024 at l0:30 AM for cardio",
+    "see derm tmr at 9",
+    "Neurology this Sunday 7 pm, ortho tomorrow",
+    "dentistry 12:30am dental",
+    "with Alice, today 3Pm",
+    "café with Zoë on June 5th at 4 PM neuro",
+    "meeting at 10 next week",
+    long_dump(4096),
+    long_dump(2048, seed=11) + "\nfollow up nxt monday @ 11 am dentist",
+]
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_engine_matches_legacy(text):
+    cleaned = nlp_service.normalize_ocr_noise(text)
+    assert cleaned == legacy.normalize_ocr_noise(text)
+    assert nlp_service.extract_entities(text) == legacy.extract_entities(text)
+
+    entities = nlp_service.extract_entities(cleaned)
+    assert entities == legacy.extract_entities(cleaned)
+    assert nlp_service.score_entities(entities, 0.8) == legacy.score_entities(entities, 0.8)
+
+    normalized = nlp_service.normalize_entities(entities)
+    assert nlp_service.score_normalization(entities, normalized) == legacy.score_normalization(entities, normalized)
+
+
+@pytest.mark.parametrize("text", [
+    "İstanbul office: dentist next Friday at 3pm",
+    "Straße 5 — with Zoë, March 3rd at 10 AM cardio",
+    "thıs friday at 3 PM, ſee derm",
+    "Termin \u212ateine tomorrow at \u0663 PM",
+    "ΣΊΣΥΦΟΣ with Ana on june 5th at 4pm neuro",
+])
+def test_non_ascii_matches_legacy(text):
+    # Anchors are found in a lower-cased copy with the same offsets as the text
+    assert nlp_service.extract_entities(text) == legacy.extract_entities(text)
+
+
+def test_events_do_not_hide_overlapping_matches():
+    scanner = TextScanner(DEPARTMENT_SYNONYMS)
+    fields = [field for field, _, _ in scanner.events("see cardio at 3 PM")]
+    assert fields == ["department", "time_at", "time_meridiem"]
+
+
+def test_analyze_text_combines_stages():
+    result = analyze_text("Book dentist nxt Friday@3pm", ocr_confidence=0.9)
+    assert result["cleaned"] == "book dentist next friday at 3pm"
+    assert result["entities"]["date_phrase"] == "next friday"
+    assert result["entities"]["department"] == "Dentistry"
+    assert result["entities_confidence"] == legacy.score_entities(result["entities"], 0.9)
+
+
+@pytest.mark.parametrize("text", [
+    "Book cardiolgy on March 10 at 3 PM",
+    "dermatol0gy tomorrow at 9 am, then cardiolgy",
+    "café: cardiolgy tomorrow at 9 am",
+    "Patient copy - retain for your records\n" * 20 + "cardiolgy at 3 PM",
+], ids=["short", "two-misreads", "non-ascii", "long"])
+def test_misread_department_matches_within_edit_distance(text):
+    entities = nlp_service.extract_entities(text)
+    # Two misreads at the same distance: the one earlier in the synonym table wins
+    assert entities["department"] == "Cardiology"
+    assert entities["department_distance"] == 1
+
+
+def test_exact_department_wins_over_closer_misread():
+    entities = nlp_service.extract_entities("dermatology, or was it cardiolgy")
+    assert entities["department"] == "Dermatology"
+    assert "department_distance" not in entities
+
+
+def test_short_synonyms_match_exactly():
+    # "dental" and "cardio" are too short to match "rental" or "cardia"
+    assert nlp_service.extract_entities("rental car tomorrow at 9 am")["department"] is None
+    assert nlp_service.extract_entities("cardia tomorrow at 9 am")["department"] is None
+    assert nlp_service.canonical_department("Cardiolgy") == "Cardiology"
+    assert nlp_service.canonical_department("xyz cardiology") is None
+
+
+def test_fuzzy_match_scores_lower():
+    exact = nlp_service.extract_entities("cardiology tomorrow at 9 am")
+    misread = nlp_service.extract_entities("cardiolgy tomorrow at 9 am")
+    assert nlp_service.score_entities(misread, 0.9) < nlp_service.score_entities(exact, 0.9)
+
+
+def test_large_synonym_table_from_file(tmp_path):
+    table = {f"clinic{i:05d}": f"Clinic {i}" for i in range(5000)}
+    table["paediatrics"] = "Pediatrics"
+    path = tmp_path / "departments.json"
+    path.write_text(json.dumps(table))
+
+    scanner = TextScanner({**DEPARTMENT_SYNONYMS, **nlp_service.load_department_synonyms(str(path))})
+    assert scanner.extract("clinic04321 tomorrow at 9 am")["department"] == "Clinic 4321"
+    assert scanner.extract("peadiatrics tomorrow at 9 am")["department"] == "Pediatrics"
+    assert scanner.extract("café peadiatrics at 9 am")["department"] == "Pediatrics"
+    assert scanner.extract("dentist tomorrow at 9 am")["department"] == "Dentistry"
+
+    path.write_text(json.dumps(["not", "a", "table"]))
+    with pytest.raises(ValueError):
+        nlp_service.load_department_synonyms(str(path))
+
+
+def test_extract_appointments_groups_mentions_by_position():
+    text = nlp_service.normalize_ocr_noise(
+        "Cardiology next Monday 10am, Dermatology March 3rd 4:30pm. "
+        "Neuro review with Dr. Rao at 3 PM tmr; march 10 at 10 PM dental"
+    )
+    found = nlp_service.extract_appointments(text, ocr_confidence=0.9, ref_date=date(2026, 1, 5))
+    assert [(a["entities"]["department"], a["normalized"]["date"], a["normalized"]["time"]) for a in found] == [
+        ("Cardiology", "2026-01-12", "10:00"),
+        ("Dermatology", "2026-03-03", "16:30"),
+        ("Neurology", "2026-01-06", "15:00"),
+        ("Dentistry", "2026-03-10", "22:00"),
+    ]
+    for a in found:
+        assert text[slice(*a["span"])] == a["text"]
+        assert a["entities_confidence"] == nlp_service.score_entities(a["entities"], 0.9)
+
+    # One appointment: the same entities as extract_entities
+    single = "book dentist next friday at 3pm"
+    [only] = nlp_service.extract_appointments(single)
+    assert only["entities"] == nlp_service.extract_entities(single)
+
+
+def test_extract_appointments_flags_incomplete_candidates():
+    found = nlp_service.extract_appointments("neurology this sunday 7 pm, ortho tomorrow, see you")
+    assert [a["clarification"] for a in found] == [None, "Ambiguous time provided."]
+    assert found[1]["normalized"] is None
+    assert nlp_service.extract_appointments("fees once paid are non refundable") == []
+
+
+def test_extract_appointments_does_not_borrow_fields_across_separators():
+    found = nlp_service.extract_appointments("monday 10am cardiology, march 3 4:30pm dermatology", ref_date=date(2026, 1, 5))
+    assert [(a["entities"]["department"], a["entities"]["date_phrase"], a["entities"]["time_phrase"]) for a in found] == [
+        ("Cardiology", None, "10am"),
+        ("Dermatology", "march 3", "4:30pm"),
+    ]
+    assert found[0]["clarification"] == "Ambiguous date provided."
+
+    # A department on its own line still heads the visit listed under it
+    sheet = nlp_service.normalize_ocr_lines("Cardiology\nnext Monday 10am\n\nDermatology\nMarch 3rd  4:30pm")
+    found = nlp_service.extract_appointments(sheet, ref_date=date(2026, 1, 5))
+    assert [(a["entities"]["department"], a["normalized"]["date"]) for a in found] == [("Cardiology", "2026-01-12"), ("Dermatology", "2026-03-03")]
+
+
+def test_canonical_department_knows_synonyms_from_file(tmp_path, monkeypatch):
+    path = tmp_path / "departments.json"
+    path.write_text(json.dumps({"Heart Clinic": "Cardiology", "ENT": "Otolaryngology"}))
+    table = {**DEPARTMENT_SYNONYMS, **nlp_service.load_department_synonyms(str(path))}
+    monkeypatch.setattr(nlp_service, "_SCANNER", TextScanner(table))
+
+    assert nlp_service.extract_entities("ent tomorrow at 9 am")["department"] == "Otolaryngology"
+    assert nlp_service.canonical_department("heart clinic") == "Cardiology"
+    assert nlp_service.canonical_department(" ENT ") == "Otolaryngology"
@@ -0,0 +1,72 @@
+import pytest
+from PIL import Image
+from src.services.ocr_backends import EasyOCRBackend, OCRBackend, TesseractBackend, get_backend
+from src.services.ocr_service import OCRService
+
+
+def test_tesseract_backend_uses_single_pass(monkeypatch):
+    calls = []
+
+    def fake_image_to_data(image, lang=None, config="", output_type=None):
+        calls.append("data")
+        return {
+            "block_num": [1, 1, 1, 1, 1],
+            "par_num": [1, 1, 1, 1, 1],
+            "line_num": [0, 1, 1, 2, 2],
+            "text": ["", "Dentist", "tomorrow", "at", "3pm"],
+            "conf": [-1, 90, 80, 70, 60],
+        }
+
+    def fail_image_to_string(*args, **kwargs):
+        raise AssertionError("image_to_string must not run")
+
+    monkeypatch.setattr("pytesseract.image_to_data", fake_image_to_data)
+    monkeypatch.setattr("pytesseract.image_to_string", fail_image_to_string)
+
+    result = TesseractBackend(lang="eng").recognize(Image.new("L", (4, 4)))
+    assert calls == ["data"]
+    assert result == {"raw_text": "Dentist tomorrow\nat 3pm", "confidence": 0.75}
+
+
+def test_easyocr_backend_loads_model_once(monkeypatch):
+    loads = []
+
+    class FakeReader:
+        def readtext(self, array, detail=1, paragraph=False):
+            return [
+                ([[0, 40], [10, 40], [10, 50], [0, 50]], "3pm", 0.8),
+                ([[0, 0], [10, 0], [10, 10], [0, 10]], "Cardiology", 0.9),
+            ]
+
+    def fake_load(self):
+        loads.append(1)
+        return FakeReader()
+
+    monkeypatch.setattr(EasyOCRBackend, "_load_reader", fake_load)
+    backend = EasyOCRBackend(langs=["en"], gpu=False)
+    image = Image.new("L", (4, 4))
+    first = backend.recognize(image)
+    backend.recognize(image)
+    assert loads == [1]
+    assert first == {"raw_text": "Cardiology 3pm", "confidence": 0.85}
+
+
+def test_get_backend_is_resident_and_validates_name():
+    assert get_backend("tesseract") is get_backend("tesseract")
+    with pytest.raises(ValueError):
+        get_backend("nope")
+
+
+def test_ocr_service_delegates_to_backend():
+    class FakeBackend(OCRBackend):
+        name = "fake"
+
+        def recognize(self, image, psm=None, lines=False):
+            return {"raw_text": f"{image.mode} {image.size[0]}x{image.size[1]}", "confidence": 0.5}
+
+    from io import BytesIO
+
+    buf = BytesIO()
+    Image.new("RGB", (8, 6), "white").save(buf, format="PNG")
+    result = OCRService(backend=FakeBackend(), cascade=["full"]).extract_text_from_bytes(buf.getvalue())
+    assert result == {"raw_text": "L 8x6", "confidence": 0.5, "tier": "full"}
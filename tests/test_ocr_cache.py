@@ -0,0 +1,94 @@
+import asyncio
+import base64
+import os
+from fastapi.testclient import TestClient
+from src.main import app
+from src.services.ocr_cache import OCRCache, SQLiteOCRStore, cache_key, ocr_cache
+from src.services.ocr_service import OCRService
+from src.utils.cache import LRUCache
+
+
+client = TestClient(app)
+
+
+def test_lru_cache_evicts_and_expires(monkeypatch):
+    cache = LRUCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.evictions == 1
+
+    import src.utils.cache as cache_module
+    now = cache_module.time.monotonic()
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now + 11)
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+
+
+def test_cache_key_depends_on_content_and_settings():
+    assert cache_key(b"card") == cache_key(b"card")
+    assert cache_key(b"card") != cache_key(b"card2")
+    assert cache_key(b"card", fingerprint="eng") != cache_key(b"card", fingerprint="hin")
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    path = os.path.join(tmp_path, "ocr.sqlite3")
+    result = {"raw_text": "dentist tomorrow at 3pm", "confidence": 0.91}
+
+    first = OCRCache(max_entries=4, ttl=60, path=path)
+    asyncio.run(first.set("k", result))
+    first.disk.close()
+
+    second = OCRCache(max_entries=4, ttl=60, path=path)
+    assert asyncio.run(second.get("k")) == result
+    assert second.stats()["disk_hits"] == 1
+    # promoted into memory, so the next lookup does not touch SQLite
+    assert asyncio.run(second.get("k")) == result
+    assert second.stats()["memory_hits"] == 1
+    second.disk.close()
+
+
+def test_disk_tier_is_size_bounded(tmp_path):
+    cache = OCRCache(max_entries=1, ttl=60, path=os.path.join(tmp_path, "ocr.sqlite3"), disk_max_entries=2)
+    for i in range(4):
+        asyncio.run(cache.set(f"k{i}", {"raw_text": str(i), "confidence": 1.0}))
+    assert cache.stats()["disk_evictions"] == 2
+    cache.disk.close()
+
+
+def test_disk_tier_is_trimmed_every_few_inserts(tmp_path):
+    store = SQLiteOCRStore(os.path.join(tmp_path, "ocr.sqlite3"), max_entries=2, prune_every=3)
+    for i in range(3):
+        store.set(f"k{i}", {"raw_text": str(i)})
+    assert store.evictions == 1
+    store.set("k3", {"raw_text": "3"})
+    # Over the limit until the next trim
+    assert store.evictions == 1
+    assert store.get("k3") == {"raw_text": "3"}
+    store.close()
+
+
+def test_api_reuses_cached_ocr_and_honours_no_cache(monkeypatch, make_png):
+    calls = []
+
+    def fake_extract(self, b):
+        calls.append(b)
+        return {"raw_text": "cardiology tomorrow at 10am", "confidence": 0.9}
+
+    monkeypatch.setattr(OCRService, "extract_text_from_bytes", fake_extract)
+    ocr_cache.clear()
+    payload = {"image_base64": base64.b64encode(make_png("teal")).decode("utf-8")}
+
+    assert client.post("/appointments", json=payload).status_code == 200
+    assert client.post("/appointments", json=payload).status_code == 200
+    assert len(calls) == 1
+
+    response = client.post("/appointments", json=payload, headers={"Cache-Control": "no-cache"})
+    assert response.status_code == 200
+    assert len(calls) == 2
+
+    stats = client.get("/ocr/stats").json()["cache"]
+    assert stats["hits"] >= 1
+    assert stats["bypassed"] >= 1
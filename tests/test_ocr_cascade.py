@@ -0,0 +1,144 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from src.services.ocr_backends import OCRBackend, TesseractBackend
+from src.services.ocr_cascade import assess, date_time_crop, parse_tiers
+from src.services.ocr_service import OCRService, last_timings
+
+
+def _png(size=(1200, 800)):
+    buf = BytesIO()
+    Image.new("RGB", size, "white").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+ALL_TIERS = ["fast", "full", "sparse", "crop"]
+
+
+class ScriptedBackend(OCRBackend):
+    """Answers each call from ``script`` in order and records the psm and image size it got."""
+
+    name = "scripted"
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = []
+
+    def recognize(self, image, psm=None, lines=False):
+        self.calls.append((psm, image.size))
+        return dict(self.script.pop(0))
+
+
+def test_confident_fast_tier_answers_alone():
+    backend = ScriptedBackend([{"raw_text": "Dentist tomorrow at 3 PM", "confidence": 0.9}])
+    result = OCRService(backend=backend).extract_text_from_bytes(_png())
+    assert result == {"raw_text": "Dentist tomorrow at 3 PM", "confidence": 0.9, "tier": "fast", "tiers_tried": ["fast"]}
+    psm, size = backend.calls[0]
+    assert psm == 6 and max(size) <= 1000
+    timings = last_timings()
+    assert "ocr_tier_fast" in timings and "ocr_tier_full" not in timings
+
+
+def test_missing_time_escalates_to_a_crop_of_the_date_line():
+    garbled = {
+        "raw_text": "Dentist\ntomorow at 3 P M",
+        "confidence": 0.5,
+        "lines": [{"text": "Dentist", "box": [10, 10, 200, 40]}, {"text": "tomorow at 3 P M", "box": [10, 60, 300, 90]}],
+    }
+    backend = ScriptedBackend([garbled, garbled, garbled, {"raw_text": "tomorrow at 3 PM", "confidence": 0.8}])
+    result = OCRService(backend=backend, cascade=ALL_TIERS).extract_text_from_bytes(_png())
+    assert result["tier"] == "crop"
+    assert result["tiers_tried"] == ["fast", "full", "sparse", "crop"]
+    assert result["raw_text"].startswith("tomorrow at 3 PM\n")
+    assert "lines" not in result
+    assert [psm for psm, _ in backend.calls] == [6, None, 11, 6]
+    # The crop is the padded date/time line, enlarged
+    crop_w, crop_h = backend.calls[3][1]
+    assert crop_w < 1200 and crop_h > 30
+
+
+def test_best_attempt_answers_when_no_tier_is_confident():
+    backend = ScriptedBackend([
+        {"raw_text": "Dentist", "confidence": 0.9},
+        {"raw_text": "Dentist tomorrow at 3", "confidence": 0.3},
+        {"raw_text": "Dentist", "confidence": 0.9},
+    ])
+    result = OCRService(backend=backend, cascade=ALL_TIERS).extract_text_from_bytes(_png())
+    # crop is skipped: no line boxes to cut from
+    assert result["tiers_tried"] == ["fast", "full", "sparse"]
+    assert result["tier"] == "full"
+    assert result["raw_text"] == "Dentist tomorrow at 3"
+
+
+def test_nothing_appointment_like_stops_after_full():
+    backend = ScriptedBackend([{"raw_text": "", "confidence": 0.0}, {"raw_text": "Fees are non refundable", "confidence": 0.8}])
+    result = OCRService(backend=backend, cascade=ALL_TIERS).extract_text_from_bytes(_png())
+    assert result["tiers_tried"] == ["fast", "full"]
+    assert len(backend.calls) == 2
+
+
+def test_multiple_mode_judges_tiers_per_appointment():
+    sheet = "Cardiology March 16th at 10 AM\nDermatology March 18th\nNeurology March 20th at 4 PM"
+    fixed = "Cardiology March 16th at 10 AM\nDermatology March 18th at 11 AM\nNeurology March 20th at 4 PM"
+    assert assess({"raw_text": sheet})[0]
+    # One appointment of the sheet still lacks its time: a multi-appointment run reads on
+    assert not assess({"raw_text": sheet}, multiple=True)[0]
+    assert assess({"raw_text": fixed}, multiple=True)[0]
+    assert assess({"raw_text": ""}, multiple=True) == (False, 0.0)
+
+    backend = ScriptedBackend([{"raw_text": sheet, "confidence": 0.9}, {"raw_text": fixed, "confidence": 0.9}])
+    assert OCRService(backend=backend, cascade=["fast", "full"]).extract_text_from_bytes(_png())["tier"] == "fast"
+    backend = ScriptedBackend([{"raw_text": sheet, "confidence": 0.9}, {"raw_text": fixed, "confidence": 0.9}])
+    assert OCRService(backend=backend, cascade=["fast", "full"], multiple=True).extract_text_from_bytes(_png())["tier"] == "full"
+
+
+def test_single_tier_is_one_plain_pass():
+    backend = ScriptedBackend([{"raw_text": "nothing useful", "confidence": 0.1}])
+    result = OCRService(backend=backend, cascade=["full"]).extract_text_from_bytes(_png())
+    assert result == {"raw_text": "nothing useful", "confidence": 0.1, "tier": "full"}
+    assert backend.calls == [(None, (1200, 800))]
+
+
+def test_parse_tiers_validates():
+    assert parse_tiers("") == ("full",)
+    assert parse_tiers(" Fast , full ") == ("fast", "full")
+    with pytest.raises(ValueError):
+        parse_tiers("fast,turbo")
+    with pytest.raises(ValueError):
+        parse_tiers("crop,full")
+
+
+def test_date_time_crop_skips_regions_covering_most_of_the_image():
+    image = Image.new("L", (400, 200), 255)
+    assert date_time_crop(image, [{"text": "Dentistry", "box": [0, 0, 100, 20]}]) is None
+    assert date_time_crop(image, [{"text": "at 3pm", "box": [0, 0, 400, 200]}]) is None
+    crop = date_time_crop(image, [{"text": "at 3pm", "box": [50, 50, 150, 70]}])
+    assert crop.size == (round(122 * 3.0), round(42 * 3.0))
+
+
+def test_tesseract_backend_passes_psm_and_returns_line_boxes(monkeypatch):
+    seen = {}
+
+    def fake_image_to_data(image, lang=None, config="", output_type=None):
+        seen["config"] = config
+        return {
+            "block_num": [1, 1, 1],
+            "par_num": [1, 1, 1],
+            "line_num": [1, 1, 2],
+            "text": ["Dentist", "tomorrow", "3pm"],
+            "conf": [90, 80, 70],
+            "left": [10, 80, 10],
+            "top": [12, 10, 40],
+            "width": [60, 70, 30],
+            "height": [20, 22, 20],
+        }
+
+    monkeypatch.setattr("pytesseract.image_to_data", fake_image_to_data)
+    result = TesseractBackend(lang="eng", config="--oem 1").recognize(Image.new("L", (4, 4)), psm=11, lines=True)
+    assert seen["config"] == "--oem 1 --psm 11"
+    assert result["lines"] == [
+        {"text": "Dentist tomorrow", "box": [10, 10, 150, 32]},
+        {"text": "3pm", "box": [10, 40, 40, 60]},
+    ]
@@ -0,0 +1,154 @@
+import asyncio
+import base64
+import threading
+import pytest
+from fastapi.testclient import TestClient
+from src.main import app
+from src.services.ocr_executor import OCRClientDisconnected, OCRExecutor, OCRQueueFull, OCRTimeout, OCRWorkerError, _portable
+from src.services.ocr_service import OCRService
+
+
+client = TestClient(app)
+
+
+def test_executor_runs_ocr_off_loop(monkeypatch):
+    caller = threading.get_ident()
+    seen = {}
+
+    def fake_extract(self, b):
+        seen["thread"] = threading.get_ident()
+        return {"raw_text": b.decode(), "confidence": 0.8}
+
+    monkeypatch.setattr(OCRService, "extract_text_from_bytes", fake_extract)
+    executor = OCRExecutor(workers=2, max_queue=2, timeout=5, kind="thread")
+    try:
+        result = asyncio.run(executor.run(b"cardiology tomorrow at 10am"))
+    finally:
+        executor.shutdown()
+    assert result == {"raw_text": "cardiology tomorrow at 10am", "confidence": 0.8}
+    assert seen["thread"] != caller
+    stats = executor.stats()
+    assert stats["completed"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_executor_rejects_when_queue_full(monkeypatch):
+    release = threading.Event()
+
+    def blocking_extract(self, b):
+        release.wait(5)
+        return {"raw_text": "", "confidence": 0.0}
+
+    monkeypatch.setattr(OCRService, "extract_text_from_bytes", blocking_extract)
+    executor = OCRExecutor(workers=1, max_queue=1, timeout=5, kind="thread")
+    try:
+        executor.submit(b"a")
+        executor.submit(b"b")
+        stats = executor.stats()
+        assert stats["running"] == 1
+        assert stats["queued"] == 1
+        with pytest.raises(OCRQueueFull):
+            executor.submit(b"c")
+        assert executor.stats()["rejected"] == 1
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_executor_times_out(monkeypatch):
+    release = threading.Event()
+
+    def slow_extract(self, b):
+        release.wait(5)
+        return {"raw_text": "", "confidence": 0.0}
+
+    monkeypatch.setattr(OCRService, "extract_text_from_bytes", slow_extract)
+    executor = OCRExecutor(workers=1, max_queue=1, timeout=0.05, kind="thread")
+    try:
+        with pytest.raises(OCRTimeout):
+            asyncio.run(executor.run(b"x"))
+        assert executor.stats()["timed_out"] == 1
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+class EngineMissing(EnvironmentError):
+    # Like pytesseract's TesseractNotFoundError: unpickling calls __init__ with an argument it does not take
+    def __init__(self):
+        super().__init__("engine is not installed")
+
+
+def test_worker_errors_reach_the_server_picklable(monkeypatch):
+    def broken():
+        raise EngineMissing()
+
+    # Process workers: an error that cannot be unpickled must not break the pool
+    with pytest.raises(OCRWorkerError, match="EngineMissing: engine is not installed"):
+        _portable(broken)
+    # Errors that pickle are passed on unchanged
+    with pytest.raises(ZeroDivisionError):
+        _portable(lambda: 1 / 0)
+
+    # Thread workers need no pickling
+    monkeypatch.setattr(OCRService, "extract_text_from_bytes", lambda self, b: broken())
+    executor = OCRExecutor(workers=1, max_queue=1, kind="thread")
+    try:
+        with pytest.raises(EngineMissing):
+            asyncio.run(executor.run(b"x"))
+    finally:
+        executor.shutdown()
+
+
+def test_process_pool_survives_a_failed_warm_up():
+    # Without the OCR engine installed warm-up fails in the worker, but the pool stays usable
+    executor = OCRExecutor(workers=1, max_queue=1, kind="process")
+    try:
+        first = asyncio.run(executor.warm_up())
+        assert "BrokenProcessPool" not in (executor.warm_up_error or "")
+        assert asyncio.run(executor.warm_up()) == first
+    finally:
+        executor.shutdown()
+
+
+def test_executor_cancels_queued_job_on_disconnect(monkeypatch):
+    release = threading.Event()
+
+    def blocking_extract(self, b):
+        release.wait(5)
+        return {"raw_text": "", "confidence": 0.0}
+
+    class GoneRequest:
+        async def is_disconnected(self):
+            return True
+
+    monkeypatch.setattr(OCRService, "extract_text_from_bytes", blocking_extract)
+    executor = OCRExecutor(workers=1, max_queue=1, timeout=5, kind="thread")
+    try:
+        executor.submit(b"occupies the only worker")
+        with pytest.raises(OCRClientDisconnected):
+            asyncio.run(executor.run(b"queued", request=GoneRequest()))
+        assert executor.stats()["cancelled"] == 1
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_api_returns_503_when_ocr_queue_full(monkeypatch, make_png):
+    def reject(self, image_bytes, request=None):
+        raise OCRQueueFull("OCR queue is full")
+
+    monkeypatch.setattr(OCRExecutor, "run", reject)
+    payload = {"image_base64": base64.b64encode(make_png()).decode("utf-8")}
+    response = client.post("/appointments", json=payload, headers={"Cache-Control": "no-cache"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert response.json()["status"] == "error"
+
+
+def test_ocr_stats_endpoint():
+    response = client.get("/ocr/stats")
+    assert response.status_code == 200
+    stats = response.json()["executor"]
+    for key in ("workers", "in_flight", "running", "queued", "utilization", "rejected"):
+        assert key in stats
@@ -1,4 +1,5 @@
 import pytest
+from datetime import date
 from fastapi import HTTPException
 from src.pipelines.appointment_pipeline import AppointmentPipeline
 
@@ -8,7 +9,8 @@ def test_appointment_pipeline_success():
     pipeline = AppointmentPipeline()
 
     # Act
-    result = pipeline.run(input_data)
+    # Month/day without a year resolves to its next occurrence after the reference date
+    result = pipeline.run(input_data, ref_date=date(2023, 1, 5))
 
     # Assert
     assert result['status'] == 'success'
@@ -0,0 +1,166 @@
+import threading
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+from src.core.config import settings
+from src.services.ocr_service import OCRService, last_timings, tile_worker_count
+from benchmarks.corpus import a4_letter
+from src.services.preprocess import ImagePreprocessor, analyze_layout, find_text_blocks, ink_threshold, parse_steps
+
+
+def _card(width=1200, font_size=48, angle=0.0, paper=255, ink=0):
+    image = Image.new("L", (width, int(width * 0.6)), paper)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=font_size)
+    for i, line in enumerate(("Dentistry - Dr. Rao", "Next Friday at 3 PM", "Room 204")):
+        draw.text((font_size, font_size + i * int(font_size * 1.6)), line, fill=ink, font=font)
+    if angle:
+        image = image.rotate(angle, resample=Image.Resampling.BILINEAR, expand=True, fillcolor=paper)
+    return image
+
+
+def _jpeg(image):
+    buf = BytesIO()
+    image.convert("RGB").save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("angle", [-6.0, -2.5, 0.0, 4.0])
+def test_layout_recovers_skew_and_line_height(angle):
+    found_angle, line_height = analyze_layout(np.asarray(_card(angle=angle)))
+    assert found_angle == pytest.approx(angle, abs=0.25)
+    # Glyph height from cap top to baseline, somewhat under the font size
+    assert 25 <= line_height <= 48
+
+
+def test_ink_threshold_ignores_paper_noise():
+    rng = np.random.default_rng(1)
+    paper = rng.normal(180, 12, 100_000).clip(0, 255).astype(np.uint8)
+    ink = np.full(1_000, 70, dtype=np.uint8)
+    threshold = ink_threshold(np.bincount(np.concatenate([paper, ink]), minlength=256))
+    assert 90 < threshold < 140
+
+
+def test_draft_decodes_large_jpeg_small_and_gray():
+    data = _jpeg(_card(width=3200, font_size=120))
+    image = ImagePreprocessor(steps=["draft"], max_side=1000).decode(data)
+    assert image.mode == "L"
+    assert 1000 <= max(image.size) < 3200
+
+    full = ImagePreprocessor(steps=[], max_side=1000).decode(data)
+    assert full.size == (3200, 1920)
+
+
+def test_chain_downscales_deskews_and_times_each_step():
+    image = _card(width=2400, font_size=96, angle=3.0, paper=190, ink=80)
+    timings = {}
+    out = ImagePreprocessor(steps=["downscale", "deskew", "contrast", "binarize"], target_line_height=40, max_side=0).process(image, timings)
+    assert list(timings) == [
+        "preprocess_grayscale",
+        "preprocess_downscale",
+        "preprocess_deskew",
+        "preprocess_contrast",
+        "preprocess_binarize",
+    ]
+    assert out.mode == "L"
+    assert out.width < image.width * 0.75
+    angle, line_height = analyze_layout(np.asarray(out))
+    assert abs(angle) < 0.3
+    assert line_height == pytest.approx(40, abs=6)
+    assert set(np.unique(np.asarray(out))) <= {0, 255}
+
+
+def test_downscale_never_upscales_and_steps_can_be_switched_off():
+    small = _card(width=300, font_size=12)
+    assert ImagePreprocessor(steps=["downscale"], target_line_height=48, max_side=2000).downscale(small) is small
+    plain = ImagePreprocessor(steps=[])
+    timings = {}
+    assert plain.process(Image.new("RGB", (10, 10), "white"), timings).mode == "L"
+    assert list(timings) == ["preprocess_grayscale"]
+    with pytest.raises(ValueError):
+        parse_steps("draft,sharpen")
+
+
+def test_ocr_service_feeds_preprocessed_image_to_backend():
+    seen = {}
+
+    class FakeBackend:
+        name = "fake"
+
+        def recognize(self, image, **options):
+            seen["image"] = image
+            return {"raw_text": "dentist", "confidence": 0.9}
+
+    service = OCRService(backend=FakeBackend(), preprocessor=ImagePreprocessor(steps=["draft", "downscale"], max_side=800))
+    assert service.extract_text_from_bytes(_jpeg(_card(width=2000, font_size=20)))["raw_text"] == "dentist"
+    assert seen["image"].mode == "L"
+    assert max(seen["image"].size) <= 800
+    timings = last_timings()
+    assert {"image_decode", "preprocess_grayscale", "preprocess_downscale", "ocr_fake"} <= set(timings)
+
+
+def _letter():
+    return Image.open(BytesIO(a4_letter(["Cardiology - Dr. Iyer", "Monday 14 July at 10:30 AM"], dpi=150)))
+
+
+def test_text_blocks_follow_reading_order():
+    image = _letter()
+    blocks = find_text_blocks(np.asarray(image.convert("L")), max_blocks=8)
+    assert 3 <= len(blocks) <= 8
+    middle = image.width // 2
+    header, footer = blocks[0], blocks[-1]
+    body = blocks[1:-1]
+    assert header[1] < min(b[1] for b in body) and footer[1] > max(b[3] for b in body)
+    # The left column is read to the end before the right one starts
+    sides = [b[2] <= middle for b in body]
+    assert sides == sorted(sides, reverse=True) and True in sides and False in sides
+
+
+def test_large_image_is_recognized_in_tiles():
+    threads = set()
+
+    class FakeBackend:
+        name = "fake"
+
+        def recognize(self, image, psm=None, lines=False):
+            threads.add(threading.current_thread().name)
+            words = 4 if image.width > 300 else 1
+            return {
+                "raw_text": " ".join(["word"] * words),
+                "confidence": 0.9 if words == 1 else 0.4,
+                "lines": [{"text": "word", "box": [0, 0, 10, 10]}],
+            }
+
+    service = OCRService(backend=FakeBackend(), tile_workers=4, tile_min_pixels=100_000)
+    steps = {}
+    result = service._recognize(_letter().convert("L"), None, True, steps)
+    assert result["tiles"] > 1
+    assert result["raw_text"].count("\n") == result["tiles"] - 1
+    words = result["raw_text"].split("\n")
+    # Confidence is weighted by word count, not averaged per tile
+    expected = sum((0.9 if w == "word" else 0.4) * len(w.split()) for w in words) / sum(len(w.split()) for w in words)
+    assert result["confidence"] == round(expected, 2)
+    # Line boxes come back in page coordinates
+    assert any(line["box"][1] > 0 for line in result["lines"])
+    assert {"tile_layout", "ocr_fake"} <= set(steps)
+    assert all(name.startswith("ocr-tile") for name in threads)
+
+    service.tile_workers = 1
+    assert "tiles" not in service._recognize(_letter().convert("L"), None, True, {})
+
+
+def test_tile_threads_share_the_cores_with_other_ocr_workers(monkeypatch):
+    monkeypatch.setattr("os.cpu_count", lambda: 8)
+    monkeypatch.setattr(settings, "OCR_TILE_WORKERS", 0)
+    monkeypatch.setattr(settings, "OCR_WORKERS", 0)
+    # One OCR worker per core: no room left for tile threads
+    assert tile_worker_count() == 1
+    assert tile_worker_count(ocr_workers=2) == 4
+    assert tile_worker_count(ocr_workers=16) == 1
+    monkeypatch.setattr(settings, "OCR_WORKERS", 3)
+    assert tile_worker_count() == 2
+    monkeypatch.setattr(settings, "OCR_TILE_WORKERS", 6)
+    assert tile_worker_count() == 6
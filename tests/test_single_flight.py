@@ -0,0 +1,132 @@
+import asyncio
+import base64
+import threading
+import time
+
+import httpx
+import pytest
+
+from src.main import app
+from src.services.admission import IMAGE_BASE64, Lane, admission
+from src.services.ocr_executor import ocr_flights
+from src.services.ocr_service import OCRService
+from src.utils.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_run():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"raw_text": "dentist"}
+
+    async def main():
+        return await asyncio.gather(*(flights.run("k", work) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert calls == [1]
+    assert [r for r, _ in results] == [{"raw_text": "dentist"}] * 5
+    assert sorted(c for _, c in results) == [False, True, True, True, True]
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4, "abandoned": 0}
+
+    # Finished keys are forgotten: the next call runs again
+    asyncio.run(main())
+    assert calls == [1, 1]
+
+
+def test_cancelled_waiter_does_not_cancel_the_others():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(flights.run("k", work))
+        second = asyncio.ensure_future(flights.run("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == ("done", True)
+    assert flights.abandoned == 0
+
+
+def test_work_is_cancelled_when_every_waiter_leaves_and_until_only_stops_its_caller():
+    flights = SingleFlight()
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def gone():
+        await asyncio.sleep(0.01)
+        raise ConnectionError("client left")
+
+    async def main():
+        staying = asyncio.ensure_future(flights.run("k", work))
+        await asyncio.sleep(0)
+        with pytest.raises(ConnectionError):
+            await flights.run("k", work, until=gone())
+        assert not staying.done()
+        staying.cancel()
+        await asyncio.gather(staying, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert cancelled == [1]
+    assert flights.abandoned == 1
+
+
+def test_errors_reach_every_waiter():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("ocr failed")
+
+    async def main():
+        return await asyncio.gather(*(flights.run("k", work) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(main()))
+
+
+def test_identical_uploads_run_ocr_once(monkeypatch, make_png):
+    calls = []
+    lock = threading.Lock()
+
+    def slow_extract(self, b):
+        with lock:
+            calls.append(1)
+        time.sleep(0.2)
+        return {"raw_text": "book dentist tomorrow at 3 PM", "confidence": 0.9}
+
+    monkeypatch.setattr(OCRService, "extract_text_from_bytes", slow_extract)
+    # All four must be admitted at once to share the job, whatever the core count
+    monkeypatch.setitem(admission.lanes, IMAGE_BASE64, Lane(IMAGE_BASE64, limit=4, max_queue=4))
+    payload = {"image_base64": base64.b64encode(make_png("gold")).decode("utf-8")}
+    before = ocr_flights.stats()["coalesced"]
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # no-cache: the retries must share the job, not hit the cache afterwards
+            requests = [
+                client.post("/appointments", json=payload, headers={"Cache-Control": "no-cache"})
+                for _ in range(4)
+            ]
+            return await asyncio.gather(*requests)
+
+    responses = asyncio.run(main())
+    assert [r.status_code for r in responses] == [200] * 4
+    assert all(r.json()["appointment"]["department"] == "Dentistry" for r in responses)
+    assert calls == [1]
+    assert ocr_flights.stats()["coalesced"] - before == 3